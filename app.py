@@ -1,21 +1,31 @@
 from fastapi import FastAPI, Request
+import asyncio
+import tempfile
+
 import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.responses import HTMLResponse, RedirectResponse
-from uvicorn import run as app_run
 
 from typing import Optional
 
 # Importing constants and pipeline modules from the project
 from src.constants import APP_HOST, APP_PORT
 from src.pipline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.entity.estimator import TargetValueMapping
-from src.pipline.training_pipeline import TrainPipeline
+from src.entity.estimator import MyModel, TargetValueMapping
+from src.pipline.inference_executor import InferenceExecutor
+from src.pipline.micro_batcher import MicroBatcher
+from src.pipline.batch_file_scorer import BatchFileScorer, OUTPUT_FORMATS, OUTPUT_MEDIA_TYPES, prediction_labels
+from src.pipline.training_jobs import TrainingJobRunner
 from src.entity.s3_estimator import Proj1Estimator
 from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.model_registry import ModelRegistry, ModelRefresher
+from src.utils.input_normalization import normalize_vehicle_frame
+from src.logger import logging
+from src.metrics import (BATCH_SIZE, CONTENT_TYPE as METRICS_CONTENT_TYPE, PREDICTED_ROWS, STAGE_LATENCY,
+                         MetricsMiddleware, MetricsRegistry)
 
 # Initialize FastAPI application
 app = FastAPI()
@@ -26,6 +36,16 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Set up Jinja2 template engine for rendering HTML templates
 templates = Jinja2Templates(directory='templates')
 
+# Blocking inference runs on a bounded thread pool, training runs as a background job in its own process
+inference_executor = InferenceExecutor(max_workers=VehiclePredictorConfig().inference_max_workers)
+training_job_runner = TrainingJobRunner()
+
+# Concurrent single-row form predictions are stacked into one vectorized model call
+micro_batcher = MicroBatcher(predict_fn=VehicleDataClassifier().predict_records,
+                             executor=inference_executor,
+                             max_batch_size=VehiclePredictorConfig().micro_batch_max_size,
+                             max_wait_ms=VehiclePredictorConfig().micro_batch_max_wait_ms)
+
 # Allow all origins for Cross-Origin Resource Sharing (CORS)
 origins = ["*"]
 
@@ -38,6 +58,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Count and time every request per route for /metrics
+app.add_middleware(MetricsMiddleware)
+
 class DataForm:
     """
     DataForm class to handle and process incoming form data.
@@ -76,6 +99,43 @@ class DataForm:
         self.Vehicle_Age_gt_2_Years = form.get("Vehicle_Age_gt_2_Years")
         self.Vehicle_Damage_Yes = form.get("Vehicle_Damage_Yes")
 
+@app.on_event("startup")
+async def load_production_model():
+    """
+    Loads the production model into the shared ModelRegistry once, so prediction
+    requests reuse it instead of downloading model.pkl from S3 on every call.
+    The registry warms every model up with a synthetic batch before caching it;
+    /readyz reports ready only after that.
+    """
+    config = VehiclePredictorConfig()
+    MyModel.set_inference_backend(config.inference_backend, max_batch_rows=config.tree_evaluator_max_batch_rows)
+    ModelRegistry.warmup_batch_rows = config.model_warmup_batch_rows
+    try:
+        ModelRegistry().get_model(bucket_name=config.model_bucket_name, model_path=config.model_file_path)
+    except Exception as e:
+        # keep serving; the model will be loaded lazily by the first prediction request
+        # (or by the refresher's next poll), /readyz stays 503 until then
+        logging.error(f"Could not preload production model at startup: {e}")
+
+    # Poll the model's ETag in the background and hot-swap new versions pushed by ModelPusher
+    app.state.model_refresher = ModelRefresher(bucket_name=config.model_bucket_name,
+                                               model_path=config.model_file_path,
+                                               interval_seconds=config.model_refresh_interval_seconds)
+    app.state.model_refresher.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    """
+    Stops the background model refresher thread, the micro-batcher, the inference pool
+    and the training job runner.
+    """
+    refresher = getattr(app.state, "model_refresher", None)
+    if refresher is not None:
+        refresher.stop()
+    await micro_batcher.stop()
+    InferenceExecutor.shutdown()
+    training_job_runner.shutdown()
+
 # Route to render the main page with the form
 @app.get("/", tags=["authentication"])
 async def index(request: Request):
@@ -89,16 +149,82 @@ async def index(request: Request):
 @app.get("/train")
 async def trainRouteClient():
     """
-    Endpoint to initiate the model training pipeline.
+    Endpoint to start the model training pipeline as a background job.
+    Returns the job id right away; poll /train/{job_id} for its status.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        job = training_job_runner.submit()
+        return job.to_dict()
 
     except Exception as e:
         return Response(f"Error Occurred! {e}")
 
+# Route to check the status of a training job
+@app.get("/train/{job_id}")
+async def trainStatusRoute(job_id: str):
+    """
+    Endpoint to get the status (queued / running / succeeded / failed) of a training job.
+    """
+    job = training_job_runner.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown training job {job_id}"})
+    return job.to_dict()
+
+# Liveness probe: the process and its event loop are up
+@app.get("/healthz")
+async def healthz():
+    """
+    Endpoint for liveness checks, answers as long as the app is running (model loaded or not).
+    """
+    return {"status": "ok"}
+
+# Readiness probe: only route traffic here once the production model is loaded and warm
+@app.get("/readyz")
+async def readyz():
+    """
+    Endpoint for readiness checks: 200 once the production model is loaded and warmed up, 503 before.
+    """
+    config = VehiclePredictorConfig()
+    registry = ModelRegistry()
+    entry = registry.get_entry(bucket_name=config.model_bucket_name, model_path=config.model_file_path)
+    if not registry.is_ready(bucket_name=config.model_bucket_name, model_path=config.model_file_path):
+        reason = "model not loaded" if entry is None else "model warm-up failed"
+        return JSONResponse(status_code=503, content={"ready": False, "reason": reason})
+    return {"ready": True,
+            "model": f"s3://{entry.bucket_name}/{entry.model_path}",
+            "etag": entry.etag,
+            "loaded_at": entry.loaded_at,
+            "warmup_seconds": entry.warmup_seconds}
+
+# Route to drop the cached production model so the next prediction reloads it from S3
+@app.post("/model/invalidate")
+async def invalidateModelRoute():
+    """
+    Endpoint to explicitly invalidate the in-process model cache.
+    """
+    try:
+        ModelRegistry().invalidate()
+        return {"status": True}
+    except Exception as e:
+        return {"status": False, "error": f"{e}"}
+
+# Route to inspect the micro-batching settings and batch size metrics
+@app.get("/predict/batching")
+async def batchingStatsRoute():
+    """
+    Endpoint returning max-batch / max-wait settings and per-batch size counts of the micro-batcher.
+    """
+    return micro_batcher.stats()
+
+# Prometheus scrape endpoint
+@app.get("/metrics")
+async def metrics():
+    """
+    Endpoint exposing request/row counters, per-stage latency and batch size histograms and the
+    serving model's version / load time in the Prometheus text format.
+    """
+    return PlainTextResponse(MetricsRegistry().render(), media_type=METRICS_CONTENT_TYPE)
+
 # Route to handle form submission and make predictions
 @app.post("/")
 async def predictRouteClient(request: Request):
@@ -107,38 +233,39 @@ async def predictRouteClient(request: Request):
     """
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
-        
-        vehicle_data = VehicleData(
-                                Gender= form.Gender,
-                                Age = form.Age,
-                                Driving_License = form.Driving_License,
-                                Region_Code = form.Region_Code,
-                                Previously_Insured = form.Previously_Insured,
-                                Annual_Premium = form.Annual_Premium,
-                                Policy_Sales_Channel = form.Policy_Sales_Channel,
-                                Vintage = form.Vintage,
-                                Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
-                                Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
-                                Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
-                                )
-
-        # Convert form data into a DataFrame for the model
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        with STAGE_LATENCY.time(stage="form_parse"):
+            await form.get_vehicle_data()
+
+        with STAGE_LATENCY.time(stage="feature_prep"):
+            vehicle_data = VehicleData(
+                                    Gender= form.Gender,
+                                    Age = form.Age,
+                                    Driving_License = form.Driving_License,
+                                    Region_Code = form.Region_Code,
+                                    Previously_Insured = form.Previously_Insured,
+                                    Annual_Premium = form.Annual_Premium,
+                                    Policy_Sales_Channel = form.Policy_Sales_Channel,
+                                    Vintage = form.Vintage,
+                                    Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
+                                    Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
+                                    Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
+                                    )
+
+            # Convert form data into a flat record, encoded straight into model features (no DataFrame)
+            vehicle_record = vehicle_data.get_vehicle_input_record()
+
+        # Make a prediction (batched with concurrent requests) and retrieve the result
+        value = (await micro_batcher.predict([vehicle_record]))[0]
+        PREDICTED_ROWS.inc(endpoint="/")
 
         # Interpret the prediction result using TargetValueMapping
-        mapping = TargetValueMapping().reverse_mapping()
-        try:
-            label = mapping.get(int(value), 'no')
-        except Exception:
-            label = 'no'
-        status = "Response-Yes" if str(label).lower() == 'yes' else "Response-No"
+        with STAGE_LATENCY.time(stage="label_mapping"):
+            mapping = TargetValueMapping().reverse_mapping()
+            try:
+                label = mapping.get(int(value), 'no')
+            except Exception:
+                label = 'no'
+            status = "Response-Yes" if str(label).lower() == 'yes' else "Response-No"
 
         # Render the same HTML page with the prediction result
         return templates.TemplateResponse(
@@ -153,34 +280,36 @@ async def predictRouteClient(request: Request):
 async def predict_api(request: Request):
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
-        
-        vehicle_data = VehicleData(
-                                Gender= form.Gender,
-                                Age = form.Age,
-                                Driving_License = form.Driving_License,
-                                Region_Code = form.Region_Code,
-                                Previously_Insured = form.Previously_Insured,
-                                Annual_Premium = form.Annual_Premium,
-                                Policy_Sales_Channel = form.Policy_Sales_Channel,
-                                Vintage = form.Vintage,
-                                Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
-                                Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
-                                Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
-                                )
-
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        model_predictor = VehicleDataClassifier()
-
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
-
-        mapping = TargetValueMapping().reverse_mapping()
-        try:
-            label = mapping.get(int(value), 'no')
-        except Exception:
-            label = 'no'
-        status = "Response-Yes" if str(label).lower() == 'yes' else "Response-No"
+        with STAGE_LATENCY.time(stage="form_parse"):
+            await form.get_vehicle_data()
+
+        with STAGE_LATENCY.time(stage="feature_prep"):
+            vehicle_data = VehicleData(
+                                    Gender= form.Gender,
+                                    Age = form.Age,
+                                    Driving_License = form.Driving_License,
+                                    Region_Code = form.Region_Code,
+                                    Previously_Insured = form.Previously_Insured,
+                                    Annual_Premium = form.Annual_Premium,
+                                    Policy_Sales_Channel = form.Policy_Sales_Channel,
+                                    Vintage = form.Vintage,
+                                    Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
+                                    Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
+                                    Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
+                                    )
+
+            vehicle_record = vehicle_data.get_vehicle_input_record()
+
+        value = (await micro_batcher.predict([vehicle_record]))[0]
+        PREDICTED_ROWS.inc(endpoint="/predict")
+
+        with STAGE_LATENCY.time(stage="label_mapping"):
+            mapping = TargetValueMapping().reverse_mapping()
+            try:
+                label = mapping.get(int(value), 'no')
+            except Exception:
+                label = 'no'
+            status = "Response-Yes" if str(label).lower() == 'yes' else "Response-No"
 
         return {"prediction": status}
         
@@ -188,6 +317,50 @@ async def predict_api(request: Request):
         return {"error": str(e)}
 
 
+def score_batch_rows(rows: list, debug: bool = False) -> dict:
+    """
+    Blocking part of /predict_batch: normalizes the pasted rows and runs the model on them.
+    """
+    # Build DataFrame from provided rows and normalize it into the model's input columns
+    # (Vehicle_Age / Vehicle_Damage / Gender parsing, numeric coercion) in one vectorized pass
+    with STAGE_LATENCY.time(stage="normalize"):
+        df = normalize_vehicle_frame(pd.DataFrame(rows))
+    BATCH_SIZE.observe(len(df), source="predict_batch")
+
+    # Call model predictor (but load underlying MyModel to optionally inspect transformed features)
+    estimator = Proj1Estimator(
+        bucket_name=VehiclePredictorConfig().model_bucket_name,
+        model_path=VehiclePredictorConfig().model_file_path,
+    )
+    loaded = estimator.get_model()
+
+    # Attempt a safe transform only for debug info (do not use result for prediction); the
+    # feature encoder works for pickled and bundled models alike (bundles have no preprocessing_object)
+    sample = None
+    if debug:
+        try:
+            encoder = loaded.get_feature_encoder()
+            transformed = encoder.encode_frame(df) if encoder is not None else loaded.transform_features(df.copy())
+            first_row = transformed[0].tolist() if len(transformed) else None
+            sample = {"transformed_shape": list(transformed.shape), "transformed_first_row": first_row}
+        except Exception as e:
+            logging.warning(f"Could not build the debug sample of /predict_batch: {e}")
+            sample = None
+
+    # Use estimator.predict which runs MyModel.predict and handles missing columns gracefully
+    raw_preds = estimator.predict(dataframe=df)
+
+    # Map raw numeric outputs to labels using TargetValueMapping (anything but "yes" is "no")
+    with STAGE_LATENCY.time(stage="label_mapping"):
+        statuses = prediction_labels(raw_preds)
+    PREDICTED_ROWS.inc(len(statuses), endpoint="/predict_batch")
+
+    if debug:
+        return {"predictions": statuses, "debug": sample}
+
+    return {"predictions": statuses}
+
+
 @app.post("/predict_batch")
 async def predict_batch(request: Request):
     """Accepts JSON with `rows`: list of objects (columns -> values).
@@ -199,109 +372,70 @@ async def predict_batch(request: Request):
         if not rows or not isinstance(rows, list):
             return {"error": "Provide 'rows' as a list of objects"}
 
-        # Build DataFrame from provided rows
-        df = pd.DataFrame(rows)
-
-        # Normalize column names: strip, replace spaces with underscores, remove special chars
-        df.columns = df.columns.str.strip().str.replace(' ', '_').str.replace(r'[^0-9A-Za-z_]', '', regex=True)
-
-        # If pasted format uses 'Vehicle_Age' and 'Vehicle_Damage' convert to model expected columns
-        # Parse Vehicle_Age into two dummy columns
-        if 'Vehicle_Age' in df.columns:
-            def parse_vehicle_age(v):
-                try:
-                    if pd.isna(v):
-                        return 0, 0
-                    s = str(v).lower()
-                    if '<' in s or 'lt' in s or 'less' in s or '<1' in s or '< 1' in s:
-                        return 1, 0
-                    if '>' in s or 'gt' in s or '>2' in s or '> 2' in s or 'greater' in s:
-                        return 0, 1
-                    if '1-2' in s or '1 to 2' in s or '1 – 2' in s or '1 2' in s:
-                        return 0, 0
-                    # fallback: if contains '1' and not '2'
-                    if '1' in s and '2' not in s:
-                        return 0, 0
-                    return 0, 0
-                except Exception:
-                    return 0, 0
-
-            parsed = df['Vehicle_Age'].apply(lambda x: pd.Series(parse_vehicle_age(x), index=['Vehicle_Age_lt_1_Year', 'Vehicle_Age_gt_2_Years']))
-            df = pd.concat([df, parsed], axis=1)
-
-        # Map Vehicle_Damage strings to Vehicle_Damage_Yes binary
-        if 'Vehicle_Damage' in df.columns:
-            df['Vehicle_Damage_Yes'] = df['Vehicle_Damage'].astype(str).str.lower().map({'yes': 1, 'no': 0})
-
-        # Map Gender strings to binary when needed
-        if 'Gender' in df.columns and df['Gender'].dtype == object:
-            df['Gender'] = df['Gender'].str.strip().map({'Female': 0, 'Male': 1}).fillna(0).astype(int)
-
-        # Coerce numeric columns to numeric types where applicable
-        numeric_cols = ['Age', 'Driving_License', 'Region_Code', 'Previously_Insured', 'Annual_Premium', 'Policy_Sales_Channel', 'Vintage']
-        for c in numeric_cols:
-            if c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
-
-        # Ensure expected columns exist for the model
-        expected_cols = [
-            "Gender","Age","Driving_License","Region_Code",
-            "Previously_Insured","Annual_Premium","Policy_Sales_Channel",
-            "Vintage","Vehicle_Age_lt_1_Year","Vehicle_Age_gt_2_Years",
-            "Vehicle_Damage_Yes"
-        ]
-        for c in expected_cols:
-            if c not in df.columns:
-                df[c] = 0
-
-        # Drop identifier columns if present
-        for col in ['id', '_id']:
-            if col in df.columns:
-                df = df.drop(columns=[col])
-
-        # Reorder columns to expected order (model may not require exact order but keep tidy)
-        df = df[expected_cols]
-
-        # Call model predictor (but load underlying MyModel to optionally inspect transformed features)
-        estimator = Proj1Estimator(
-            bucket_name=VehiclePredictorConfig().model_bucket_name,
-            model_path=VehiclePredictorConfig().model_file_path,
-        )
-        loaded = estimator.load_model()
-
-        # Attempt a safe transform only for debug info (do not use result for prediction)
-        sample = None
-        try:
-            transformed = loaded.preprocessing_object.transform(df)
-            try:
-                first_row = transformed[0].tolist() if hasattr(transformed[0], 'tolist') else None
-            except Exception:
-                first_row = None
-            sample = {"transformed_shape": getattr(transformed, 'shape', None), "transformed_first_row": first_row}
-        except Exception:
-            sample = None
+        # pandas/model work runs on the inference pool so the event loop stays responsive
+        return await inference_executor.run(score_batch_rows, rows=rows, debug=body.get("debug", False))
 
-        # Use estimator.predict which runs MyModel.predict and handles missing columns gracefully
-        raw_preds = estimator.predict(dataframe=df)
+    except Exception as e:
+        return {"error": str(e)}
 
-        # Map raw numeric outputs to labels using TargetValueMapping
-        mapping = TargetValueMapping().reverse_mapping()
-        statuses = []
-        for v in raw_preds:
-            try:
-                lab = mapping.get(int(v), 'no')
-            except Exception:
-                lab = 'no'
-            statuses.append("Response-Yes" if str(lab).lower() == 'yes' else "Response-No")
+@app.post("/predict_file")
+async def predict_file(request: Request, format: Optional[str] = None, output: str = "csv"):
+    """Accepts a CSV / Parquet / NDJSON file as the raw request body (format from the `format`
+    query parameter or the Content-Type) and streams the predictions back as CSV or NDJSON
+    (`output`), chunk by chunk as they are scored.
+    """
+    try:
+        input_format = BatchFileScorer.resolve_format(format, request.headers.get("content-type"))
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format {output!r}, expected one of {', '.join(OUTPUT_FORMATS)}")
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    # Spool the upload (in memory up to a limit, then on disk): parquet needs a seekable file
+    config = VehiclePredictorConfig()
+    upload = tempfile.SpooledTemporaryFile(max_size=config.batch_upload_max_memory_bytes)
+    try:
+        async for body_chunk in request.stream():
+            upload.write(body_chunk)
+        upload.seek(0)
 
-        if body.get("debug", False):
-            return {"predictions": statuses, "debug": sample}
+        chunks = BatchFileScorer(config).score_file(upload, input_format, output)
+        # score the first chunk before answering so unreadable files still get a proper error status
+        first = await inference_executor.run(next, chunks, None)
+    except Exception as e:
+        upload.close()
+        return JSONResponse(status_code=400, content={"error": str(e)})
 
-        return {"predictions": statuses}
+    def close_upload(pending: Optional[asyncio.Future] = None) -> None:
+        if pending is not None and not pending.cancelled():
+            pending.exception()     # retrieved so it isn't reported as never retrieved
+        chunks.close()
+        upload.close()
 
-    except Exception as e:
-        return {"error": str(e)}
+    async def stream_predictions():
+        pending = None
+        try:
+            text = first
+            while text is not None:
+                yield text
+                # shielded: a client disconnect cancels this await but can't stop the pool thread,
+                # which keeps reading the upload until next() returns
+                pending = asyncio.ensure_future(inference_executor.run(next, chunks, None))
+                text = await asyncio.shield(pending)
+        except Exception as e:
+            logging.error(f"Scoring of uploaded {input_format} file failed mid-stream: {e}")
+            raise
+        finally:
+            if pending is not None and not pending.done():
+                # closing the generator / upload now would race the thread still running next()
+                pending.add_done_callback(close_upload)
+            else:
+                close_upload()
+
+    return StreamingResponse(stream_predictions(), media_type=OUTPUT_MEDIA_TYPES[output])
 
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
+    # imported here, `uvicorn app:app` has it loaded already and importing app (tests, workers) doesn't need it
+    from uvicorn import run as app_run
     app_run(app, host=APP_HOST, port=APP_PORT)
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Parity check and latency comparison of the compiled FeatureEncoder against the pandas path
+(VehicleData.get_vehicle_input_data_frame -> MyModel.transform_features) over the ingested training data.
+
+    python benchmarks/feature_encoder_parity.py \
+        --data Artifacts/data_ingestion/ingested/train.parquet \
+        --model Artifacts/model_trainer/trained_model/model.pkl
+
+Every row is turned into the record the /predict form would send. The whole file is
+compared in one vectorized pass, and --sample rows additionally go through the per-request
+VehicleData path one by one. Exits with status 1 if any feature differs.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from src.entity.config_entity import Data_Ingestion_config, ModelTrainerConfig
+from src.entity.model_bundle import load_model_file
+from src.pipline.prediction_pipeline import VehicleData
+from src.utils.main_utils import load_dataframe
+
+FORM_COLUMNS = ["Gender", "Age", "Driving_License", "Region_Code", "Previously_Insured", "Annual_Premium",
+                "Policy_Sales_Channel", "Vintage", "Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years",
+                "Vehicle_Damage_Yes"]
+
+
+def to_form_frame(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Raw collection rows -> the columns the /predict form posts."""
+    df = raw_df.copy()
+    df["Vehicle_Age_lt_1_Year"] = (df["Vehicle_Age"] == "< 1 Year").astype(int)
+    df["Vehicle_Age_gt_2_Years"] = (df["Vehicle_Age"] == "> 2 Years").astype(int)
+    df["Vehicle_Damage_Yes"] = (df["Vehicle_Damage"] == "Yes").astype(int)
+    return df[FORM_COLUMNS]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--data", default=Data_Ingestion_config.training_file_path)
+    parser.add_argument("--model", default=ModelTrainerConfig.trained_model_file_path)
+    parser.add_argument("--sample", type=int, default=500, help="rows also checked through VehicleData one by one")
+    args = parser.parse_args()
+
+    model = load_model_file(args.model)
+    if model.preprocessing_object is None:
+        print("model bundles only hold the compiled encoder, pass a pickled model to compare against sklearn")
+        return 1
+    encoder = model.get_feature_encoder()
+    if encoder is None:
+        print("preprocessor can not be compiled, nothing to compare")
+        return 1
+
+    form_df = to_form_frame(load_dataframe(args.data))
+    records = form_df.to_dict(orient="records")
+    print(f"{len(records)} rows, {encoder}")
+
+    # whole file, vectorized: the same frame VehicleData builds for one row, for all rows
+    expected = np.asarray(model.transform_features(form_df.copy()), dtype=np.float64)
+    actual = encoder.transform(encoder.encode_raw(records))
+    float64_equal = np.array_equal(expected, actual, equal_nan=True)
+    float32_equal = np.array_equal(expected.astype(np.float32), encoder.encode_many(records), equal_nan=True)
+    print(f"vectorized parity  float64: {float64_equal}  float32: {float32_equal}")
+
+    # per request path on a sample, as /predict used to run it
+    mismatches = 0
+    pandas_seconds, encoder_seconds = 0.0, 0.0
+    for record in records[:args.sample]:
+        start = time.perf_counter()
+        row_df = VehicleData(**record).get_vehicle_input_data_frame()
+        pandas_row = np.asarray(model.transform_features(row_df), dtype=np.float64).astype(np.float32)
+        pandas_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        encoder_row = encoder.encode(record)
+        encoder_seconds += time.perf_counter() - start
+        mismatches += not np.array_equal(pandas_row, encoder_row, equal_nan=True)
+
+    sample = min(args.sample, len(records))
+    if sample:
+        print(f"per-row parity     {sample - mismatches}/{sample} identical")
+        print(f"per-row latency    pandas {pandas_seconds / sample * 1e6:9.1f} us   "
+              f"encoder {encoder_seconds / sample * 1e6:7.1f} us")
+
+    return 0 if float64_equal and float32_equal and mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Import time report of the serving entry point, from `python -X importtime`.
+
+    python benchmarks/import_time.py                  # import app
+    python benchmarks/import_time.py --module src.pipline.training_pipeline --allow-training
+
+Imports --module --repeat times in fresh interpreters and prints the median wall time, the
+median cumulative import time and the top-level packages that cost the most (self time of
+all their modules). The serving process must not import the training stack: exits with
+status 1 if any of FORBIDDEN_PREFIXES is imported (unless --allow-training).
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules only training needs (loaded by the /train job process)
+FORBIDDEN_PREFIXES = ("sklearn", "xgboost", "imblearn", "scipy", "matplotlib", "pymongo",
+                      "src.pipline.training_pipeline", "src.components", "src.data_access")
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def import_once(module: str):
+    """Returns (wall seconds, [(self us, cumulative us, depth, name)]) of one fresh import."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                               check=True, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), (len(indent) - 1) // 2, name))
+    return wall, rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--allow-training", action="store_true", help="don't fail on training modules")
+    args = parser.parse_args()
+
+    walls, totals, package_times = [], [], defaultdict(list)
+    for _ in range(args.repeat):
+        wall, rows = import_once(args.module)
+        walls.append(wall)
+        totals.append(next(cumulative for _, cumulative, depth, name in rows if name == args.module and depth == 0))
+        per_package = defaultdict(int)
+        for self_us, _, _, name in rows:
+            per_package[name.split(".")[0] if not name.startswith("src.") else ".".join(name.split(".")[:2])] += self_us
+        for package, self_us in per_package.items():
+            package_times[package].append(self_us)
+
+    print(f"import {args.module}: {statistics.median(totals) / 1e3:.0f} ms import time, "
+          f"{statistics.median(walls) * 1e3:.0f} ms wall (interpreter start included), "
+          f"{len(rows)} modules, median of {args.repeat}")
+    print(f"{'package':<28} {'self ms':>8}")
+    ranked = sorted(package_times.items(), key=lambda item: -statistics.median(item[1]))
+    for package, times in ranked[:args.top]:
+        print(f"{package:<28} {statistics.median(times) / 1e3:>8.1f}")
+
+    imported = sorted({name for _, _, _, name in rows if name.startswith(FORBIDDEN_PREFIXES)})
+    if imported:
+        print(f"training modules imported: {', '.join(imported[:10])}{' ...' if len(imported) > 10 else ''}")
+        return 0 if args.allow_training else 1
+    print("no training modules imported")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
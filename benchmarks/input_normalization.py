@@ -0,0 +1,123 @@
+"""
+Benchmark of the vectorized /predict_batch input normalization (src/utils/input_normalization.py)
+against the previous row-by-row implementation, on synthetic pasted batches.
+
+    python benchmarks/input_normalization.py --sizes 1000 100000 1000000
+
+Every batch is generated with the raw spreadsheet columns (Gender / Vehicle_Age / Vehicle_Damage
+as strings, a few unparsable numeric cells). Both implementations must produce the
+same frame; the previous implementation builds one pd.Series per row, so it is only run up to
+--legacy-max-rows. Exits with status 1 on any mismatch.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from src.utils.input_normalization import MODEL_INPUT_COLUMNS, normalize_vehicle_frame
+
+
+def legacy_normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    The normalization /predict_batch used to run, kept as the baseline. Only the Gender dtype
+    check is adapted so pandas 3 string columns are mapped like object columns were.
+    """
+    df = df.copy()
+    df.columns = df.columns.str.strip().str.replace(' ', '_').str.replace(r'[^0-9A-Za-z_]', '', regex=True)
+
+    if 'Vehicle_Age' in df.columns:
+        def parse_vehicle_age(v):
+            try:
+                if pd.isna(v):
+                    return 0, 0
+                s = str(v).lower()
+                if '<' in s or 'lt' in s or 'less' in s or '<1' in s or '< 1' in s:
+                    return 1, 0
+                if '>' in s or 'gt' in s or '>2' in s or '> 2' in s or 'greater' in s:
+                    return 0, 1
+                return 0, 0
+            except Exception:
+                return 0, 0
+
+        parsed = df['Vehicle_Age'].apply(lambda x: pd.Series(parse_vehicle_age(x), index=['Vehicle_Age_lt_1_Year', 'Vehicle_Age_gt_2_Years']))
+        df = pd.concat([df, parsed], axis=1)
+
+    if 'Vehicle_Damage' in df.columns:
+        df['Vehicle_Damage_Yes'] = df['Vehicle_Damage'].astype(str).str.lower().map({'yes': 1, 'no': 0})
+
+    if 'Gender' in df.columns and not pd.api.types.is_numeric_dtype(df['Gender']):
+        df['Gender'] = df['Gender'].str.strip().map({'Female': 0, 'Male': 1}).fillna(0).astype(int)
+
+    numeric_cols = ['Age', 'Driving_License', 'Region_Code', 'Previously_Insured', 'Annual_Premium', 'Policy_Sales_Channel', 'Vintage']
+    for c in numeric_cols:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+
+    for c in MODEL_INPUT_COLUMNS:
+        if c not in df.columns:
+            df[c] = 0
+    return df[MODEL_INPUT_COLUMNS]
+
+
+def make_batch(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic batch shaped like the JSON batch.js posts: numeric cells as numbers (a few
+    unparsable text cells in Annual_Premium), Age pasted as text, categoricals as strings.
+    """
+    rng = np.random.default_rng(seed)
+    premium = rng.uniform(2630, 100000, n_rows).round(1).astype(object)
+    premium[rng.random(n_rows) < 0.01] = "n/a"
+    return pd.DataFrame({
+        "id": np.arange(n_rows),
+        "Gender": rng.choice(np.array(["Male", "Female", " Male ", None], dtype=object), n_rows, p=[.5, .45, .04, .01]),
+        "Age": rng.integers(20, 85, n_rows).astype(str),
+        "Driving License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(float),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": premium,
+        "Policy_Sales_Channel": rng.integers(1, 164, n_rows).astype(float),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age": rng.choice(np.array(["< 1 Year", "1-2 Year", "> 2 Years", None], dtype=object), n_rows,
+                                  p=[.43, .52, .04, .01]),
+        "Vehicle_Damage": rng.choice(np.array(["Yes", "No", "unknown"], dtype=object), n_rows, p=[.5, .49, .01]),
+    })
+
+
+def timed(func, df: pd.DataFrame):
+    start = time.perf_counter()
+    result = func(df)
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max-rows", type=int, default=100_000,
+                        help="skip the row-by-row baseline above this many rows")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'rows':>10} {'legacy s':>10} {'vectorized s':>13} {'speedup':>8}  identical")
+    for n_rows in args.sizes:
+        df = make_batch(n_rows)
+        new, new_seconds = timed(normalize_vehicle_frame, df)
+
+        if n_rows > args.legacy_max_rows:
+            print(f"{n_rows:>10} {'-':>10} {new_seconds:>13.3f} {'-':>8}  -")
+            continue
+
+        old, old_seconds = timed(legacy_normalize, df)
+        identical = np.array_equal(old.to_numpy(dtype=np.float64), new.to_numpy(dtype=np.float64), equal_nan=True)
+        failed |= not identical
+        print(f"{n_rows:>10} {old_seconds:>10.3f} {new_seconds:>13.3f} {old_seconds / new_seconds:>7.0f}x  {identical}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
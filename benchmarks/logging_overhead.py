@@ -0,0 +1,99 @@
+"""
+Request throughput of the /predict hot path with the different logging setups of src/logger.
+
+    python benchmarks/logging_overhead.py --model Artifacts/<timestamp>/model_trainer/trained_model/model.pkl
+
+Every simulated request does what /predict does for one form: VehicleData -> flat record
+(3 INFO lines) -> compiled FeatureEncoder -> MyModel.predict_features, optionally followed by
+the DataFrame path (VehicleData frame + MyModel.predict, 2 more INFO lines) with --frame.
+Requests run on --threads threads like the inference pool. Each logging setup runs in its own
+interpreter because src.logger configures logging at import time (from environment variables):
+
+    off      LOG_LEVEL=WARNING (no INFO lines at all)
+    sync     LOG_ASYNC=0, file + console written by the request threads (the old setup)
+    queue    default, QueueHandler -> background QueueListener
+    sampled  queue + LOG_SAMPLE_RATE=0.01 for the per-request modules
+
+The console output of the workers goes to a pipe, as it does under docker / systemd.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = {
+    "off": {"LOG_LEVEL": "WARNING"},
+    "sync": {"LOG_ASYNC": "0"},
+    "queue": {},
+    "sampled": {"LOG_SAMPLE_RATE": "0.01"},
+}
+
+RECORD = {"Gender": 1, "Age": 44, "Driving_License": 1, "Region_Code": 28.0, "Previously_Insured": 0,
+          "Annual_Premium": 40454.0, "Policy_Sales_Channel": 26.0, "Vintage": 217, "Vehicle_Age_lt_1_Year": 0,
+          "Vehicle_Age_gt_2_Years": 1, "Vehicle_Damage_Yes": 1}
+
+
+def run_worker(args) -> None:
+    """Runs the requests in this interpreter and prints requests/s."""
+    from src.entity.model_bundle import load_model_file
+    from src.logger import listener
+    from src.pipline.prediction_pipeline import VehicleData
+
+    model = load_model_file(args.model)
+    encoder = model.get_feature_encoder()
+
+    def request(_):
+        vehicle_data = VehicleData(**RECORD)
+        model.predict_features(encoder.encode_many([vehicle_data.get_vehicle_input_record()]))
+        if args.frame:
+            model.predict(vehicle_data.get_vehicle_input_data_frame())
+
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(request, range(args.requests // 10)))     # warm up
+        start = time.perf_counter()
+        list(pool.map(request, range(args.requests)))
+        seconds = time.perf_counter() - start
+    if listener is not None:
+        listener.stop()     # the queued lines are written after the measurement, report when they are done
+    print(f"RESULT {args.requests / seconds:.1f} {time.perf_counter() - start - seconds:.3f}")
+
+
+def main() -> int:
+    from src.entity.config_entity import XGB_config
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=XGB_config.trained_model_file_path)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--frame", action="store_true", help="also run the DataFrame path of every request")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES))
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    command = [sys.executable, os.path.abspath(__file__), "--worker", "--model", args.model,
+               "--requests", str(args.requests), "--threads", str(args.threads)] + (["--frame"] if args.frame else [])
+    results = {}
+    print(f"{'logging':>8} {'requests/s':>11} {'vs off':>7} {'drain s':>8}")
+    for mode in args.modes:
+        env = dict(os.environ, **MODES[mode])
+        completed = subprocess.run(command, env=env, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True)
+        line = [line for line in completed.stdout.splitlines() if line.startswith("RESULT")][-1]
+        throughput, drain_seconds = (float(value) for value in line.split()[1:])
+        results[mode] = throughput
+        relative = f"{throughput / results['off']:.2f}x" if "off" in results else "-"
+        print(f"{mode:>8} {throughput:>11.1f} {relative:>7} {drain_seconds:>8.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
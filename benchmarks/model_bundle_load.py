@@ -0,0 +1,122 @@
+"""
+Parity check and load-time comparison of a model bundle against the pickled MyModel it is
+built from.
+
+    python benchmarks/model_bundle_load.py \
+        --model Artifacts/<timestamp>/model_trainer/trained_model/model.pkl \
+        --data Artifacts/<timestamp>/data_ingestion/ingested/test.parquet
+
+The pickled model is converted into a bundle in memory, then:
+- features and predictions of both models must be identical on the raw ingested rows
+  (normalized the way /predict_batch does it), with both inference backends
+- both formats are loaded --repeat times in this process (modules already imported)
+- both formats are loaded in fresh interpreters that only imported the serving modules, which is
+  what a new worker pays before it can answer (including the first single-row prediction)
+Exits with status 1 on a parity failure.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+
+from src.entity.config_entity import Data_Ingestion_config, VehiclePredictorConfig, XGB_config
+from src.entity.estimator import MyModel
+from src.entity.model_bundle import dumps_model_bundle, loads_model, loads_model_bundle
+from src.utils.input_normalization import normalize_vehicle_frame
+from src.utils.main_utils import load_dataframe
+
+# run in a fresh interpreter: import what app.py imports to serve, then time load + first prediction
+COLD_LOAD_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+from src.entity.estimator import MyModel
+from src.entity.model_bundle import loads_model
+MyModel.set_inference_backend({backend!r})
+data = open({path!r}, "rb").read()
+from src.utils.main_utils import load_dataframe
+row = load_dataframe({data!r}).head(1)
+start = time.perf_counter()
+model = loads_model(data)
+loaded = time.perf_counter()
+model.predict(row)
+print(loaded - start, time.perf_counter() - start)
+"""
+
+
+def median_seconds(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def cold_load(path: str, data_path: str, backend: str, repeat: int):
+    """Median (load, load + first prediction) seconds over repeat fresh interpreters."""
+    script = COLD_LOAD_SCRIPT.format(root=ROOT, backend=backend, path=path, data=data_path)
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+        timings.append([float(value) for value in output.split()[-2:]])
+    return np.median(np.array(timings), axis=0)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=XGB_config.trained_model_file_path, help="pickled MyModel")
+    parser.add_argument("--data", default=Data_Ingestion_config.testing_file_path, help="raw rows to compare on")
+    parser.add_argument("--repeat", type=int, default=20, help="in-process loads per format")
+    parser.add_argument("--cold-repeat", type=int, default=3, help="fresh interpreters per format")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as file_obj:
+        pickled = file_obj.read()
+    model = loads_model(pickled)
+    if not isinstance(model, MyModel) or model.preprocessing_object is None:
+        print("--model has to be a pickled MyModel")
+        return 1
+    bundle = dumps_model_bundle(model)
+    bundled = loads_model_bundle(bundle)
+    print(f"pickle {len(pickled) / 1e6:.2f} MB   bundle {len(bundle) / 1e6:.2f} MB")
+
+    rows = normalize_vehicle_frame(load_dataframe(args.data))
+    features_equal = np.array_equal(np.asarray(model.transform_features(rows.copy()), dtype=np.float64),
+                                    bundled.transform_features(rows), equal_nan=True)
+    predictions_equal = True
+    for backend in ("xgboost", "numpy"):
+        MyModel.set_inference_backend(backend)
+        for batch in (rows[:1], rows[:32], rows):
+            predictions_equal &= bool(np.array_equal(model.predict(batch.copy()), bundled.predict(batch)))
+    MyModel.set_inference_backend(VehiclePredictorConfig.inference_backend)
+    print(f"{len(rows)} rows   features identical: {features_equal}   predictions identical: {predictions_equal}")
+    if not (features_equal and predictions_equal):
+        return 1
+
+    print(f"warm load          pickle {median_seconds(lambda: loads_model(pickled), args.repeat) * 1e3:8.2f} ms   "
+          f"bundle {median_seconds(lambda: loads_model(bundle), args.repeat) * 1e3:8.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = {"pickle": os.path.join(tmp_dir, "model.pkl"), "bundle": os.path.join(tmp_dir, "bundle.pkl")}
+        for name, data in (("pickle", pickled), ("bundle", bundle)):
+            with open(paths[name], "wb") as file_obj:
+                file_obj.write(data)
+        for backend in ("xgboost", "numpy"):
+            for name, path in paths.items():
+                load_seconds, ready_seconds = cold_load(path, args.data, backend, args.cold_repeat)
+                print(f"cold {backend:>7} {name:>6}  load {load_seconds * 1e3:8.1f} ms   "
+                      f"load + first prediction {ready_seconds * 1e3:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
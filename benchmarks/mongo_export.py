@@ -0,0 +1,119 @@
+"""
+Time and peak memory of exporting a MongoDB collection into a DataFrame, the old way
+(list(collection.find()) -> DataFrame -> replace 'na') against the streamed, projected,
+typed-chunk export of Proj1_data, and against the partitioned Parquet export (_id ranges
+exported concurrently, then read back).
+
+    MONGODB_URL=mongodb://localhost:27017 python benchmarks/mongo_export.py --docs 1000000
+
+--docs seeds a scratch collection (--collection, dropped afterwards unless --keep) with rows
+shaped like the project data plus an unused --padding bytes field, the kind of field the
+projection skips. Without --docs an existing collection is exported as is. Each export runs in
+its own interpreter so peak RSS is comparable; all must produce the same content hash.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.constants import DATABASE_NAME
+
+WORKERS = ("legacy", "stream", "parquet")
+
+
+def seed(collection, docs: int, padding: int) -> None:
+    rng = random.Random(0)
+    collection.drop()
+    batch = []
+    for i in range(docs):
+        batch.append({
+            "id": i + 1, "Gender": rng.choice(["Male", "Female"]), "Age": rng.randint(20, 85),
+            "Driving_License": rng.randint(0, 1), "Region_Code": float(rng.randint(0, 52)),
+            "Previously_Insured": rng.randint(0, 1),
+            "Vehicle_Age": rng.choice(["< 1 Year", "1-2 Year", "> 2 Years"]),
+            "Vehicle_Damage": rng.choice(["Yes", "No"]), "Annual_Premium": float(rng.randint(2630, 90000)),
+            "Policy_Sales_Channel": "na" if rng.random() < 0.01 else float(rng.randint(1, 163)),
+            "Vintage": rng.randint(10, 299), "Response": rng.randint(0, 1), "padding": "x" * padding,
+        })
+        if len(batch) == 10_000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def run_worker(args) -> None:
+    import numpy as np
+    import pandas as pd
+    from src.data_access.proj1_data import Proj1_data
+
+    data = Proj1_data()
+    start = time.perf_counter()
+    if args.worker == "legacy":
+        df = pd.DataFrame(list(data.get_collection(args.collection, args.database).find()))
+        df = df.replace("na", np.nan)[list(data.read_schema_columns())]
+    elif args.worker == "stream":
+        df = data.export_collection_as_DF(args.collection, args.database)
+    else:
+        with tempfile.TemporaryDirectory() as output_dir:
+            files = data.export_collection_as_parquet(args.collection, output_dir, args.database,
+                                                      partitions=args.partitions, max_workers=args.workers)
+            df = pd.concat([pd.read_parquet(file_path) for file_path in files], ignore_index=True)
+    seconds = time.perf_counter() - start
+    # ids as text in every export (the old one keeps ObjectIds)
+    content_hash = int(pd.util.hash_pandas_object(df.astype(str), index=False).sum())
+    print(json.dumps({"seconds": seconds, "rows": len(df), "hash": content_hash,
+                      "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", default=DATABASE_NAME)
+    parser.add_argument("--collection", default="benchmark_export")
+    parser.add_argument("--docs", type=int, default=0, help="seed the collection with this many documents")
+    parser.add_argument("--padding", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded collection")
+    parser.add_argument("--partitions", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=4, help="partitions exported at the same time")
+    parser.add_argument("--worker", choices=WORKERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    from src.configuration.mongo_db_connection import MongoDBClient
+    collection = MongoDBClient(args.database).client[args.database][args.collection]
+    if args.docs:
+        seed(collection, args.docs, args.padding)
+    try:
+        results = {}
+        for worker in WORKERS:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", worker,
+                                     "--database", args.database, "--collection", args.collection,
+                                     "--partitions", str(args.partitions), "--workers", str(args.workers)],
+                                    check=True, capture_output=True, text=True, cwd=ROOT).stdout
+            results[worker] = json.loads(output.strip().splitlines()[-1])
+            print(f"{worker:>7} {results[worker]['rows']} rows {results[worker]['seconds']:7.2f} s "
+                  f"peak {results[worker]['peak_mb']:7.0f} MB")
+    finally:
+        if args.docs and not args.keep:
+            collection.drop()
+
+    same = all(result["hash"] == results["legacy"]["hash"] for result in results.values())
+    for worker in WORKERS[1:]:
+        print(f"{worker} speedup {results['legacy']['seconds'] / results[worker]['seconds']:.2f}x")
+    print(f"same content: {same}")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Throughput of SimpleStorageService transfers against a local S3 stand-in (moto server).
+
+    pip install "moto[server]"
+    python benchmarks/s3_transfer_throughput.py --size-mb 256 --chunk-mb 16 --concurrency 10
+
+Compares the default boto3 transfer settings with the configured multipart chunk size and
+thread concurrency for file upload/download, the bounded in-memory download buffer and the
+DataFrame -> S3 upload without a temp file.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from boto3.s3.transfer import TransferConfig
+from moto.server import ThreadedMotoServer
+
+BUCKET = "transfer-benchmark"
+PORT = 5555
+
+
+def timed(label: str, size_bytes: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<48} {elapsed:8.2f}s {size_bytes / elapsed / 1024 ** 2:9.1f} MB/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--chunk-mb", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+    os.environ["AWS_ENDPOINT_URL_S3"] = f"http://127.0.0.1:{PORT}"
+
+    import logging
+    from src.cloud_storage.aws_storage import SimpleStorageService
+    logging.getLogger().setLevel(logging.WARNING)
+
+    size_bytes = args.size_mb * 1024 ** 2
+    defaults = SimpleStorageService(transfer_config=TransferConfig())
+    tuned = SimpleStorageService(transfer_config=TransferConfig(
+        multipart_threshold=args.chunk_mb * 1024 ** 2,
+        multipart_chunksize=args.chunk_mb * 1024 ** 2,
+        max_concurrency=args.concurrency,
+    ))
+    tuned.s3_client.create_bucket(Bucket=BUCKET)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        src_path = os.path.join(tmp_dir, "artifact.bin")
+        with open(src_path, "wb") as file_obj:
+            file_obj.write(os.urandom(size_bytes))
+        dst_path = os.path.join(tmp_dir, "downloaded.bin")
+
+        print(f"object size {args.size_mb} MB, chunk {args.chunk_mb} MB, concurrency {args.concurrency}")
+        timed("upload_file (boto3 defaults)", size_bytes,
+              lambda: defaults.upload_file(src_path, "default.bin", BUCKET, remove=False))
+        timed("upload_file (configured)", size_bytes,
+              lambda: tuned.upload_file(src_path, "tuned.bin", BUCKET, remove=False))
+        timed("download_file (boto3 defaults)", size_bytes,
+              lambda: defaults.download_file(BUCKET, "default.bin", dst_path))
+        timed("download_file (configured)", size_bytes,
+              lambda: tuned.download_file(BUCKET, "tuned.bin", dst_path))
+        timed("download_to_buffer (configured)", size_bytes,
+              lambda: tuned.download_to_buffer(BUCKET, "tuned.bin").close())
+        timed("read_object (streamed get)", size_bytes,
+              lambda: tuned.read_object(tuned.s3_resource.Object(BUCKET, "tuned.bin"), decode=False))
+
+    rows = size_bytes // 100    # roughly 100 bytes per CSV row
+    df = pd.DataFrame(np.random.default_rng(0).random((rows, 5)), columns=list("abcde"))
+    csv_bytes = len(df.to_csv(index=False).encode())
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        timed("upload_df_as_csv (in memory, configured)", csv_bytes,
+              lambda: tuned.upload_df_as_csv(df, "frame.csv", BUCKET))
+
+        def temp_file_upload():
+            local_path = os.path.join(tmp_dir, "frame.csv")
+            df.to_csv(local_path, index=None, header=True)
+            defaults.upload_file(local_path, "frame_tmp.csv", BUCKET)
+        timed("to_csv + upload_file (previous behaviour)", csv_bytes, temp_file_upload)
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
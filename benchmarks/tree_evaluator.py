@@ -0,0 +1,69 @@
+"""
+Parity check and latency benchmark of the pure-NumPy TreeEnsembleEvaluator against
+XGBClassifier.predict, on the transformed test set written by DataTransformation.
+
+    python benchmarks/tree_evaluator.py \
+        --model Artifacts/<timestamp>/model_trainer/trained_model/model.pkl \
+        --test Artifacts/<timestamp>/data_transformation/transformed/test.npy
+
+Predicted probabilities must agree within --tolerance and labels must be identical on the whole
+test set, then both backends are timed at every --batch-sizes (test rows are repeated to fill
+large batches). Exits with status 1 on a parity failure.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.entity.config_entity import DataTransformationConfig, XGB_config
+from src.entity.model_bundle import load_model_file
+from src.entity.tree_evaluator import TreeEnsembleEvaluator
+from src.utils.main_utils import load_numpy_array_data
+
+
+def median_seconds(func, X: np.ndarray, min_total_seconds: float = 0.5, max_repeats: int = 1000) -> float:
+    func(X)     # warm up
+    timings = []
+    while len(timings) < max_repeats and (len(timings) < 3 or sum(timings) < min_total_seconds):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=XGB_config.trained_model_file_path)
+    parser.add_argument("--test", default=DataTransformationConfig.transformed_test_file_path,
+                        help="transformed test array, the last column is the target")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 1_000, 100_000])
+    parser.add_argument("--tolerance", type=float, default=1e-5)
+    args = parser.parse_args()
+
+    booster = load_model_file(args.model).trained_model_object
+    X = load_numpy_array_data(args.test)[:, :-1].astype(np.float32)
+    evaluator = TreeEnsembleEvaluator.from_xgb_classifier(booster)
+    print(f"{len(X)} test rows, {evaluator}")
+
+    max_diff = float(np.abs(evaluator.predict_proba(X) - booster.predict_proba(X)[:, 1]).max())
+    labels_equal = bool((evaluator.predict(X) == booster.predict(X)).all())
+    print(f"max |proba diff| {max_diff:.3g}   labels identical: {labels_equal}")
+    if max_diff > args.tolerance or not labels_equal:
+        return 1
+
+    print(f"{'batch':>8} {'xgboost ms':>11} {'numpy ms':>9} {'speedup':>8}")
+    for batch_size in args.batch_sizes:
+        batch = np.resize(X, (batch_size, X.shape[1]))
+        xgb_seconds = median_seconds(booster.predict, batch)
+        numpy_seconds = median_seconds(evaluator.predict, batch)
+        print(f"{batch_size:>8} {xgb_seconds * 1e3:>11.3f} {numpy_seconds * 1e3:>9.3f} "
+              f"{xgb_seconds / numpy_seconds:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,59 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
 from src.configuration.aws_connection import S3Client
-from io import StringIO
-from typing import Union,List
+from src.cloud_storage.disk_cache import LocalObjectCache
+from io import BytesIO, StringIO, TextIOWrapper
+from tempfile import SpooledTemporaryFile
+from typing import IO,TYPE_CHECKING,Dict,Iterator,Tuple,Union,List
 import os,sys
+import threading
+from collections import OrderedDict
+import time
 from src.logger import logging
-from mypy_boto3_s3.service_resource import Bucket
+if TYPE_CHECKING:   # type stubs only, ~85 ms to import at runtime
+    from mypy_boto3_s3.service_resource import Bucket
 from src.exception import exceptions
 from botocore.exceptions import ClientError
 from pandas import DataFrame,read_csv
-import pickle
+from src.constants import (S3_METADATA_CACHE_TTL_SECONDS, S3_METADATA_CACHE_MAX_ENTRIES, S3_MULTIPART_THRESHOLD_BYTES, S3_MULTIPART_CHUNK_SIZE_BYTES,
+                           S3_TRANSFER_MAX_CONCURRENCY, S3_BUFFER_MAX_MEMORY_BYTES, S3_DOWNLOAD_ETAG_ATTEMPTS)
+from src.entity.model_bundle import loads_model
 
 
 class SimpleStorageService:
     """
     A class for interacting with AWS S3 storage, providing methods for file management, 
     data uploads, and data retrieval in S3 buckets.
+
+    Single objects are always addressed by their exact key (HEAD/GET), never by prefix listing.
+    HEAD results are kept in a short-lived metadata cache shared by all instances, and
+    downloaded models/CSVs are kept in a LocalObjectCache on disk keyed by their ETag.
+    Uploads and downloads go through boto3's managed transfer, so objects above the multipart
+    threshold are split into parts that are transferred by several threads in parallel.
     """
+    # (bucket, key) -> (expiry, head_object response or None), in expiry order (every entry has the same TTL)
+    _metadata_cache: "OrderedDict[Tuple[str, str], Tuple[float, Union[dict, None]]]" = OrderedDict()
+    _metadata_lock = threading.Lock()
 
-    def __init__(self):
+    def __init__(self, transfer_config: TransferConfig = None):
         """
         Initializes the SimpleStorageService instance with S3 resource and client
         from the S3Client class.
+
+        Args:
+            transfer_config (TransferConfig): Multipart chunk size / thread concurrency used for
+                uploads and downloads, defaults to the S3_MULTIPART_* / S3_TRANSFER_* constants.
         """
         s3_client = S3Client()
         self.s3_resource = s3_client.s3_resource
         self.s3_client = s3_client.s3_client
+        self.local_cache = LocalObjectCache()
+        self.transfer_config = transfer_config or TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD_BYTES,
+            multipart_chunksize=S3_MULTIPART_CHUNK_SIZE_BYTES,
+            max_concurrency=S3_TRANSFER_MAX_CONCURRENCY,
+            use_threads=True,
+        )
 
     def s3_key_path_available(self, bucket_name, s3_key) -> bool:
         """
@@ -38,40 +67,237 @@ class SimpleStorageService:
             bool: True if the file exists, False otherwise.
         """
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=s3_key)]
-            return len(file_objects) > 0
+            return self.get_object_metadata(bucket_name, s3_key) is not None
         except Exception as e:
             raise exceptions(e, sys)
 
+    def get_object_metadata(self, bucket_name: str, s3_key: str, use_cache: bool = True) -> Union[dict, None]:
+        """
+        Returns the metadata of the exact S3 key using a HEAD request (no body is downloaded).
+        Results, including misses, are cached for S3_METADATA_CACHE_TTL_SECONDS (at most
+        S3_METADATA_CACHE_MAX_ENTRIES keys).
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+            use_cache (bool): If False, always issue a fresh HEAD request.
+
+        Returns:
+            Union[dict, None]: The head_object response (ETag, ContentLength, ...), or None if the key does not exist.
+        """
+        cache_key = (bucket_name, s3_key)
+        if use_cache:
+            cached = SimpleStorageService._metadata_cache.get(cache_key)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        try:
+            metadata = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                raise exceptions(e, sys) from e
+            metadata = None
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+        now = time.monotonic()
+        with SimpleStorageService._metadata_lock:
+            cache = SimpleStorageService._metadata_cache
+            cache[cache_key] = (now + S3_METADATA_CACHE_TTL_SECONDS, metadata)
+            cache.move_to_end(cache_key)
+            # lookups of arbitrary keys (misses are cached too) must not grow it without bound:
+            # expired entries are at the front, and the oldest go first beyond the size cap
+            while cache and (next(iter(cache.values()))[0] <= now or len(cache) > S3_METADATA_CACHE_MAX_ENTRIES):
+                cache.popitem(last=False)
+        return metadata
+
     @staticmethod
-    def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[StringIO, str]:
+    def invalidate_metadata(bucket_name: str, s3_key: str) -> None:
+        """
+        Drops the cached HEAD result of a key, e.g. after it was uploaded.
+        """
+        with SimpleStorageService._metadata_lock:
+            SimpleStorageService._metadata_cache.pop((bucket_name, s3_key), None)
+
+    def get_object_etag(self, bucket_name: str, s3_key: str, use_cache: bool = True) -> Union[str, None]:
+        """
+        Returns the ETag of the exact S3 key.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+            use_cache (bool): If False, always issue a fresh HEAD request.
+
+        Returns:
+            Union[str, None]: The ETag of the object, or None if the key does not exist.
+        """
+        metadata = self.get_object_metadata(bucket_name, s3_key, use_cache=use_cache)
+        return None if metadata is None else metadata["ETag"]
+
+    def get_object(self, bucket_name: str, s3_key: str) -> dict:
+        """
+        Issues a GET for the exact S3 key.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            dict: The get_object response; "Body" is a stream that has not been read yet.
+        """
+        try:
+            return self.s3_client.get_object(Bucket=bucket_name, Key=s3_key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                raise Exception(f"{s3_key} not found in S3 bucket {bucket_name}")
+            raise exceptions(e, sys) from e
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def get_object_path(self, bucket_name: str, s3_key: str) -> str:
+        """
+        Returns a local file holding the content of the exact S3 key. The file comes from the
+        local disk cache when the key's current ETag was downloaded before; otherwise the object
+        is streamed straight into the cache with a parallel multipart download. A download is only
+        cached if the key still has the same ETag afterwards, else it is downloaded again.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            str: Path of the cached file.
+        """
+        try:
+            use_cache = True
+            for _ in range(S3_DOWNLOAD_ETAG_ATTEMPTS):
+                etag = self.get_object_etag(bucket_name, s3_key, use_cache=use_cache)
+                if etag is None:
+                    raise Exception(f"{s3_key} not found in S3 bucket {bucket_name}")
+                path = self.local_cache.get_path(bucket_name, s3_key, etag)
+                if path is not None:
+                    return path
+
+                tmp_path = self.local_cache.temp_path()
+                try:
+                    self.download_file(bucket_name, s3_key, tmp_path)
+                    # the key may have been overwritten between the HEAD and the GET: the bytes
+                    # are only cached under the ETag the object still has after the download
+                    current_etag = self.get_object_etag(bucket_name, s3_key, use_cache=False)
+                except Exception:
+                    os.remove(tmp_path)
+                    raise
+                if current_etag == etag:
+                    return self.local_cache.put_file(bucket_name, s3_key, etag, tmp_path)
+                os.remove(tmp_path)
+                logging.info(f"s3://{bucket_name}/{s3_key} changed during its download ({etag} -> {current_etag}), retrying")
+                use_cache = False
+            raise Exception(f"s3://{bucket_name}/{s3_key} kept changing during {S3_DOWNLOAD_ETAG_ATTEMPTS} downloads")
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def get_object_bytes(self, bucket_name: str, s3_key: str) -> bytes:
+        """
+        Returns the content of the exact S3 key, served from the local disk cache when possible
+        (see get_object_path).
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+
+        Returns:
+            bytes: The object content.
+        """
+        try:
+            with open(self.get_object_path(bucket_name, s3_key), "rb") as file_obj:
+                return file_obj.read()
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def download_file(self, bucket_name: str, s3_key: str, to_filename: str) -> None:
+        """
+        Streams the exact S3 key to a local file; large objects are fetched as parallel ranged GETs.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+            to_filename (str): Local path to write to.
+        """
+        try:
+            self.s3_client.download_file(bucket_name, s3_key, to_filename, Config=self.transfer_config)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def download_to_buffer(self, bucket_name: str, s3_key: str,
+                           max_memory_bytes: int = S3_BUFFER_MAX_MEMORY_BYTES) -> IO[bytes]:
+        """
+        Streams the exact S3 key into a buffer that stays in memory up to max_memory_bytes and
+        transparently spills to a temp file beyond it.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            s3_key (str): Key of the object.
+            max_memory_bytes (int): Memory bound of the buffer.
+
+        Returns:
+            IO[bytes]: The buffer, rewound to the start. Close it when done.
+        """
+        try:
+            buffer = SpooledTemporaryFile(max_size=max_memory_bytes)
+            self.s3_client.download_fileobj(bucket_name, s3_key, buffer, Config=self.transfer_config)
+            buffer.seek(0)
+            return buffer
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def list_objects(self, bucket_name: str, prefix: str = "") -> Iterator[dict]:
+        """
+        Lazily lists the objects under a prefix, one page of up to 1000 keys per LIST request.
+        Only use this where listing is really needed; single objects should be fetched by key.
+
+        Args:
+            bucket_name (str): Name of the S3 bucket.
+            prefix (str): Key prefix to list.
+
+        Yields:
+            dict: One entry per object (Key, ETag, Size, LastModified, ...).
+        """
+        try:
+            paginator = self.s3_client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+                yield from page.get("Contents", [])
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def read_object(object_name: str, decode: bool = True, make_readable: bool = False) -> Union[IO[str], str, bytes]:
         """
         Reads the specified S3 object with optional decoding and formatting.
 
         Args:
             object_name (str): The S3 object name.
             decode (bool): Whether to decode the object content as a string.
-            make_readable (bool): Whether to convert content to StringIO for DataFrame usage.
+            make_readable (bool): Whether to return the content as a text stream for DataFrame usage.
 
         Returns:
-            Union[StringIO, str]: The content of the object, as a StringIO or decoded string.
+            Union[IO[str], str, bytes]: The content of the object, as a text stream, decoded string or raw bytes.
         """
-        # logging.info("Entered the read_object method of SimpleStorageService class")
         try:
-            # Read and decode the object content if decode=True
-            func = (
-                lambda: object_name.get()["Body"].read().decode()
-                if decode else object_name.get()["Body"].read()
-            )
-            # Convert to StringIO if make_readable=True
-            conv_func = lambda: StringIO(func()) if make_readable else func()
-            # logging.info("Exited the read_object method of SimpleStorageService class")
-            return conv_func()
+            # Stream the body into a bounded buffer instead of holding raw bytes and decoded text at once
+            buffer = SpooledTemporaryFile(max_size=S3_BUFFER_MAX_MEMORY_BYTES)
+            for chunk in object_name.get()["Body"].iter_chunks(chunk_size=1024 * 1024):
+                buffer.write(chunk)
+            buffer.seek(0)
+
+            # Wrap the buffer as a text stream for DataFrame usage if make_readable=True
+            if make_readable:
+                return TextIOWrapper(buffer, encoding="utf-8")
+            content = buffer.read()
+            buffer.close()
+            return content.decode() if decode else content
         except Exception as e:
             raise exceptions(e, sys) from e
 
-    def get_bucket(self, bucket_name: str) -> Bucket:
+    def get_bucket(self, bucket_name: str) -> "Bucket":
         """
         Retrieves the S3 bucket object based on the provided bucket name.
 
@@ -89,25 +315,24 @@ class SimpleStorageService:
         except Exception as e:
             raise exceptions(e, sys) from e
 
-    def get_file_object(self, filename: str, bucket_name: str) -> Union[List[object], object, None]:
+    def get_file_object(self, filename: str, bucket_name: str) -> Union[object, None]:
         """
-        Retrieves the file object(s) from the specified bucket based on the filename.
+        Retrieves the file object with exactly the given key from the specified bucket.
 
         Args:
-            filename (str): The name of the file to retrieve.
+            filename (str): The key of the file to retrieve.
             bucket_name (str): The name of the S3 bucket.
 
         Returns:
-            Union[List[object], object, None]: The S3 file object, list of file objects, or None if not found.
+            Union[object, None]: The S3 file object, or None if not found.
         """
         logging.info("Entered the get_file_object method of SimpleStorageService class")
         try:
-            bucket = self.get_bucket(bucket_name)
-            file_objects = [file_object for file_object in bucket.objects.filter(Prefix=filename)]
-            func = lambda x: x[0] if len(x) == 1 else (x if len(x) > 1 else None)
-            file_objs = func(file_objects)
+            if self.get_object_metadata(bucket_name, filename) is None:
+                return None
+            file_obj = self.s3_resource.Object(bucket_name, filename)
             logging.info("Exited the get_file_object method of SimpleStorageService class")
-            return file_objs
+            return file_obj
         except Exception as e:
             raise exceptions(e, sys) from e
 
@@ -125,15 +350,9 @@ class SimpleStorageService:
         """
         try:
             model_file = model_dir + "/" + model_name if model_dir else model_name
-            file_object = self.get_file_object(model_file, bucket_name)
-            if file_object is None:
-                raise Exception("Model file not found in S3 bucket")
-            if isinstance(file_object, list):
-                if len(file_object) == 0:
-                    raise Exception("No model files found in S3 bucket")
-                file_object = file_object[0]
-            model_obj = self.read_object(file_object, decode=False)
-            model = pickle.loads(model_obj)
+            model_obj = self.get_object_bytes(bucket_name, model_file)
+            # model bundle or (older) pickled MyModel, told apart by content
+            model = loads_model(model_obj)
             logging.info("Production model loaded from S3 bucket.")
             return model
         except Exception as e:
@@ -156,6 +375,7 @@ class SimpleStorageService:
             if e.response["Error"]["Code"] == "404":
                 folder_obj = folder_name + "/"
                 self.s3_client.put_object(Bucket=bucket_name, Key=folder_obj)
+                self.invalidate_metadata(bucket_name, folder_obj)
             logging.info("Exited the create_folder method of SimpleStorageService class")
 
     def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
@@ -171,7 +391,8 @@ class SimpleStorageService:
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            self.s3_client.upload_file(from_filename, bucket_name, to_filename, Config=self.transfer_config)
+            self.invalidate_metadata(bucket_name, to_filename)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
 
             # Delete the local file if remove is True
@@ -182,21 +403,39 @@ class SimpleStorageService:
         except Exception as e:
             raise exceptions(e, sys) from e
 
-    def upload_df_as_csv(self, data_frame: DataFrame, local_filename: str, bucket_filename: str, bucket_name: str) -> None:
+    def upload_fileobj(self, file_obj: IO[bytes], to_filename: str, bucket_name: str) -> None:
+        """
+        Uploads a binary file-like object to the specified S3 bucket with a parallel multipart upload.
+
+        Args:
+            file_obj (IO[bytes]): Readable binary stream, read from its current position.
+            to_filename (str): Target file path in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+        """
+        logging.info("Entered the upload_fileobj method of SimpleStorageService class")
+        try:
+            self.s3_client.upload_fileobj(file_obj, bucket_name, to_filename, Config=self.transfer_config)
+            self.invalidate_metadata(bucket_name, to_filename)
+            logging.info("Exited the upload_fileobj method of SimpleStorageService class")
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def upload_df_as_csv(self, data_frame: DataFrame, bucket_filename: str, bucket_name: str) -> None:
         """
-        Uploads a DataFrame as a CSV file to the specified S3 bucket.
+        Uploads a DataFrame as a CSV file to the specified S3 bucket, straight from memory.
 
         Args:
             data_frame (DataFrame): DataFrame to be uploaded.
-            local_filename (str): Temporary local filename for the DataFrame.
             bucket_filename (str): Target filename in the bucket.
             bucket_name (str): Name of the S3 bucket.
         """
         logging.info("Entered the upload_df_as_csv method of SimpleStorageService class")
         try:
-            # Save DataFrame to CSV locally and then upload it
-            data_frame.to_csv(local_filename, index=None, header=True)
-            self.upload_file(local_filename, bucket_filename, bucket_name)
+            # Serialize the DataFrame into an in-memory buffer and upload it without a temp file
+            buffer = BytesIO()
+            data_frame.to_csv(buffer, index=None, header=True)
+            buffer.seek(0)
+            self.upload_fileobj(buffer, bucket_filename, bucket_name)
             logging.info("Exited the upload_df_as_csv method of SimpleStorageService class")
         except Exception as e:
             raise exceptions(e, sys) from e
@@ -233,8 +472,8 @@ class SimpleStorageService:
         """
         logging.info("Entered the read_csv method of SimpleStorageService class")
         try:
-            csv_obj = self.get_file_object(filename, bucket_name)
-            df = self.get_df_from_object(csv_obj)
+            # parse straight from the locally cached file instead of decoding the body in memory
+            df = read_csv(self.get_object_path(bucket_name, filename), na_values="na")
             logging.info("Exited the read_csv method of SimpleStorageService class")
             return df
         except Exception as e:
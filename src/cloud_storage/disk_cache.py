@@ -0,0 +1,159 @@
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+from typing import Union
+
+from src.constants import S3_CACHE_DIR, S3_CACHE_MAX_SIZE_BYTES
+from src.exception import exceptions
+from src.logger import logging
+from src.metrics import S3_CACHE_LOOKUPS, S3_CACHE_SIZE_BYTES
+
+
+class LocalObjectCache:
+    """
+    Content-addressed on-disk cache for objects downloaded from S3.
+
+    Every object is stored under the sha256 of bucket + key + ETag, so a new version of a key
+    (new ETag) never collides with an old one and a cached file never needs to be revalidated.
+    Files are written atomically, which lets several processes on one host (uvicorn workers,
+    repeated training runs) share the same directory. When the directory grows beyond
+    max_size_bytes the least recently used files are evicted.
+    """
+    hits: int = 0
+    misses: int = 0
+    _counter_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str = S3_CACHE_DIR, max_size_bytes: int = S3_CACHE_MAX_SIZE_BYTES):
+        """
+        :param cache_dir: Local directory the cached objects are stored in
+        :param max_size_bytes: Size budget of cache_dir, least recently used files are evicted beyond it
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+
+    def _path(self, bucket_name: str, s3_key: str, etag: str) -> str:
+        digest = hashlib.sha256(f"{bucket_name}\0{s3_key}\0{etag}".encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    @classmethod
+    def _count(cls, hit: bool) -> None:
+        with cls._counter_lock:
+            if hit:
+                cls.hits += 1
+            else:
+                cls.misses += 1
+        S3_CACHE_LOOKUPS.inc(result="hit" if hit else "miss")
+
+    def get_path(self, bucket_name: str, s3_key: str, etag: str) -> Union[str, None]:
+        """
+        Returns the local path of bucket/key at the given ETag, or None on a miss.
+        """
+        path = self._path(bucket_name, s3_key, etag)
+        try:
+            # bump the mtime so eviction treats this file as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            self._count(hit=False)
+            logging.info(f"Local cache miss for s3://{bucket_name}/{s3_key}")
+            return None
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+        self._count(hit=True)
+        logging.info(f"Local cache hit for s3://{bucket_name}/{s3_key}")
+        return path
+
+    def get(self, bucket_name: str, s3_key: str, etag: str) -> Union[bytes, None]:
+        """
+        Returns the cached content of bucket/key at the given ETag, or None on a miss.
+        """
+        path = self.get_path(bucket_name, s3_key, etag)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file_obj:
+                return file_obj.read()
+        except FileNotFoundError:
+            return None     # evicted by another process in the meantime
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def temp_path(self) -> str:
+        """
+        Returns a new empty temp file inside the cache dir to download into before put_file.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            return tmp_path
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def put_file(self, bucket_name: str, s3_key: str, etag: str, tmp_path: str) -> str:
+        """
+        Moves a fully written temp file (see temp_path) into the cache as bucket/key at the given
+        ETag and evicts old files if over budget. Returns the cached file's path.
+        """
+        try:
+            # rename is atomic, so other processes never see a partial file
+            path = self._path(bucket_name, s3_key, etag)
+            os.replace(tmp_path, path)
+            self.evict()
+            return path
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def put(self, bucket_name: str, s3_key: str, etag: str, data: bytes) -> None:
+        """
+        Stores the content of bucket/key at the given ETag, then evicts old files if over budget.
+        """
+        try:
+            tmp_path = self.temp_path()
+            with open(tmp_path, "wb") as file_obj:
+                file_obj.write(data)
+            self.put_file(bucket_name, s3_key, etag, tmp_path)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def evict(self) -> None:
+        """
+        Removes least recently used files until the cache fits in max_size_bytes.
+        """
+        try:
+            entries = []
+            total_size = 0
+            for entry in os.scandir(self.cache_dir):
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total_size += stat.st_size
+
+            for _, size, path in sorted(entries):
+                if total_size <= self.max_size_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    logging.info(f"Evicted {path} from local cache")
+                except FileNotFoundError:
+                    pass    # already evicted by another process
+                total_size -= size
+            S3_CACHE_SIZE_BYTES.set(total_size)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def stats(self) -> dict:
+        """
+        Returns the process-wide hit/miss counters and the current size of the cache directory.
+        """
+        entries, size_bytes = 0, 0
+        if os.path.isdir(self.cache_dir):
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    entries += 1
+                    size_bytes += entry.stat().st_size
+        return {"hits": LocalObjectCache.hits, "misses": LocalObjectCache.misses,
+                "entries": entries, "size_bytes": size_bytes}
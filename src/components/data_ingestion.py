@@ -1,14 +1,24 @@
 import os
 import sys
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from bson import json_util
 
 from src.entity.config_entity import Data_Ingestion_config
 from src.entity.artifact_entity import Data_Ingestion_artifact
 from src.exception import exceptions
 from src.logger import logging
-from src.data_access.proj1_data import Proj1_data
+from src.data_access.proj1_data import PARTITION_FILE_FORMAT, Proj1_data
+from src.constants import TARGET_COLUMN
+from src.utils.main_utils import (apply_schema_dtypes, iter_parquet_chunks, parquet_schema_dtypes,
+                                  read_schema_column_types)
 
+# rows are assigned to train / test by one of 2**16 hash buckets of their key
+SPLIT_HASH_BITS = 16
+SPLIT_HASH_BUCKETS = 1 << SPLIT_HASH_BITS
 
 
 class DataIngestion:
@@ -19,38 +29,195 @@ class DataIngestion:
             raise exceptions(e,sys)
         
 
-    def export_data(self):
-        "This method will save data sets from mongoDB to your local storage and return the Df"
+    def read_watermark(self) -> Optional[dict]:
+        "State of the last export ({collection, field, value, parts}), None if there is none or it can't be used"
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        if not os.path.exists(watermark_file_path):
+            return None
+        with open(watermark_file_path) as file_obj:
+            state = json_util.loads(file_obj.read())
+        if state.get("collection") != self.data_ingestion_config.collection_name or \
+                state.get("field") != self.data_ingestion_config.watermark_field:
+            logging.info("Watermark is for another collection / field, doing a full refresh")
+            return None
+        partitioned_data_dir = self.data_ingestion_config.partitioned_data_dir
+        if not all(os.path.exists(os.path.join(partitioned_data_dir, part)) for part in state["parts"]):
+            logging.info("Part files of the watermark are missing, doing a full refresh")
+            return None
+        return state
+
+    def write_watermark(self, state: dict) -> None:
+        # written to a temporary file and renamed, a crash leaves the previous watermark in place
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        temp_file_path = watermark_file_path + ".tmp"
+        with open(temp_file_path, "w") as file_obj:
+            file_obj.write(json_util.dumps(state, indent=2))
+        os.replace(temp_file_path, watermark_file_path)
+
+    def export_partitions(self, data_object: Proj1_data) -> List[str]:
+        """
+        Brings the partitioned Parquet snapshot of the collection up to date and returns its part files.
+
+        The watermark file keeps the largest watermark_field value exported so far and the committed
+        part files. A run exports only the documents above the watermark into one new part file;
+        the first run, a full_refresh or an unusable watermark re-exports the whole collection. Both
+        stop at the largest value seen when the run started, so documents inserted meanwhile are
+        picked up by the next run rather than exported twice. This assumes an append-only collection
+        whose watermark field only grows (ObjectIds of a single writer, an ingestion timestamp):
+        updated documents, or ones inserted with a smaller value, need a full refresh.
+        """
+        config = self.data_ingestion_config
+        field = config.watermark_field
+        state = None if config.full_refresh else self.read_watermark()
+        upper = data_object.max_value(config.collection_name, field)
+        upper_query = {field: {"$lte": upper}} if upper is not None else {}
+
+        if state is None:
+            # the old part files are replaced, a run failing half way must not leave a watermark pointing at them
+            if os.path.exists(config.watermark_file_path):
+                os.remove(config.watermark_file_path)
+            partition_files = data_object.export_collection_as_parquet(collection_name = config.collection_name,
+                                                                       output_dir = config.partitioned_data_dir,
+                                                                       query = upper_query,
+                                                                       partitions = config.export_partitions,
+                                                                       min_partition_documents = config.min_partition_documents,
+                                                                       max_workers = config.export_max_workers,
+                                                                       batch_size = config.mongo_batch_size,
+                                                                       chunk_rows = config.export_chunk_rows)
+            parts = [os.path.basename(file_path) for file_path in partition_files]
+        else:
+            parts = list(state["parts"])
+            # part files of a run that failed before committing its watermark
+            for file_name in os.listdir(config.partitioned_data_dir):
+                if file_name.startswith("part-") and file_name.endswith(".parquet") and file_name not in parts:
+                    os.remove(os.path.join(config.partitioned_data_dir, file_name))
+
+            if upper is not None and (state["value"] is None or upper > state["value"]):
+                file_name = PARTITION_FILE_FORMAT.format(max(int(part[len("part-"):-len(".parquet")]) for part in parts) + 1 if parts else 0)
+                file_path = os.path.join(config.partitioned_data_dir, file_name)
+                lower_query = {field: {"$gt": state["value"]}} if state["value"] is not None else {}
+                rows = data_object.export_partition(config.collection_name, file_path,
+                                                    query = data_object.combine_queries(lower_query, upper_query),
+                                                    batch_size = config.mongo_batch_size,
+                                                    chunk_rows = config.export_chunk_rows)
+                logging.info(f"Exported {rows} new documents above the watermark {state['value']} into {file_name}")
+                if rows:
+                    parts.append(file_name)
+                else:
+                    os.remove(file_path)
+            else:
+                logging.info(f"No new documents above the watermark {state['value']}")
+                upper = state["value"]
+
+        self.write_watermark({"collection": config.collection_name, "field": field, "value": upper, "parts": parts,
+                              "updated_at": datetime.now(timezone.utc).isoformat()})
+        return [os.path.join(config.partitioned_data_dir, part) for part in parts]
+
+    def export_data(self) -> List[str]:
+        "This method brings the partitioned snapshot of mongoDB in local storage up to date and returns its files"
 
         try:
             logging.info("Exporting data from mongoDB")
             data_object = Proj1_data()
-            Df = data_object.export_collection_as_DF(collection_name = self.data_ingestion_config.collection_name)
-            logging.info('Shape of tha DataFrame{Df.shape}')
-
-            data_save_file_path = self.data_ingestion_config.data_save_file_path
-            dir_path = os.path.dirname(data_save_file_path)    #extracts only dir filepath from full filepath
-            os.makedirs(dir_path, exist_ok=True)
-            logging.info("Saving data into this filepath  : {data_save_file_path}")
-            Df.to_csv(data_save_file_path,index=False)
-            return Df
+            # incremental partitioned Parquet snapshot, see export_partitions
+            partition_files = self.export_partitions(data_object)
+            logging.info(f"Snapshot of {len(partition_files)} part files in {self.data_ingestion_config.partitioned_data_dir}")
+            return partition_files
         
         except Exception as e:
             raise exceptions(e,sys)
-        
 
-    def Train_test_split(self,Df:pd.DataFrame):
+    @staticmethod
+    def split_buckets(keys: pd.Series) -> np.ndarray:
+        """
+        Stable bucket in [0, SPLIT_HASH_BUCKETS) of every key, the same on every run and machine.
+
+        The key is hashed as text, whole numbers without a decimal point, so that the bucket doesn't
+        depend on the dtype the key was read as (int8 ... int64, or float64 once a key is missing).
+        Rows without a key can't be tracked across runs: they get the last bucket, i.e. go to train.
+        """
+        present = keys.notna().to_numpy()
+        if pd.api.types.is_numeric_dtype(keys) and not pd.api.types.is_bool_dtype(keys):
+            values = keys.to_numpy(dtype=np.float64, na_value=np.nan)[present]
+            if (np.floor(values) == values).all():
+                keys = keys.astype("Int64")
+        canonical = keys.astype(str)
+        # hash_pandas_object hashes with a fixed key, the top 16 bits of the 64-bit hash are the bucket
+        buckets = (pd.util.hash_pandas_object(canonical, index=False).to_numpy() >> np.uint64(64 - SPLIT_HASH_BITS)).astype(np.int64)
+        buckets[~present] = SPLIT_HASH_BUCKETS - 1
+        return buckets
+
+    def test_bucket_thresholds(self, partition_files: List[str], dtypes: Dict[str, object]) -> Dict[object, int]:
+        """
+        Rows whose bucket is below the threshold of their class go to the test set.
+
+        Unstratified there is one threshold (key None), the split ratio of the buckets: a row's side
+        then only depends on its key, so rows keep their side as the dataset grows. Stratified,
+        a histogram of buckets is counted per target class (one pass over the key and target columns)
+        and each class gets the threshold closest to the split ratio of its own rows; the classes
+        then have the split ratio within one bucket, at the cost of rows near a threshold possibly
+        changing side when new rows move it.
+        """
+        config = self.data_ingestion_config
+        if not config.stratify_split:
+            return {None: round(config.train_test_split_ratio * SPLIT_HASH_BUCKETS)}
+
+        histograms: Dict[object, np.ndarray] = {}
+        for chunk in iter_parquet_chunks(partition_files, config.export_chunk_rows, columns=[config.split_key_column, TARGET_COLUMN]):
+            # the dtypes Train_test_split buckets the rows with, so the histograms match the split
+            chunk = apply_schema_dtypes(chunk, dtypes)
+            buckets = self.split_buckets(chunk[config.split_key_column])
+            for label, label_buckets in pd.Series(buckets).groupby(chunk[TARGET_COLUMN].to_numpy()):
+                histogram = histograms.setdefault(label, np.zeros(SPLIT_HASH_BUCKETS, dtype=np.int64))
+                histogram += np.bincount(label_buckets.to_numpy(), minlength=SPLIT_HASH_BUCKETS)
+        thresholds = {}
+        for label, histogram in histograms.items():
+            # number of rows below each threshold 0..SPLIT_HASH_BUCKETS
+            below = np.concatenate([[0], np.cumsum(histogram)])
+            thresholds[label] = int(np.abs(below - config.train_test_split_ratio * below[-1]).argmin())
+        logging.info(f"Stratified split bucket thresholds per {TARGET_COLUMN}: {thresholds}")
+        return thresholds
+
+    def Train_test_split(self, partition_files: List[str]):
+        """
+        Splits the snapshot chunk by chunk, never holding more than export_chunk_rows rows: every row
+        goes to test or train by the hash bucket of its split_key_column (see test_bucket_thresholds),
+        with the schema dtypes applied, and the full data, train and test Parquet files are written
+        incrementally in the same pass.
+        """
         logging.info("Entered Train_test_split method of DataIngestion class")
 
         try:
-            train_set, test_set = train_test_split(Df, test_size=self.data_ingestion_config.train_test_split_ratio, shuffle=True, random_state=6)
-            logging.info("Performed train test split on the dataframe")
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
-            os.makedirs(dir_path, exist_ok=True)
-
-            logging.info(f"Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path, index=False)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path, index=False)
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            config = self.data_ingestion_config
+            # dtypes decided over the whole snapshot, so all chunks (and train / test) get the same ones
+            dtypes = parquet_schema_dtypes(partition_files, read_schema_column_types(), config.export_chunk_rows)
+            thresholds = self.test_bucket_thresholds(partition_files, dtypes)
+            schema = pa.Schema.from_pandas(apply_schema_dtypes(pq.read_schema(partition_files[0]).empty_table().to_pandas(), dtypes),
+                                           preserve_index=False)
+
+            rows = {"data": 0, "train": 0, "test": 0}
+            file_paths = {"data": config.data_save_file_path, "train": config.training_file_path, "test": config.testing_file_path}
+            for file_path in file_paths.values():
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            writers = {name: pq.ParquetWriter(file_path, schema) for name, file_path in file_paths.items()}
+            try:
+                for chunk in iter_parquet_chunks(partition_files, config.export_chunk_rows):
+                    chunk = apply_schema_dtypes(chunk, dtypes)
+                    buckets = self.split_buckets(chunk[config.split_key_column])
+                    if None in thresholds:
+                        is_test = buckets < thresholds[None]
+                    else:
+                        is_test = buckets < chunk[TARGET_COLUMN].map(thresholds).to_numpy()
+                    for name, part in (("data", chunk), ("train", chunk[~is_test]), ("test", chunk[is_test])):
+                        writers[name].write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+                        rows[name] += len(part)
+            finally:
+                for writer in writers.values():
+                    writer.close()
+            logging.info(f"Performed train test split on the data: {rows['train']} train rows, {rows['test']} test rows")
             logging.info(f"Exported train and test file path.")
 
         except Exception as e:
@@ -60,10 +227,10 @@ class DataIngestion:
     def initiate_data_ingestion(self)->None:
         try:
             logging.info("Fetching data from MongoDB ...")
-            df = self.export_data()
+            partition_files = self.export_data()
             logging.info("Data Exported!")
 
-            self.Train_test_split(df)
+            self.Train_test_split(partition_files)
             logging.info("Train & Test data sets has been saved")
 
             data_ingestion_artifact = Data_Ingestion_artifact(training_file_path=self.data_ingestion_config.training_file_path,
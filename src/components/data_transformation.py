@@ -11,7 +11,9 @@ from src.entity.config_entity import DataTransformationConfig, DataValidationCon
 from src.entity.artifact_entity import DataTransformationArtifact, Data_Ingestion_artifact, DataValidationArtifact
 from src.exception import exceptions
 from src.logger import logging
-from src.utils.main_utils import save_object, save_numpy_array_data, read_yaml_file
+from src.utils.main_utils import (save_object, save_numpy_array_data, read_yaml_file, load_dataframe,
+                                  read_schema_column_types)
+from src.utils.profiling import profile_step
 import yaml
 
 
@@ -29,12 +31,16 @@ class DataTransformation:
             raise exceptions(e, sys)
 
     @staticmethod
-    def read_data(file_path) -> pd.DataFrame:
+    def read_data(file_path, columns=None) -> pd.DataFrame:
         try:
-            return pd.read_csv(file_path)
+            return load_dataframe(file_path, columns=columns)
         except Exception as e:
             raise exceptions(e, sys)
 
+    def feature_columns(self) -> list:
+        """Schema columns the transformation uses (drop_columns are not even read)."""
+        return [column for column in read_schema_column_types() if column != self._schema_config['drop_columns']]
+
     def get_data_transformer_object(self) -> Pipeline:
         """
         Creates and returns a data transformer object for the data, 
@@ -122,26 +128,31 @@ class DataTransformation:
             #     raise Exception(message)
 
             # Load train and test data
-            train_df = self.read_data(file_path=self.data_ingestion_artifact.training_file_path)
-            test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path)
+            columns = self.feature_columns()
+            with profile_step("read_train"):
+                train_df = self.read_data(file_path=self.data_ingestion_artifact.training_file_path, columns=columns)
+            with profile_step("read_test"):
+                test_df = self.read_data(file_path=self.data_ingestion_artifact.test_file_path, columns=columns)
             logging.info("Train-Test data loaded")
 
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
             target_feature_train_df = train_df[TARGET_COLUMN]
 
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
             target_feature_test_df = test_df[TARGET_COLUMN]
             logging.info("Input and Target cols defined for both train and test df.")
 
             # Apply custom transformations in specified sequence
             input_feature_train_df = self._map_gender_column(input_feature_train_df)
             input_feature_train_df = self._drop_id_column(input_feature_train_df)
-            input_feature_train_df = self._create_dummy_columns(input_feature_train_df)
+            with profile_step("create_dummy_columns_train"):
+                input_feature_train_df = self._create_dummy_columns(input_feature_train_df)
             input_feature_train_df = self._rename_columns(input_feature_train_df)
 
             input_feature_test_df = self._map_gender_column(input_feature_test_df)
             input_feature_test_df = self._drop_id_column(input_feature_test_df)
-            input_feature_test_df = self._create_dummy_columns(input_feature_test_df)
+            with profile_step("create_dummy_columns_test"):
+                input_feature_test_df = self._create_dummy_columns(input_feature_test_df)
             input_feature_test_df = self._rename_columns(input_feature_test_df)
             logging.info("Custom transformations applied to train and test data")
 
@@ -150,19 +161,22 @@ class DataTransformation:
             logging.info("Got the preprocessor object")
 
             logging.info("Initializing transformation for Training-data")
-            input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
+            with profile_step("fit_transform"):
+                input_feature_train_arr = preprocessor.fit_transform(input_feature_train_df)
             logging.info("Initializing transformation for Testing-data")
             input_feature_test_arr = preprocessor.transform(input_feature_test_df)
             logging.info("Transformation done end to end to train-test df.")
 
             logging.info("Applying SMOTEENN for handling imbalanced dataset.")
             smt = SMOTEENN(sampling_strategy="minority")
-            input_feature_train_final, target_feature_train_final = smt.fit_resample(
-                input_feature_train_arr, target_feature_train_df
-            )
-            input_feature_test_final, target_feature_test_final = smt.fit_resample(
-                input_feature_test_arr, target_feature_test_df
-            )
+            with profile_step("smoteenn_fit_resample_train"):
+                input_feature_train_final, target_feature_train_final = smt.fit_resample(
+                    input_feature_train_arr, target_feature_train_df
+                )
+            with profile_step("smoteenn_fit_resample_test"):
+                input_feature_test_final, target_feature_test_final = smt.fit_resample(
+                    input_feature_test_arr, target_feature_test_df
+                )
             logging.info("SMOTEENN applied to train-test df.")
 
             train_arr = np.c_[input_feature_train_final, np.array(target_feature_train_final)]
@@ -1,19 +1,95 @@
 import json
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
-from pandas import DataFrame
-
 from src.exception import exceptions
 from src.logger import logging
-from src.utils.main_utils import read_yaml_file
+from src.utils.main_utils import iter_dataframe_chunks, read_column_names, read_yaml_file
+from src.utils.profiling import current_step, profile_step
 from src.entity.artifact_entity import Data_Ingestion_artifact, DataValidationArtifact
 from src.entity.config_entity import DataValidationConfig
 from src.constants import SCHEMA_FILE_PATH
 
 
+@dataclass
+class ColumnProfile:
+    """
+    Statistics of one column against its schema.yaml type, accumulated chunk by chunk with
+    vectorized pandas operations (no python loop over the rows).
+    """
+    declared_type: str
+    rows: int = 0
+    nulls: int = 0
+    wrong_type: int = 0         # non null values that are not of the declared type
+    dtypes: List[str] = field(default_factory=list)     # pandas dtypes the column was read as
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    total: float = 0.0
+    total_squares: float = 0.0
+    value_counts: Dict[str, int] = field(default_factory=dict)      # category columns only
+
+    def update(self, values: pd.Series) -> None:
+        present = values.notna()
+        self.rows += len(values)
+        self.nulls += int((~present).sum())
+        if str(values.dtype) not in self.dtypes:
+            self.dtypes.append(str(values.dtype))
+
+        if self.declared_type in ("int", "float"):
+            if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+                numbers = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                numbers = pd.to_numeric(values.astype(object), errors="coerce").to_numpy(dtype=np.float64)
+            valid = ~np.isnan(numbers)
+            wrong = present.to_numpy() & ~valid
+            if self.declared_type == "int" and not pd.api.types.is_integer_dtype(values):
+                # ints are stored as floats when some are missing, they must still be whole numbers
+                wrong |= valid & (np.floor(numbers) != numbers)
+            self.wrong_type += int(wrong.sum())
+            numbers = numbers[valid & ~wrong]
+            if len(numbers):
+                self.minimum = float(numbers.min()) if self.minimum is None else min(self.minimum, float(numbers.min()))
+                self.maximum = float(numbers.max()) if self.maximum is None else max(self.maximum, float(numbers.max()))
+                self.total += float(numbers.sum())
+                self.total_squares += float(np.dot(numbers, numbers))
+            return
+
+        # str / category: text, stored as str, object or a categorical of strings
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            is_text = pd.api.types.is_string_dtype(values.cat.categories) or values.cat.categories.empty
+        else:
+            is_text = pd.api.types.is_string_dtype(values) or pd.api.types.is_object_dtype(values)
+        if not is_text:
+            self.wrong_type += int(present.sum())
+            return
+        if self.declared_type == "category":
+            for value, count in values.value_counts(dropna=True).items():
+                if count:
+                    self.value_counts[str(value)] = self.value_counts.get(str(value), 0) + int(count)
+
+    @property
+    def null_ratio(self) -> float:
+        return self.nulls / self.rows if self.rows else 0.0
+
+    def to_dict(self) -> dict:
+        stats = {"declared_type": self.declared_type, "dtypes": self.dtypes, "rows": self.rows,
+                 "nulls": self.nulls, "null_ratio": self.null_ratio, "wrong_type": self.wrong_type}
+        if self.declared_type in ("int", "float"):
+            count = self.rows - self.nulls - self.wrong_type
+            mean = self.total / count if count else None
+            stats.update(min=self.minimum, max=self.maximum, mean=mean,
+                         std=float(np.sqrt(max(self.total_squares / count - mean ** 2, 0.0))) if count else None)
+        elif self.declared_type == "category":
+            stats["value_counts"] = dict(sorted(self.value_counts.items()))
+        return stats
+
+
 class DataValidation:
     def __init__(self, data_ingestion_artifact: Data_Ingestion_artifact, data_validation_config: DataValidationConfig):
         """
@@ -24,105 +100,122 @@ class DataValidation:
             self.data_ingestion_artifact = data_ingestion_artifact   #raw data file path
             self.data_validation_config = data_validation_config
             self._schema_config =read_yaml_file(file_path=SCHEMA_FILE_PATH)
+            self._column_types = {name: dtype for column in self._schema_config["columns"] for name, dtype in column.items()}
         except Exception as e:
             raise exceptions(e,sys)
 
-    def validate_number_of_columns(self, dataframe: DataFrame) -> bool:
+    def validate_columns(self, columns: List[str], dataset: str) -> List[str]:
         """
-        Method Name :   validate_number_of_columns
-        Description :   This method validates the number of columns
-        
-        Output      :   Returns bool value based on validation results
+        Method Name :   validate_columns
+        Description :   This method validates the column names (read from the file header) against schema.yaml
+
+        Output      :   Returns the validation errors, empty if the columns are the schema ones
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            status = len(dataframe.columns) == len(self._schema_config["columns"])
-            logging.info(f"Is required column present: [{status}]")
-            return status
+            errors = []
+            missing_columns = [column for column in self._column_types if column not in columns]
+            unexpected_columns = [column for column in columns if column not in self._column_types]
+            if missing_columns:
+                logging.info(f"Missing columns in {dataset} dataframe: {missing_columns}")
+                errors.append(f"Columns are missing in {dataset} dataframe: {missing_columns}.")
+            if unexpected_columns:
+                logging.info(f"Unexpected columns in {dataset} dataframe: {unexpected_columns}")
+                errors.append(f"Columns not in the schema in {dataset} dataframe: {unexpected_columns}.")
+            return errors
         except Exception as e:
-            raise exceptions(e, sys)
+            raise exceptions(e, sys) from e
 
-    def is_column_exist(self, df: DataFrame) -> bool:
+    def validate_profiles(self, profiles: Dict[str, ColumnProfile], dataset: str) -> List[str]:
         """
-        Method Name :   is_column_exist
-        Description :   This method validates the existence of a numerical and categorical columns
-        
-        Output      :   Returns bool value based on validation results
+        Method Name :   validate_profiles
+        Description :   This method validates the column statistics: declared dtypes, null ratios,
+                        category domains and numeric ranges of schema.yaml
+
+        Output      :   Returns the validation errors, empty if every column is valid
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            dataframe_columns = df.columns
-            missing_numerical_columns = []
-            missing_categorical_columns = []
-            for column in self._schema_config["numerical_columns"]:
-                if column not in dataframe_columns:
-                    missing_numerical_columns.append(column)
-
-            if len(missing_numerical_columns)>0:
-                logging.info(f"Missing numerical column: {missing_numerical_columns}")
-
-
-            for column in self._schema_config["categorical_columns"]:
-                if column not in dataframe_columns:
-                    missing_categorical_columns.append(column)
-
-            if len(missing_categorical_columns)>0:
-                logging.info(f"Missing categorical column: {missing_categorical_columns}")
-
-            return False if len(missing_categorical_columns)>0 or len(missing_numerical_columns)>0 else True
+            errors = []
+            domains = self._schema_config.get("category_domains") or {}
+            ranges = self._schema_config.get("numeric_ranges") or {}
+            for column, profile in profiles.items():
+                if profile.wrong_type:
+                    errors.append(f"{column} has {profile.wrong_type} values that are not {profile.declared_type} in {dataset} dataframe.")
+                if profile.null_ratio > self.data_validation_config.max_null_ratio:
+                    errors.append(f"{column} is {profile.null_ratio:.2%} missing in {dataset} dataframe "
+                                  f"(at most {self.data_validation_config.max_null_ratio:.2%}).")
+                if column in domains:
+                    unexpected_values = sorted(set(profile.value_counts) - set(map(str, domains[column])))
+                    if unexpected_values:
+                        errors.append(f"{column} has values outside {domains[column]} in {dataset} dataframe: {unexpected_values}.")
+                if column in ranges and profile.minimum is not None:
+                    low, high = ranges[column]
+                    if (low is not None and profile.minimum < low) or (high is not None and profile.maximum > high):
+                        errors.append(f"{column} ranges over [{profile.minimum}, {profile.maximum}] outside "
+                                      f"[{low}, {high}] in {dataset} dataframe.")
+            return errors
         except Exception as e:
             raise exceptions(e, sys) from e
 
-    @staticmethod
-    def read_data(file_path) -> DataFrame:
+    def profile_file(self, file_path: str) -> Tuple[int, Dict[str, ColumnProfile]]:
+        """
+        Streams the file chunk by chunk into the statistics of its schema columns, returns the row count and them
+        """
         try:
-            return pd.read_csv(file_path)
+            profiles = {column: ColumnProfile(declared_type=dtype) for column, dtype in self._column_types.items()}
+            rows = 0
+            for chunk in iter_dataframe_chunks(file_path, self.data_validation_config.chunk_rows,
+                                               columns=list(self._column_types)):
+                rows += len(chunk)
+                for column, profile in profiles.items():
+                    profile.update(chunk[column])
+            return rows, profiles
         except Exception as e:
-            raise exceptions(e, sys)
-        
+            raise exceptions(e, sys) from e
+
+    def validate_file(self, file_path: str, dataset: str, parent_step: Optional[str] = None) -> Tuple[List[str], dict]:
+        """
+        Validates one file: its header first (no row is read if columns are missing), then the
+        statistics of its columns. Returns the validation errors and the statistics report.
+        """
+        with profile_step(f"validate_{dataset}", parent=parent_step):
+            columns = read_column_names(file_path)
+            errors = self.validate_columns(columns, dataset)
+            report = {"file_path": file_path, "columns": columns}
+            if errors:
+                return errors, report
+
+            rows, profiles = self.profile_file(file_path)
+            errors = self.validate_profiles(profiles, dataset)
+            report.update(rows=rows, column_statistics={column: profile.to_dict() for column, profile in profiles.items()})
+            logging.info(f"Validated {rows} rows of {dataset} dataframe: {len(errors)} errors")
+            return errors, report
 
     def initiate_data_validation(self) -> DataValidationArtifact:
         """
         Method Name :   initiate_data_validation
         Description :   This method initiates the data validation component for the pipeline
-        
+
         Output      :   Returns bool value based on validation results
         On Failure  :   Write an exception log and then raise an exception
         """
 
         try:
-            validation_error_msg = ""   #agar koi error aata hai to usko store karne ke liye
             logging.info("Starting data validation")
-            train_df, test_df = (DataValidation.read_data(file_path=self.data_ingestion_artifact.training_file_path),
-                                 DataValidation.read_data(file_path=self.data_ingestion_artifact.test_file_path))
+            files = {"training": self.data_ingestion_artifact.training_file_path,
+                     "test": self.data_ingestion_artifact.test_file_path}
 
-            # Checking col len of dataframe for train/test df
-            status = self.validate_number_of_columns(dataframe=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe. "
-            else:
-                logging.info(f"All required columns present in training dataframe: {status}")
-  
-            status = self.validate_number_of_columns(dataframe=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe. "
-            else:
-                logging.info(f"All required columns present in testing dataframe: {status}")
+            # train and test are validated at the same time (pyarrow reads release the GIL)
+            parent_step = current_step()
+            with ThreadPoolExecutor(max_workers=len(files)) as pool:
+                futures = {dataset: pool.submit(self.validate_file, file_path, dataset, parent_step)
+                           for dataset, file_path in files.items()}
+                results = {dataset: future.result() for dataset, future in futures.items()}
 
-            # Validating col dtype for train/test df
-            status = self.is_column_exist(df=train_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in training dataframe. "
-            else:
-                logging.info(f"All categorical/int columns present in training dataframe: {status}")
-
-            status = self.is_column_exist(df=test_df)
-            if not status:
-                validation_error_msg += f"Columns are missing in test dataframe."
-            else:
-                logging.info(f"All categorical/int columns present in testing dataframe: {status}")
-
-            validation_status = len(validation_error_msg) == 0     # if no error msg that means till above part executed successfully, and validation status is true
+            validation_errors = [error for errors, _ in results.values() for error in errors]
+            validation_error_msg = " ".join(validation_errors)
+            validation_status = len(validation_errors) == 0     # if no error msg that means every check passed, and validation status is true
 
             data_validation_artifact = DataValidationArtifact(
                 validation_status=validation_status,
@@ -134,10 +227,11 @@ class DataValidation:
             report_dir = os.path.dirname(self.data_validation_config.validation_report_file_path)
             os.makedirs(report_dir, exist_ok=True)
 
-            # Save validation status and message to a JSON file
+            # Save validation status, message and column statistics to a JSON file
             validation_report = {
                 "validation_status": validation_status,
-                "message": validation_error_msg.strip() if validation_error_msg else "Data validation successful."
+                "message": validation_error_msg if validation_error_msg else "Data validation successful.",
+                **{dataset: report for dataset, (_, report) in results.items()},
             }
 
             with open(self.data_validation_config.validation_report_file_path, "w") as report_file:
@@ -147,4 +241,4 @@ class DataValidation:
             logging.info(f"Data validation artifact: {data_validation_artifact}")
             return data_validation_artifact
         except Exception as e:
-            raise exceptions(e, sys) from e
\ No newline at end of file
+            raise exceptions(e, sys) from e
@@ -4,7 +4,9 @@ from sklearn.metrics import f1_score
 from src.exception import exceptions
 from src.constants import TARGET_COLUMN
 from src.logger import logging
-from src.utils.main_utils import load_object
+from src.entity.model_bundle import load_model_file
+from src.utils.main_utils import load_dataframe, read_schema_column_types
+from src.utils.profiling import profile_step
 import sys
 import pandas as pd
 from typing import Optional
@@ -91,17 +93,21 @@ class ModelEvaluation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            # _id is dropped right away, so it is not read at all
+            columns = [column for column in read_schema_column_types() if column != "_id"]
+            with profile_step("read_test"):
+                test_df = load_dataframe(self.data_ingestion_artifact.test_file_path, columns=columns)
             x, y = test_df.drop(TARGET_COLUMN, axis=1), test_df[TARGET_COLUMN]
 
             logging.info("Test data loaded and now transforming it for prediction...")
 
             x = self._map_gender_column(x)
             x = self._drop_id_column(x)
-            x = self._create_dummy_columns(x)
+            with profile_step("create_dummy_columns"):
+                x = self._create_dummy_columns(x)
             x = self._rename_columns(x)
 
-            trained_model = load_object(file_path=self.model_trainer_artifact.trained_model_file_path)
+            trained_model = load_model_file(file_path=self.model_trainer_artifact.trained_model_file_path)
             logging.info("Trained model loaded/exists.")
             trained_model_f1_score = self.model_trainer_artifact.metric_artifact.f1_score
             logging.info(f"F1_Score for this model: {trained_model_f1_score}")
@@ -110,7 +116,8 @@ class ModelEvaluation:
             best_model = self.get_best_model()     # fetching  best model from aws s3
             if best_model is not None:
                 logging.info(f"Computing F1_Score for production model..")
-                y_hat_best_model = best_model.predict(x)
+                with profile_step("predict_production_model"):
+                    y_hat_best_model = best_model.predict(x)
                 best_model_f1_score = f1_score(y, y_hat_best_model)
                 logging.info(f"F1_Score-Production Model: {best_model_f1_score}, F1_Score-New Trained Model: {trained_model_f1_score}")
             
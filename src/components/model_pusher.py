@@ -6,6 +6,7 @@ from src.logger import logging
 from src.entity.artifact_entity import ModelPusherArtifact, ModelEvaluationArtifact
 from src.entity.config_entity import ModelPusherConfig
 from src.entity.s3_estimator import Proj1Estimator
+from src.utils.profiling import profile_step
 
 
 class ModelPusher:
@@ -36,7 +37,8 @@ class ModelPusher:
             logging.info("Uploading artifacts folder to s3 bucket")
             
             logging.info("Uploading new model to S3 bucket....")
-            self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
+            with profile_step("s3_upload"):
+                self.proj1_estimator.save_model(from_file=self.model_evaluation_artifact.trained_model_path)
             model_pusher_artifact = ModelPusherArtifact(bucket_name=self.model_pusher_config.bucket_name,
                                                         s3_model_path=self.model_pusher_config.s3_model_key_path)
 
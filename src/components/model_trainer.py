@@ -11,6 +11,8 @@ from src.utils.main_utils import load_numpy_array_data, load_object, save_object
 from src.entity.config_entity import ModelTrainerConfig,XGB_config
 from src.entity.artifact_entity import DataTransformationArtifact,ModelTrainerArtifact,ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.model_bundle import save_model_file
+from src.utils.profiling import profile_step
 
 
 class ModelTrainer:
@@ -70,7 +72,8 @@ class ModelTrainer:
 	            
 
             logging.info("Fitting the model object with training data")
-            model.fit(X_train,y_train)
+            with profile_step("xgboost_fit"):
+                model.fit(X_train,y_train)
             logging.info("Model is trained successfully")
 
             #prediction and evaluating model performance metrices
@@ -88,6 +91,21 @@ class ModelTrainer:
             raise exceptions(e, sys) from e
         
 
+    def save_model(self, my_model: MyModel) -> None:
+        """
+        Saves the final model in the configured serialization format: a model bundle (UBJSON booster +
+        compiled preprocessing, see src/entity/model_bundle.py) or a dill pickle of MyModel.
+        Falls back to the pickle if the preprocessor can't be stored in a bundle.
+        """
+        file_path = self.model_trainer_config.trained_model_file_path
+        if self.model_trainer_config.serialization_format == "bundle":
+            try:
+                save_model_file(file_path, my_model)
+                return
+            except Exception as e:
+                logging.warning(f"Could not save model bundle, saving a pickle instead: {e}")
+        save_object(file_path, my_model)
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -121,7 +139,7 @@ class ModelTrainer:
             # Save the final model object that includes both preprocessing and the trained model
             logging.info("Saving new model as performace is better than previous one.")
             my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path, my_model)
+            self.save_model(my_model)
             logging.info("Saved final model object that includes both preprocessing and the trained model")
 
             # Create and return the ModelTrainerArtifact
@@ -12,6 +12,15 @@ MONGODB_URL_KEY = "MONGODB_URL"         #export MONGODB_URL="mongodb+srv://santo
 #
 PIPELINE_NAME="P1"
 ARTIFACT_DIR = 'Artifacts'
+PIPELINE_STAGE_CACHE_DIR_NAME: str = "stage_cache"    # fingerprints + artifacts of the last successful run of each stage
+PIPELINE_RUNS_DIR_NAME: str = "pipeline_runs"    # state of the last run, used to resume it when it failed
+PIPELINE_RUN_RECORD_FILE_NAME: str = "last_run.json"
+PIPELINE_MAX_WORKERS: int = 2    # independent stages running at the same time
+PIPELINE_PROFILE_FILE_NAME: str = "pipeline_profile.json"    # wall/CPU time and memory per stage and step, written next to the model
+PIPELINE_PROFILE_CPROFILE_DIR_NAME: str = "profiles"
+PIPELINE_PROFILE_CPROFILE: bool = False    # also dump a cProfile per stage into <trained model dir>/profiles
+PIPELINE_PROFILE_TRACE_MEMORY: bool = False    # also record tracemalloc peaks (slows python allocations down)
+PIPELINE_PROFILE_SAMPLE_SECONDS: float = 0.05    # interval of the RSS / tracemalloc peak sampling
 
 
 MODEL_FILE_NAME = "model.pkl"
@@ -20,15 +29,26 @@ TARGET_COLUMN = "Response"
 CURRENT_YEAR = date.today().year
 PREPROCSSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
-FILE_NAME: str = "data.csv"
-TRAIN_FILE_NAME: str = "train.csv"
-TEST_FILE_NAME: str = "test.csv"
+FILE_NAME: str = "data.parquet"
+TRAIN_FILE_NAME: str = "train.parquet"
+TEST_FILE_NAME: str = "test.parquet"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 
 
 AWS_ACCESS_KEY_ID_ENV_KEY = "AWS_ACCESS_KEY_ID"
 AWS_SECRET_ACCESS_KEY_ENV_KEY = "AWS_SECRET_ACCESS_KEY"
 REGION_NAME = "us-east-1"
+S3_METADATA_CACHE_TTL_SECONDS: int = 30     # how long HEAD results (exists / ETag) of s3 keys are reused
+S3_METADATA_CACHE_MAX_ENTRIES: int = 1024   # keys whose HEAD result is cached at most
+# local dir where downloaded s3 objects are cached by ETag, outside the working tree unless S3_CACHE_DIR is set
+S3_CACHE_DIR: str = os.getenv("S3_CACHE_DIR", os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+                                                           "proj1", "s3"))
+S3_CACHE_MAX_SIZE_BYTES: int = 1024*1024*1024   # 1gb, least recently used objects are evicted beyond it
+S3_MULTIPART_THRESHOLD_BYTES: int = 16*1024*1024    # files bigger than this are transferred in parallel parts
+S3_MULTIPART_CHUNK_SIZE_BYTES: int = 16*1024*1024   # size of each part
+S3_TRANSFER_MAX_CONCURRENCY: int = 10               # threads uploading/downloading parts at the same time
+S3_BUFFER_MAX_MEMORY_BYTES: int = 64*1024*1024      # in-memory download buffers spill to a temp file beyond this
+S3_DOWNLOAD_ETAG_ATTEMPTS: int = 3      # downloads of a key overwritten while it was being downloaded
 
 
 """
@@ -39,12 +59,25 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+DATA_INGESTION_SPLIT_KEY_COLUMN: str = "id"       # rows are assigned to train / test by a hash of this column
+DATA_INGESTION_STRATIFY_SPLIT: bool = False       # True gives every TARGET_COLUMN class exactly the split ratio
+DATA_INGESTION_MONGO_BATCH_SIZE: int = 10_000     # documents per MongoDB cursor round trip
+DATA_INGESTION_EXPORT_CHUNK_ROWS: int = 100_000   # documents turned into typed columns at a time during export
+DATA_INGESTION_PARTITIONS_DIR: str = "partitions"      # partitioned Parquet export, under the feature store dir
+DATA_INGESTION_EXPORT_PARTITIONS: int = 8          # _id ranges the collection is exported as, each to its own Parquet file
+DATA_INGESTION_MIN_PARTITION_DOCUMENTS: int = 100_000   # smaller collections get fewer partitions (down to one)
+DATA_INGESTION_EXPORT_MAX_WORKERS: int = 4         # partitions exported at the same time, each with its own cursor
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.json"   # last exported value + committed part files, next to the partitions
+DATA_INGESTION_WATERMARK_FIELD: str = "_id"        # increasing field new documents are detected by
+DATA_INGESTION_FULL_REFRESH: bool = False          # True re-exports the whole collection instead of only the new documents
 
 """
 Data Validation realted contant start with DATA_VALIDATION VAR NAME
 """
 DATA_VALIDATION_DIR_NAME: str = "data_validation"
 DATA_VALIDATION_REPORT_FILE_NAME: str = "report.yaml"
+DATA_VALIDATION_CHUNK_ROWS: int = 100_000    # rows validated at a time, memory stays flat whatever the file size
+DATA_VALIDATION_MAX_NULL_RATIO: float = 0.0    # nothing downstream imputes, a missing value breaks the transformation
 
 """
 Data Transformation ralated constant start with DATA_TRANSFORMATION VAR NAME
@@ -60,6 +93,8 @@ MODEL_TRAINER_DIR_NAME: str = "model_trainer"
 MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
+MODEL_SERIALIZATION_FORMAT: str = "bundle"   # "bundle" (UBJSON booster + npz/json preprocessing, see model_bundle.py) or "pickle" (dill)
+MODEL_BUNDLE_FORMAT_VERSION: int = 1
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
 MODEL_TRAINER_N_ESTIMATORS=200
 MODEL_TRAINER_MIN_SAMPLES_SPLIT: int = 7
@@ -74,6 +109,25 @@ MODEL Evaluation related constants
 MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02   # if new model get >0.02 performance then we will push else no 
 MODEL_BUCKET_NAME = "mlops-project7-stuffs"
 MODEL_PUSHER_S3_KEY = "model-registry"
+MODEL_REFRESH_INTERVAL_SECONDS: int = 60   # how often the serving app checks the model's ETag in s3, 0 disables hot-reload
+MODEL_REFRESHER_STOP_TIMEOUT_SECONDS: float = 5.0   # how long shutdown waits for a model refresh in progress
+MODEL_WARMUP_BATCH_ROWS: int = 256   # synthetic rows scored by every freshly loaded model before it serves, 0 disables warm-up
+
+
+INFERENCE_MAX_WORKERS: int = 4   # threads running model predictions off the api event loop
+MICRO_BATCH_MAX_SIZE: int = 64   # concurrent /predict rows are stacked into one model call up to this many rows
+MICRO_BATCH_MAX_WAIT_MS: float = 5.0   # how long the first request of a micro-batch waits for others to join
+INFERENCE_BACKEND: str = "xgboost"   # "numpy" scores small batches with the exported trees (TreeEnsembleEvaluator), falls back to xgboost
+TREE_EVALUATOR_MAX_BATCH_ROWS: int = 64    # bigger batches always go to xgboost, which is faster there
+TREE_EVALUATOR_MAX_DEPTH: int = 12         # deeper boosters are not compiled (2**depth slots per tree)
+TREE_EVALUATOR_BLOCK_ROWS: int = 1024      # rows traversed together by the numpy evaluator
+BATCH_SCORING_CHUNK_ROWS: int = 10_000   # uploaded csv/parquet/ndjson files are parsed and scored this many rows at a time
+BATCH_UPLOAD_MAX_MEMORY_BYTES: int = 16*1024*1024   # uploaded files spill to a temp file beyond this
+TRAINING_JOBS_KEEP_FINISHED: int = 20   # finished /train jobs whose status can still be polled, older ones are dropped
+METRICS_NAMESPACE: str = "proj1"   # prefix of every metric exposed on /metrics
+METRICS_LATENCY_BUCKETS: tuple = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                                  0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)   # seconds, fine enough for sub-ms stages
+METRICS_BATCH_SIZE_BUCKETS: tuple = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 10_000, 65_536)   # rows
 
 
 APP_HOST = "0.0.0.0"
@@ -1,10 +1,25 @@
-import sys  # for exceptions class that we defined earlier 
+import os
+import sys  # for exceptions class that we defined earlier
+import time
 import pandas as pd, numpy as np
-from typing import Optional    #for type hinting in python
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple    #for type hinting in python
 
 from src.exception import exceptions
-from src.constants import DATABASE_NAME
+from src.logger import logging
+from src.constants import (DATABASE_NAME, SCHEMA_FILE_PATH, DATA_INGESTION_MONGO_BATCH_SIZE,
+                           DATA_INGESTION_EXPORT_CHUNK_ROWS, DATA_INGESTION_EXPORT_PARTITIONS,
+                           DATA_INGESTION_MIN_PARTITION_DOCUMENTS, DATA_INGESTION_EXPORT_MAX_WORKERS)
 from src.configuration.mongo_db_connection import MongoDBClient
+from src.utils.main_utils import read_schema_column_types
+
+# schema.yaml types stored as numbers, everything else (str, category) is text
+NUMERIC_SCHEMA_TYPES = ("int", "float")
+
+# _id values sampled per partition to pick the split points of a partitioned export
+SAMPLES_PER_PARTITION = 32
+PARTITION_FILE_FORMAT = "part-{:05d}.parquet"
 
 
 class Proj1_data:
@@ -15,23 +30,209 @@ class Proj1_data:
             self.mongo_client = MongoDBClient(database_name=DATABASE_NAME)
         except Exception as e:
             raise exceptions(e,sys)
-        
-    def export_collection_as_DF(self, collection_name:str, database_name:Optional[str]=None) -> pd.DataFrame:
+
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    @staticmethod
+    def read_schema_columns(schema_file_path: str = SCHEMA_FILE_PATH) -> Dict[str, str]:
+        "{column: type} of the columns listed in config/schema.yaml, in order"
+        return read_schema_column_types(schema_file_path)
+
+    @staticmethod
+    def column_array(values: list, dtype: str) -> np.ndarray:
+        """
+        Turns one field of a chunk of documents into a typed array: numbers become int64 / float64
+        (float64 with NaN if some are missing or unparsable), text becomes str with 'na' as NaN.
+        """
+        if dtype in NUMERIC_SCHEMA_TYPES:
+            array = np.array(values)
+            if array.dtype.kind == "b":
+                return array.astype(np.int64)
+            if array.dtype.kind not in "iuf":
+                # None (missing field) or text in a numeric field
+                array = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64)
+            return array.astype(np.float64) if dtype == "float" else array
+        array = np.array(values, dtype=object)
+        if pd.api.types.infer_dtype(array, skipna=True) not in ("string", "empty"):
+            # str() also turns the ObjectId of _id into its hex string
+            array = np.array([None if value is None else str(value) for value in values], dtype=object)
+        array[array == "na"] = None
+        return array
+
+    @staticmethod
+    def arrow_schema(columns: Dict[str, str]):
+        "pyarrow schema of the exported columns, the same for every partition whatever values it holds"
+        import pyarrow as pa
+        types = {"int": pa.int64(), "float": pa.float64()}
+        return pa.schema([(column, types.get(dtype, pa.string())) for column, dtype in columns.items()])
+
+    @staticmethod
+    def range_query(lower=None, upper=None) -> dict:
+        "find() filter of the _id range [lower, upper), None being unbounded"
+        bounds = {}
+        if lower is not None:
+            bounds["$gte"] = lower
+        if upper is not None:
+            bounds["$lt"] = upper
+        return {"_id": bounds} if bounds else {}
+
+    @staticmethod
+    def combine_queries(*queries: Optional[dict]) -> dict:
+        "find() filter matching every given (non empty) filter"
+        queries = [query for query in queries if query]
+        if len(queries) > 1:
+            return {"$and": queries}
+        return queries[0] if queries else {}
+
+    def partition_bounds(self, collection_name: str, database_name: Optional[str] = None,
+                         partitions: int = DATA_INGESTION_EXPORT_PARTITIONS,
+                         min_partition_documents: int = DATA_INGESTION_MIN_PARTITION_DOCUMENTS) -> List[Tuple]:
+        """
+        Splits the collection into at most `partitions` _id ranges of roughly the same size, using
+        split points taken from a $sample of _id values (no full scan). Collections smaller than
+        min_partition_documents per partition get fewer partitions, down to a single (None, None) range.
+        """
         try:
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
+            collection = self.get_collection(collection_name, database_name)
+            n_documents = collection.estimated_document_count()
+            partitions = max(1, min(partitions, n_documents // max(min_partition_documents, 1)))
+            if partitions == 1:
+                return [(None, None)]
+
+            sample = collection.aggregate([{"$sample": {"size": partitions * SAMPLES_PER_PARTITION}},
+                                           {"$project": {"_id": 1}}])
+            try:
+                ids = sorted(document["_id"] for document in sample)
+            except TypeError:
+                # mixed _id types, ordered by MongoDB but not comparable in python
+                logging.info("_id values of different types, exporting as a single partition")
+                return [(None, None)]
+            splits = sorted(set(ids[len(ids) * i // partitions] for i in range(1, partitions)))
+            bounds = [None] + splits + [None]
+            return list(zip(bounds[:-1], bounds[1:]))
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    def max_value(self, collection_name: str, field: str = "_id", database_name: Optional[str] = None):
+        "Largest value of field in the collection (an index walk on _id), None if the collection is empty"
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            documents = list(collection.find({field: {"$exists": True}}, {field: 1}).sort(field, -1).limit(1))
+            return documents[0][field] if documents else None
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    def iter_collection_chunks(self, collection_name: str, database_name: Optional[str] = None,
+                               columns: Optional[Dict[str, str]] = None, query: Optional[dict] = None,
+                               batch_size: int = DATA_INGESTION_MONGO_BATCH_SIZE,
+                               chunk_rows: int = DATA_INGESTION_EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Streams a collection (or the documents matching query) as DataFrames of at most chunk_rows rows.
+
+        Only the schema columns are fetched (projection), the cursor pulls batch_size documents per
+        round trip and only chunk_rows documents are held as dicts at a time before they are turned
+        into typed columns, so memory stays flat whatever the collection size.
+        """
+        try:
+            columns = columns or self.read_schema_columns()
+            collection = self.get_collection(collection_name, database_name)
+            projection = {column: 1 for column in columns}
+            if "_id" not in columns:
+                projection["_id"] = 0
+            cursor = collection.find(query or {}, projection, batch_size=batch_size)
+            try:
+                while True:
+                    documents = list(islice(cursor, chunk_rows))
+                    if not documents:
+                        break
+                    yield pd.DataFrame({column: self.column_array([document.get(column) for document in documents], dtype)
+                                        for column, dtype in columns.items()})
+            finally:
+                cursor.close()
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    def export_collection_as_DF(self, collection_name:str, database_name:Optional[str]=None,
+                                batch_size: int = DATA_INGESTION_MONGO_BATCH_SIZE,
+                                chunk_rows: int = DATA_INGESTION_EXPORT_CHUNK_ROWS) -> pd.DataFrame:
+        try:
+            # typed column chunks are concatenated once, no list of every document is ever built
+            logging.info("Fetching data from MongoDB")
+            columns = self.read_schema_columns()
+            chunks: List[pd.DataFrame] = list(self.iter_collection_chunks(collection_name, database_name, columns=columns,
+                                                                          batch_size=batch_size, chunk_rows=chunk_rows))
+            if not chunks:
+                df = pd.DataFrame({column: self.column_array([], dtype) for column, dtype in columns.items()})
             else:
-                collection = self.mongo_client.client[database_name][collection_name]
-
-            #Convert collection data to DataFrame and essential preprocessing at the same time
-            print("Fetching data from MongoDB")
-            df = pd.DataFrame(list(collection.find()))
-            print(f'Data fetched with length of {len(df)}')
-            
-            if 'id' in df.columns:
-                df.drop(columns=['id'])
-            df.replace({'na',np.nan}, inplace=True)
+                df = pd.concat(chunks, ignore_index=True)
+            logging.info(f'Data fetched with length of {len(df)}')
             return df
 
         except Exception as e:
-            raise exceptions(e, sys)
\ No newline at end of file
+            raise exceptions(e, sys)
+
+    def export_partition(self, collection_name: str, file_path: str, lower=None, upper=None,
+                         database_name: Optional[str] = None, columns: Optional[Dict[str, str]] = None,
+                         query: Optional[dict] = None,
+                         batch_size: int = DATA_INGESTION_MONGO_BATCH_SIZE,
+                         chunk_rows: int = DATA_INGESTION_EXPORT_CHUNK_ROWS) -> int:
+        """
+        Writes the documents of the _id range [lower, upper) (that also match query) to a Parquet
+        file, one row group per chunk, and returns the row count.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            columns = columns or self.read_schema_columns()
+            schema = self.arrow_schema(columns)
+            rows = 0
+            with pq.ParquetWriter(file_path, schema) as writer:
+                for chunk in self.iter_collection_chunks(collection_name, database_name, columns=columns,
+                                                         query=self.combine_queries(self.range_query(lower, upper), query),
+                                                         batch_size=batch_size, chunk_rows=chunk_rows):
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                    rows += len(chunk)
+            return rows
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    def export_collection_as_parquet(self, collection_name: str, output_dir: str, database_name: Optional[str] = None,
+                                     query: Optional[dict] = None,
+                                     partitions: int = DATA_INGESTION_EXPORT_PARTITIONS,
+                                     min_partition_documents: int = DATA_INGESTION_MIN_PARTITION_DOCUMENTS,
+                                     max_workers: int = DATA_INGESTION_EXPORT_MAX_WORKERS,
+                                     batch_size: int = DATA_INGESTION_MONGO_BATCH_SIZE,
+                                     chunk_rows: int = DATA_INGESTION_EXPORT_CHUNK_ROWS) -> List[str]:
+        """
+        Exports the collection as a partitioned Parquet dataset: one part-NNNNN.parquet file per _id
+        range, in _id order, written concurrently by max_workers threads each with its own cursor.
+        query restricts the exported documents. Part files of a previous export in output_dir are
+        removed first. Returns the file paths.
+        """
+        try:
+            start = time.perf_counter()
+            columns = self.read_schema_columns()
+            bounds = self.partition_bounds(collection_name, database_name, partitions, min_partition_documents)
+
+            os.makedirs(output_dir, exist_ok=True)
+            for file_name in os.listdir(output_dir):
+                if file_name.startswith("part-") and file_name.endswith(".parquet"):
+                    os.remove(os.path.join(output_dir, file_name))
+
+            file_paths = [os.path.join(output_dir, PARTITION_FILE_FORMAT.format(index)) for index in range(len(bounds))]
+            # the cursors wait on MongoDB most of the time, so the partitions overlap their round trips
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(bounds)))) as pool:
+                futures = [pool.submit(self.export_partition, collection_name, file_path, lower, upper,
+                                       database_name=database_name, columns=columns, query=query,
+                                       batch_size=batch_size, chunk_rows=chunk_rows)
+                           for file_path, (lower, upper) in zip(file_paths, bounds)]
+                row_counts = [future.result() for future in futures]
+            logging.info(f"Exported {sum(row_counts)} documents of {collection_name} into {len(file_paths)} "
+                         f"partitions in {time.perf_counter() - start:.1f}s (rows per partition {row_counts})")
+            return file_paths
+        except Exception as e:
+            raise exceptions(e, sys)
@@ -11,6 +11,14 @@ class Training_pipeline_config:
     pipeline_name :str = PIPELINE_NAME
     artifact_dir : str = ARTIFACT_DIR
     timestamp :str = time_now
+    stage_cache_dir: str = os.path.join(ARTIFACT_DIR, PIPELINE_STAGE_CACHE_DIR_NAME)
+    run_record_path: str = os.path.join(ARTIFACT_DIR, PIPELINE_RUNS_DIR_NAME, PIPELINE_RUN_RECORD_FILE_NAME)
+    max_workers: int = PIPELINE_MAX_WORKERS
+    profile_report_path: str = os.path.join(ARTIFACT_DIR, MODEL_TRAINER_DIR_NAME, MODEL_TRAINER_TRAINED_MODEL_DIR, PIPELINE_PROFILE_FILE_NAME)
+    profile_cprofile_dir: str = os.path.join(ARTIFACT_DIR, MODEL_TRAINER_DIR_NAME, MODEL_TRAINER_TRAINED_MODEL_DIR, PIPELINE_PROFILE_CPROFILE_DIR_NAME)
+    profile_cprofile: bool = PIPELINE_PROFILE_CPROFILE
+    profile_trace_memory: bool = PIPELINE_PROFILE_TRACE_MEMORY
+    profile_sample_seconds: float = PIPELINE_PROFILE_SAMPLE_SECONDS
 
 training_pipeline_config: Training_pipeline_config = Training_pipeline_config()
 
@@ -22,13 +30,26 @@ class Data_Ingestion_config:
     training_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TRAIN_FILE_NAME)
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
+    split_key_column: str = DATA_INGESTION_SPLIT_KEY_COLUMN
+    stratify_split: bool = DATA_INGESTION_STRATIFY_SPLIT
     collection_name:str = DATA_INGESTION_COLLECTION_NAME
+    mongo_batch_size: int = DATA_INGESTION_MONGO_BATCH_SIZE
+    export_chunk_rows: int = DATA_INGESTION_EXPORT_CHUNK_ROWS
+    partitioned_data_dir: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, DATA_INGESTION_PARTITIONS_DIR)
+    export_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS
+    min_partition_documents: int = DATA_INGESTION_MIN_PARTITION_DOCUMENTS
+    export_max_workers: int = DATA_INGESTION_EXPORT_MAX_WORKERS
+    watermark_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_FEATURE_STORE_DIR, DATA_INGESTION_WATERMARK_FILE_NAME)
+    watermark_field: str = DATA_INGESTION_WATERMARK_FIELD
+    full_refresh: bool = DATA_INGESTION_FULL_REFRESH
 
 
 @dataclass
 class DataValidationConfig:
     data_validation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_VALIDATION_DIR_NAME)   #dir to save report of data validation
     validation_report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE_NAME)  #path to save report file with name
+    chunk_rows: int = DATA_VALIDATION_CHUNK_ROWS
+    max_null_ratio: float = DATA_VALIDATION_MAX_NULL_RATIO
 
 
 
@@ -36,9 +57,9 @@ class DataValidationConfig:
 class DataTransformationConfig:
     data_transformation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
     transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                    TRAIN_FILE_NAME.replace("csv", "npy"))
+                                                    TRAIN_FILE_NAME.replace("parquet", "npy"))
     transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR,
-                                                   TEST_FILE_NAME.replace("csv", "npy"))
+                                                   TEST_FILE_NAME.replace("parquet", "npy"))
     transformed_object_file_path: str = os.path.join(data_transformation_dir,
                                                      DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR,
                                                      PREPROCSSING_OBJECT_FILE_NAME)
@@ -82,6 +103,7 @@ class XGB_config:
     model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
+    serialization_format: str = MODEL_SERIALIZATION_FORMAT
 
     # XGBoost hyperparameters (defaults can be overridden)
     n_estimators: int = 150
@@ -108,4 +130,13 @@ class ModelPusherConfig:
 @dataclass
 class VehiclePredictorConfig:
     model_file_path: str = MODEL_FILE_NAME
-    model_bucket_name: str = MODEL_BUCKET_NAME
\ No newline at end of file
+    model_bucket_name: str = MODEL_BUCKET_NAME
+    model_refresh_interval_seconds: int = MODEL_REFRESH_INTERVAL_SECONDS
+    model_warmup_batch_rows: int = MODEL_WARMUP_BATCH_ROWS
+    inference_max_workers: int = INFERENCE_MAX_WORKERS
+    micro_batch_max_size: int = MICRO_BATCH_MAX_SIZE
+    micro_batch_max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS
+    inference_backend: str = INFERENCE_BACKEND
+    tree_evaluator_max_batch_rows: int = TREE_EVALUATOR_MAX_BATCH_ROWS
+    batch_scoring_chunk_rows: int = BATCH_SCORING_CHUNK_ROWS
+    batch_upload_max_memory_bytes: int = BATCH_UPLOAD_MAX_MEMORY_BYTES
\ No newline at end of file
@@ -1,11 +1,19 @@
 import sys
+from typing import TYPE_CHECKING, Optional
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
-from sklearn.pipeline import Pipeline
 
+if TYPE_CHECKING:   # only for annotations, serving a model bundle does not import sklearn
+    from sklearn.pipeline import Pipeline
+
+from src.constants import INFERENCE_BACKEND, TREE_EVALUATOR_MAX_BATCH_ROWS
+from src.entity.feature_encoder import FeatureEncoder
+from src.entity.tree_evaluator import TreeEnsembleEvaluator
 from src.exception import exceptions
 from src.logger import logging
+from src.metrics import STAGE_LATENCY
 
 class TargetValueMapping:
     def __init__(self):
@@ -18,7 +26,11 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    # process-wide inference backend (class level, so it is never pickled with a model)
+    inference_backend: str = INFERENCE_BACKEND
+    tree_evaluator_max_batch_rows: int = TREE_EVALUATOR_MAX_BATCH_ROWS
+
+    def __init__(self, preprocessing_object: "Pipeline", trained_model_object: object):
         """
         :param preprocessing_object: Input Object of preprocesser
         :param trained_model_object: Input Object of trained model 
@@ -26,6 +38,87 @@ class MyModel:
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
 
+    def transform_features(self, dataframe: pd.DataFrame):
+        """
+        Applies scaling transformations using the pre-trained preprocessing object, adding any
+        columns the preprocessor expects but the dataframe lacks with value 0.
+        """
+        try:
+            return self.preprocessing_object.transform(dataframe)
+        except ValueError as ve:
+            # Handle missing columns error by adding the missing columns with default values
+            msg = str(ve)
+            if "columns are missing" in msg:
+                # extract set-like content: { 'col1', 'col2' }
+                import re
+                m = re.search(r"\{(.+)\}", msg)
+                if m:
+                    cols = [c.strip().strip("'\" ") for c in m.group(1).split(',')]
+                    for c in cols:
+                        if c and c not in dataframe.columns:
+                            dataframe[c] = 0
+                    return self.preprocessing_object.transform(dataframe)
+            raise
+
+    def get_feature_encoder(self) -> Optional[FeatureEncoder]:
+        """
+        Returns the FeatureEncoder compiled from preprocessing_object (built on first use), or None
+        if the preprocessor can't be compiled and the pandas path has to be used.
+        """
+        # getattr: models pickled before the encoder existed don't have the attribute
+        encoder = getattr(self, "_feature_encoder", None)
+        if encoder is None:
+            try:
+                encoder = FeatureEncoder.from_preprocessor(self.preprocessing_object)
+                logging.info(f"Compiled {encoder}")
+            except Exception as e:
+                logging.warning(f"Preprocessor can not be compiled, using the pandas path: {e}")
+                encoder = False
+            self._feature_encoder = encoder
+        return encoder or None
+
+    @classmethod
+    def set_inference_backend(cls, backend: str, max_batch_rows: int = TREE_EVALUATOR_MAX_BATCH_ROWS) -> None:
+        """
+        Selects how every MyModel in the process predicts: "xgboost" (trained_model_object.predict) or
+        "numpy" (TreeEnsembleEvaluator for batches up to max_batch_rows, xgboost for bigger ones).
+        """
+        if backend not in ("xgboost", "numpy"):
+            raise ValueError(f"Unknown inference backend {backend!r}, expected 'xgboost' or 'numpy'")
+        cls.inference_backend = backend
+        cls.tree_evaluator_max_batch_rows = max_batch_rows
+        logging.info(f"Inference backend set to {backend}")
+
+    def get_tree_evaluator(self) -> Optional[TreeEnsembleEvaluator]:
+        """
+        Returns the TreeEnsembleEvaluator exported from trained_model_object (built on first use), or
+        None if the booster can't be exported and XGBoost has to be used.
+        """
+        evaluator = getattr(self, "_tree_evaluator", None)
+        if evaluator is None:
+            try:
+                evaluator = TreeEnsembleEvaluator.from_xgb_classifier(self.trained_model_object)
+            except Exception as e:
+                logging.warning(f"Booster can not be exported, using xgboost for inference: {e}")
+                evaluator = False
+            self._tree_evaluator = evaluator
+        return evaluator or None
+
+    def predict_features(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predicts on features that are already transformed (e.g. by the FeatureEncoder), with the
+        selected inference backend.
+        """
+        try:
+            with STAGE_LATENCY.time(stage="predict"):
+                if MyModel.inference_backend == "numpy" and len(features) <= MyModel.tree_evaluator_max_batch_rows:
+                    evaluator = self.get_tree_evaluator()
+                    if evaluator is not None:
+                        return evaluator.predict(features)
+                return self.trained_model_object.predict(features)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
     def predict(self, dataframe: pd.DataFrame) -> DataFrame:
         """
         Function accepts preprocessed inputs (with all custom transformations already applied),
@@ -35,29 +128,12 @@ class MyModel:
             logging.info("Starting prediction process.")
 
             # Step 1: Apply scaling transformations using the pre-trained preprocessing object
-            try:
-                transformed_feature = self.preprocessing_object.transform(dataframe)
-            except ValueError as ve:
-                # Handle missing columns error by adding the missing columns with default values
-                msg = str(ve)
-                if "columns are missing" in msg:
-                    # extract set-like content: { 'col1', 'col2' }
-                    import re
-                    m = re.search(r"\{(.+)\}", msg)
-                    if m:
-                        cols = [c.strip().strip("'\" ") for c in m.group(1).split(',')]
-                        for c in cols:
-                            if c and c not in dataframe.columns:
-                                dataframe[c] = 0
-                        transformed_feature = self.preprocessing_object.transform(dataframe)
-                    else:
-                        raise
-                else:
-                    raise
+            with STAGE_LATENCY.time(stage="preprocessing"):
+                transformed_feature = self.transform_features(dataframe)
 
             # Step 2: Perform prediction using the trained model
             logging.info("Using the trained model to get predictions")
-            predictions = self.trained_model_object.predict(transformed_feature)
+            predictions = self.predict_features(transformed_feature)
 
             return predictions
 
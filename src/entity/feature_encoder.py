@@ -0,0 +1,172 @@
+import sys
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.exception import exceptions
+from src.utils.input_normalization import GENDER_CODES
+
+# string categories VehicleData maps to numbers before the preprocessor sees them
+CATEGORY_CODES: Dict[str, Dict[str, float]] = {
+    "Gender": {label: float(code) for label, code in GENDER_CODES.items()},
+}
+
+
+class FeatureEncoder:
+    """
+    Compiled replacement of "VehicleData -> DataFrame -> preprocessing_object.transform" for
+    small requests: a record (dict / form) goes straight into a float32 NumPy row laid out in the
+    exact column order the fitted ColumnTransformer produces.
+
+    Every output column is a copy of one input column followed by a per-column affine step,
+    (x - center) / divisor * multiplier + offset, which folds StandardScaler (center=mean_,
+    divisor=scale_), MinMaxScaler (multiplier=scale_, offset=min_) and passthrough columns into
+    four vectors applied in one pass. The operations are done in float64 in the same order as
+    sklearn, so the features are bit-identical to the pandas path before XGBoost casts them to
+    float32.
+    """
+
+    def __init__(self, input_columns: Sequence[str], source_index: np.ndarray, center: np.ndarray,
+                 divisor: np.ndarray, multiplier: np.ndarray, offset: np.ndarray):
+        """
+        :param input_columns: Columns the preprocessor was fitted on, in order
+        :param source_index: For every output column, the index of the input column it comes from
+        :param center, divisor, multiplier, offset: Per output column affine parameters
+        """
+        self.input_columns = list(input_columns)
+        self.source_index = source_index
+        self.center = center
+        self.divisor = divisor
+        self.multiplier = multiplier
+        self.offset = offset
+        self.n_features = len(source_index)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor: object) -> "FeatureEncoder":
+        """
+        Compiles the encoder from a fitted Pipeline([ColumnTransformer]) or ColumnTransformer made of
+        StandardScaler / MinMaxScaler / passthrough / drop transformers. Raises for anything else.
+        """
+        try:
+            # imported here so loading a compiled encoder (model bundle) does not need sklearn
+            from sklearn.compose import ColumnTransformer
+            from sklearn.pipeline import Pipeline
+            from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
+
+            column_transformer = preprocessor
+            if isinstance(preprocessor, Pipeline):
+                if len(preprocessor.steps) != 1:
+                    raise ValueError("Only single step preprocessing pipelines can be compiled")
+                column_transformer = preprocessor.steps[0][1]
+            if not isinstance(column_transformer, ColumnTransformer):
+                raise ValueError(f"Can not compile {type(column_transformer).__name__}")
+
+            input_columns = list(column_transformer.feature_names_in_)
+            source_index, center, divisor, multiplier, offset = [], [], [], [], []
+            for _, transformer, columns in column_transformer.transformers_:
+                if transformer == "drop" or len(columns) == 0:
+                    continue
+                indices = [input_columns.index(c) if isinstance(c, str) else int(c) for c in columns]
+                n = len(indices)
+                source_index.extend(indices)
+                # newer sklearn stores remainder="passthrough" as an identity FunctionTransformer
+                if transformer == "passthrough" or (isinstance(transformer, FunctionTransformer)
+                                                    and transformer.func is None):
+                    center.extend([0.0] * n); divisor.extend([1.0] * n)
+                    multiplier.extend([1.0] * n); offset.extend([0.0] * n)
+                elif isinstance(transformer, StandardScaler):
+                    # with_mean=False / with_std=False still set mean_ / scale_ but don't apply them
+                    center.extend(transformer.mean_ if transformer.with_mean else [0.0] * n)
+                    divisor.extend(transformer.scale_ if transformer.with_std else [1.0] * n)
+                    multiplier.extend([1.0] * n); offset.extend([0.0] * n)
+                elif isinstance(transformer, MinMaxScaler) and not transformer.clip:
+                    center.extend([0.0] * n); divisor.extend([1.0] * n)
+                    multiplier.extend(transformer.scale_); offset.extend(transformer.min_)
+                else:
+                    raise ValueError(f"Can not compile transformer {type(transformer).__name__}")
+
+            return cls(input_columns=input_columns,
+                       source_index=np.asarray(source_index, dtype=np.intp),
+                       center=np.asarray(center, dtype=np.float64),
+                       divisor=np.asarray(divisor, dtype=np.float64),
+                       multiplier=np.asarray(multiplier, dtype=np.float64),
+                       offset=np.asarray(offset, dtype=np.float64))
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def _to_float(column: str, value: object) -> float:
+        if value is None:
+            return np.nan
+        if isinstance(value, str):
+            if column in CATEGORY_CODES:
+                # same as VehicleData: known labels are mapped, anything else becomes NaN
+                return CATEGORY_CODES[column].get(value, np.nan)
+            return float(value)
+        return float(value)
+
+    def encode_raw(self, records: Sequence[Mapping[str, object]]) -> np.ndarray:
+        """
+        Returns the (n_records, n_input_columns) float64 matrix of raw inputs. Columns the
+        preprocessor expects but a record lacks are 0, the same default MyModel.predict fills in.
+        """
+        raw = np.zeros((len(records), len(self.input_columns)), dtype=np.float64)
+        for i, record in enumerate(records):
+            for j, column in enumerate(self.input_columns):
+                if column in record:
+                    raw[i, j] = self._to_float(column, record[column])
+        return raw
+
+    def encode_frame(self, dataframe) -> np.ndarray:
+        """
+        Same as MyModel.transform_features for a DataFrame: returns the float64 features of every
+        row, columns the preprocessor expects but the dataframe lacks are 0.
+        """
+        try:
+            raw = np.zeros((len(dataframe), len(self.input_columns)), dtype=np.float64)
+            for j, column in enumerate(self.input_columns):
+                if column not in dataframe.columns:
+                    continue
+                values = np.asarray(dataframe[column])
+                if values.dtype.kind not in "biuf":
+                    values = np.array([self._to_float(column, value) for value in values], dtype=np.float64)
+                raw[:, j] = values
+            return self.transform(raw)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def transform(self, raw: np.ndarray) -> np.ndarray:
+        """
+        Applies the folded scalers to a raw float64 input matrix and returns float64 features.
+        """
+        features = raw[:, self.source_index]
+        features -= self.center
+        features /= self.divisor
+        features *= self.multiplier
+        features += self.offset
+        return features
+
+    def encode_many(self, records: Sequence[Mapping[str, object]]) -> np.ndarray:
+        """
+        Encodes records into an (n_records, n_features) float32 matrix ready for the booster.
+        """
+        try:
+            return self.transform(self.encode_raw(records)).astype(np.float32)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def encode(self, record: Mapping[str, object], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encodes one record into a (1, n_features) float32 row. Pass a preallocated out array to
+        reuse it across calls.
+        """
+        try:
+            if out is None:
+                out = np.empty((1, self.n_features), dtype=np.float32)
+            out[0] = self.transform(self.encode_raw([record]))[0]
+            return out
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def __repr__(self):
+        return f"FeatureEncoder(inputs={len(self.input_columns)}, features={self.n_features})"
@@ -0,0 +1,240 @@
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import numpy as np
+
+from src.constants import MODEL_BUNDLE_FORMAT_VERSION
+from src.entity.estimator import MyModel
+from src.entity.feature_encoder import FeatureEncoder
+from src.entity.tree_evaluator import TreeEnsembleEvaluator
+from src.exception import exceptions
+from src.logger import logging
+
+MODEL_BUNDLE_FORMAT = "proj1-model-bundle"
+MANIFEST_FILE = "manifest.json"
+BOOSTER_FILE = "booster.ubj"
+PREPROCESSING_FILE = "preprocessing.npz"
+TREES_FILE = "trees.npz"
+
+# every zip archive starts with a local file header
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+class BundledModel(MyModel):
+    """
+    MyModel loaded from a model bundle: a zip holding a manifest, the booster in XGBoost's
+    binary UBJSON format, the preprocessing parameters compiled by FeatureEncoder and the trees
+    exported by TreeEnsembleEvaluator, all as JSON / npz (no pickles).
+
+    Loading only needs numpy. The XGBClassifier is built from the UBJSON bytes the first time
+    XGBoost is actually needed (xgboost backend, batches bigger than the numpy evaluator takes),
+    so neither sklearn nor xgboost are imported to get a model ready to serve.
+    """
+
+    def __init__(self, feature_encoder: FeatureEncoder, booster_bytes: bytes,
+                 tree_evaluator: Optional[TreeEnsembleEvaluator] = None, manifest: Optional[dict] = None):
+        """
+        :param feature_encoder: Compiled preprocessing (replaces preprocessing_object)
+        :param booster_bytes: XGBClassifier saved as UBJSON
+        :param tree_evaluator: Exported trees, None to export them from the booster on first use
+        :param manifest: Manifest the bundle was loaded from
+        """
+        self.preprocessing_object = None
+        self._feature_encoder = feature_encoder
+        self._tree_evaluator = tree_evaluator
+        self.booster_bytes = booster_bytes
+        self.manifest = manifest or {}
+        self._trained_model_object = None
+        self._booster_lock = threading.Lock()
+
+    @property
+    def trained_model_object(self) -> object:
+        """The XGBClassifier, deserialized from the bundle's UBJSON booster on first access."""
+        if self._trained_model_object is None:
+            with self._booster_lock:
+                if self._trained_model_object is None:
+                    from xgboost import XGBClassifier
+                    model = XGBClassifier()
+                    model.load_model(bytearray(self.booster_bytes))
+                    self._trained_model_object = model
+                    logging.info("Loaded XGBoost booster from model bundle")
+        return self._trained_model_object
+
+    def transform_features(self, dataframe) -> np.ndarray:
+        """
+        Applies the compiled preprocessing, adding any columns it expects but the dataframe lacks as 0.
+        """
+        return self._feature_encoder.encode_frame(dataframe)
+
+    def __getstate__(self):
+        # a bundled model is pickled as its bundle parts, the lock and lazy booster are rebuilt
+        state = self.__dict__.copy()
+        state["_trained_model_object"] = None
+        del state["_booster_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._booster_lock = threading.Lock()
+
+    def __repr__(self):
+        # from the manifest, so printing the model does not deserialize the booster
+        return f"{self.manifest.get('model_class', 'XGBClassifier')}()"
+
+    def __str__(self):
+        return self.__repr__()
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _npz_bytes(arrays: Dict[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def _load_npz(data: bytes) -> Dict[str, np.ndarray]:
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def dumps_model_bundle(model: MyModel) -> bytes:
+    """
+    Serializes a trained MyModel into model bundle bytes. Raises if its preprocessor can't be
+    compiled by FeatureEncoder (the model then has to be pickled instead).
+    """
+    try:
+        import xgboost
+
+        encoder = model.get_feature_encoder()
+        if encoder is None:
+            raise ValueError("Preprocessor can not be compiled into a model bundle")
+
+        # XGBClassifier.save_model keeps the sklearn wrapper attributes next to the booster,
+        # the .ubj suffix selects the UBJSON format
+        fd, booster_path = tempfile.mkstemp(suffix=".ubj")
+        os.close(fd)
+        try:
+            model.trained_model_object.save_model(booster_path)
+            with open(booster_path, "rb") as file_obj:
+                booster_bytes = file_obj.read()
+        finally:
+            os.remove(booster_path)
+
+        files = {
+            BOOSTER_FILE: booster_bytes,
+            PREPROCESSING_FILE: _npz_bytes({"source_index": encoder.source_index, "center": encoder.center,
+                                            "divisor": encoder.divisor, "multiplier": encoder.multiplier,
+                                            "offset": encoder.offset}),
+        }
+        manifest = {
+            "format": MODEL_BUNDLE_FORMAT,
+            "format_version": MODEL_BUNDLE_FORMAT_VERSION,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "xgboost_version": xgboost.__version__,
+            "model_class": type(model.trained_model_object).__name__,
+            "preprocessing": {"input_columns": encoder.input_columns, "n_features": encoder.n_features},
+        }
+
+        evaluator = model.get_tree_evaluator()
+        if evaluator is not None:
+            files[TREES_FILE] = _npz_bytes({
+                "feature": evaluator.feature.reshape(evaluator.n_trees, evaluator.n_slots),
+                "threshold": evaluator.threshold.reshape(evaluator.n_trees, evaluator.n_slots),
+                "default_right": evaluator.default_right.reshape(evaluator.n_trees, evaluator.n_slots),
+                "leaf_value": evaluator.leaf_value.reshape(evaluator.n_trees, evaluator.n_slots + 1),
+            })
+            manifest["trees"] = {"max_depth": evaluator.max_depth, "base_margin": evaluator.base_margin,
+                                 "n_features": evaluator.n_features}
+        manifest["files"] = {name: _sha256(data) for name, data in files.items()}
+
+        buffer = io.BytesIO()
+        # stored, not deflated: the npz arrays barely compress and inflating them dominated load time
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as bundle:
+            bundle.writestr(MANIFEST_FILE, json.dumps(manifest, indent=2))
+            for name, data in files.items():
+                bundle.writestr(name, data)
+        return buffer.getvalue()
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def loads_model_bundle(data: bytes) -> BundledModel:
+    """
+    Loads model bundle bytes into a BundledModel, checking the format version and file checksums.
+    """
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as bundle:
+            manifest = json.loads(bundle.read(MANIFEST_FILE))
+            if manifest.get("format") != MODEL_BUNDLE_FORMAT:
+                raise ValueError(f"Not a model bundle: format {manifest.get('format')!r}")
+            if manifest.get("format_version", 0) > MODEL_BUNDLE_FORMAT_VERSION:
+                raise ValueError(f"Model bundle format version {manifest['format_version']} is newer than "
+                                 f"the supported version {MODEL_BUNDLE_FORMAT_VERSION}")
+            files = {name: bundle.read(name) for name in manifest["files"]}
+
+        for name, checksum in manifest["files"].items():
+            if _sha256(files[name]) != checksum:
+                raise ValueError(f"Checksum mismatch for {name} in model bundle")
+
+        preprocessing = _load_npz(files[PREPROCESSING_FILE])
+        encoder = FeatureEncoder(input_columns=manifest["preprocessing"]["input_columns"], **preprocessing)
+
+        evaluator = None
+        if TREES_FILE in files:
+            evaluator = TreeEnsembleEvaluator(**_load_npz(files[TREES_FILE]), **manifest["trees"])
+
+        return BundledModel(feature_encoder=encoder, booster_bytes=files[BOOSTER_FILE],
+                            tree_evaluator=evaluator, manifest=manifest)
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def is_model_bundle(data: bytes) -> bool:
+    """True if data is a model bundle (zip) rather than a pickled MyModel."""
+    return data[:len(ZIP_MAGIC)] == ZIP_MAGIC
+
+
+def loads_model(data: bytes) -> MyModel:
+    """
+    Loads a serialized model of either format: a model bundle, or a MyModel pickled with
+    dill/pickle by older versions of the pipeline.
+    """
+    try:
+        if is_model_bundle(data):
+            return loads_model_bundle(data)
+        import dill
+        return dill.loads(data)
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def load_model_file(file_path: str) -> MyModel:
+    """Loads a model bundle or a pickled MyModel from a local file."""
+    try:
+        with open(file_path, "rb") as file_obj:
+            return loads_model(file_obj.read())
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def save_model_file(file_path: str, model: MyModel) -> None:
+    """Saves a trained MyModel as a model bundle."""
+    try:
+        data = dumps_model_bundle(model)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as file_obj:
+            file_obj.write(data)
+        logging.info(f"Saved model bundle ({len(data)} bytes) to {file_path}")
+    except Exception as e:
+        raise exceptions(e, sys) from e
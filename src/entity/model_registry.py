@@ -0,0 +1,255 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from pandas import DataFrame
+
+from src.cloud_storage.aws_storage import SimpleStorageService
+from src.constants import MODEL_REFRESH_INTERVAL_SECONDS, MODEL_REFRESHER_STOP_TIMEOUT_SECONDS, MODEL_WARMUP_BATCH_ROWS
+from src.entity.estimator import MyModel
+from src.exception import exceptions
+from src.logger import logging
+from src.metrics import (MODEL_INFO, MODEL_LOAD_SECONDS, MODEL_LOADED_TIMESTAMP, MODEL_LOADS,
+                         MODEL_WARMUP_SECONDS, suppress_metrics)
+from src.utils.input_normalization import MODEL_INPUT_COLUMNS
+
+
+@dataclass
+class CachedModel:
+    bucket_name: str
+    model_path: str
+    etag: Optional[str]         # ETag of the S3 object this model was deserialized from
+    model: MyModel
+    loaded_at: float
+    load_seconds: Optional[float] = None       # download + deserialization time
+    warmup_seconds: Optional[float] = None     # None until the model scored its warm-up batch
+
+
+def warmup_frame(n_rows: int) -> DataFrame:
+    """
+    Deterministic synthetic batch in the model input columns (the same frame /predict_batch
+    builds), with values spread over the realistic ranges so every tree path is plausible.
+    """
+    rows = np.arange(n_rows)
+    frame = DataFrame({
+        "Gender": rows % 2,
+        "Age": 20 + rows % 60,
+        "Driving_License": np.ones(n_rows, dtype=np.int64),
+        "Region_Code": (rows % 53).astype(float),
+        "Previously_Insured": (rows // 2) % 2,
+        "Annual_Premium": 2630.0 + (rows % 100) * 500.0,
+        "Policy_Sales_Channel": (1 + rows % 160).astype(float),
+        "Vintage": 10 + rows % 290,
+        "Vehicle_Age_lt_1_Year": (rows % 3 == 0).astype(np.int64),
+        "Vehicle_Age_gt_2_Years": (rows % 3 == 2).astype(np.int64),
+        "Vehicle_Damage_Yes": (rows // 3) % 2,
+    })
+    return frame[MODEL_INPUT_COLUMNS]
+
+
+class ModelRegistry:
+    """
+    Process-wide, thread-safe cache of deserialized production models keyed by bucket + key
+    (each entry also records the ETag it was loaded from).
+
+    Like MongoDBClient / S3Client the state lives on the class, so every ModelRegistry()
+    instance in the process shares the same models and S3 is only hit on a miss.
+    """
+    _entries: Dict[Tuple[str, str], CachedModel] = {}
+    _lock = threading.Lock()
+    # rows of the synthetic batch every loaded model scores before it is cached, 0 disables warm-up
+    warmup_batch_rows: int = MODEL_WARMUP_BATCH_ROWS
+
+    def get_model(self, bucket_name: str, model_path: str) -> MyModel:
+        """
+        Returns the cached model for bucket/key, loading it from S3 on the first call only.
+        """
+        key = (bucket_name, model_path)
+        entry = ModelRegistry._entries.get(key)
+        if entry is not None:
+            return entry.model
+
+        with ModelRegistry._lock:
+            # another thread may have loaded it while we were waiting for the lock
+            entry = ModelRegistry._entries.get(key)
+            if entry is None:
+                entry = self.load_entry(bucket_name=bucket_name, model_path=model_path)
+                ModelRegistry._entries[key] = entry
+                self.publish_metrics(entry)
+            return entry.model
+
+    def get_entry(self, bucket_name: str, model_path: str) -> Optional[CachedModel]:
+        """Returns the cache entry (model + ETag) for bucket/key without loading anything."""
+        return ModelRegistry._entries.get((bucket_name, model_path))
+
+    def is_ready(self, bucket_name: str, model_path: str) -> bool:
+        """True once the model for bucket/key is loaded and has been warmed up."""
+        entry = self.get_entry(bucket_name=bucket_name, model_path=model_path)
+        return entry is not None and entry.warmup_seconds is not None
+
+    @staticmethod
+    def load_entry(bucket_name: str, model_path: str) -> CachedModel:
+        """
+        Downloads and deserializes the model from S3 into a new, warmed up cache entry (does not store it).
+        """
+        try:
+            start = time.perf_counter()
+            s3 = SimpleStorageService()
+            etag = s3.get_object_etag(bucket_name=bucket_name, s3_key=model_path, use_cache=False)
+            model = s3.load_model(model_path, bucket_name=bucket_name)
+            load_seconds = time.perf_counter() - start
+            MODEL_LOADS.inc()
+            logging.info(f"Loaded model s3://{bucket_name}/{model_path} (ETag {etag}) "
+                         f"into registry in {load_seconds:.3f}s")
+            entry = CachedModel(bucket_name=bucket_name, model_path=model_path, etag=etag,
+                                model=model, loaded_at=time.time(), load_seconds=load_seconds)
+            entry.warmup_seconds = ModelRegistry.warm_up(model, ModelRegistry.warmup_batch_rows)
+            return entry
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def warm_up(model: MyModel, batch_rows: int) -> Optional[float]:
+        """
+        Scores a synthetic batch through model.predict (one row, then batch_rows rows) and the
+        compiled single-row encoder, so the first real requests don't pay for the lazy work done on
+        the first call: compiling the encoder / tree evaluator, deserializing a bundled booster,
+        XGBoost's thread pool and the pandas code paths.
+        Returns the warm-up duration in seconds (0 when disabled), or None if it failed: the model
+        is still cached, but not reported ready.
+        """
+        if batch_rows <= 0:
+            return 0.0
+        try:
+            start = time.perf_counter()
+            frame = warmup_frame(batch_rows)
+            # synthetic (and cold) calls, kept out of the request latency histograms of /metrics
+            with suppress_metrics():
+                model.predict(frame.head(1).copy())
+                model.predict(frame.copy())
+                encoder = model.get_feature_encoder()
+                if encoder is not None:
+                    model.predict_features(encoder.encode_many(frame.head(1).to_dict(orient="records")))
+            seconds = time.perf_counter() - start
+            logging.info(f"Warmed up {model} with {batch_rows} synthetic rows in {seconds:.3f}s")
+            return seconds
+        except Exception as e:
+            logging.error(f"Model warm-up failed: {e}")
+            return None
+
+    def swap(self, entry: CachedModel) -> None:
+        """
+        Atomically replaces the cached model for entry's bucket/key. Requests that already
+        fetched the old model object keep using it until they finish.
+        """
+        with ModelRegistry._lock:
+            ModelRegistry._entries[(entry.bucket_name, entry.model_path)] = entry
+        self.publish_metrics(entry)
+        logging.info(f"Swapped in model s3://{entry.bucket_name}/{entry.model_path} (ETag {entry.etag})")
+
+    @staticmethod
+    def publish_metrics(entry: CachedModel) -> None:
+        """Points the model gauges on /metrics (version, load and warm-up time) at a newly cached entry."""
+        MODEL_INFO.clear()
+        MODEL_INFO.set(1, model=f"s3://{entry.bucket_name}/{entry.model_path}", etag=entry.etag or "")
+        MODEL_LOAD_SECONDS.set(entry.load_seconds or 0.0)
+        MODEL_WARMUP_SECONDS.set(entry.warmup_seconds if entry.warmup_seconds is not None else float("nan"))
+        MODEL_LOADED_TIMESTAMP.set(entry.loaded_at)
+
+    def invalidate(self, bucket_name: Optional[str] = None, model_path: Optional[str] = None) -> None:
+        """
+        Drops cached models so the next get_model call reloads from S3.
+        With no arguments every entry is dropped; otherwise only matching bucket and/or key.
+        """
+        with ModelRegistry._lock:
+            for key in list(ModelRegistry._entries):
+                if bucket_name is not None and key[0] != bucket_name:
+                    continue
+                if model_path is not None and key[1] != model_path:
+                    continue
+                del ModelRegistry._entries[key]
+                logging.info(f"Invalidated cached model s3://{key[0]}/{key[1]}")
+
+
+class ModelRefresher:
+    """
+    Background thread that hot-reloads a registry model when it changes in S3.
+
+    Every interval it only does a HEAD request to read the key's ETag; when the ETag differs
+    from the cached one (or the cached model failed its warm-up) the model is downloaded and
+    deserialized on this thread (off the request path) and swapped into the ModelRegistry once it
+    has been warmed up successfully.
+    """
+
+    def __init__(self, bucket_name: str, model_path: str,
+                 interval_seconds: int = MODEL_REFRESH_INTERVAL_SECONDS):
+        self.bucket_name = bucket_name
+        self.model_path = model_path
+        self.interval_seconds = interval_seconds
+        self.registry = ModelRegistry()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh_if_changed(self) -> bool:
+        """
+        Reloads the model if its ETag in S3 differs from the cached one or the cached one failed its
+        warm-up. Returns True when a new model was swapped in.
+        """
+        try:
+            etag = SimpleStorageService().get_object_etag(bucket_name=self.bucket_name, s3_key=self.model_path,
+                                                             use_cache=False)
+            if etag is None:
+                logging.warning(f"Model s3://{self.bucket_name}/{self.model_path} not found, keeping current model")
+                return False
+
+            current = self.registry.get_entry(bucket_name=self.bucket_name, model_path=self.model_path)
+            if current is not None and current.etag == etag and current.warmup_seconds is not None:
+                return False
+
+            if current is not None and current.etag == etag:
+                logging.info(f"Cached model (ETag {etag}) failed its warm-up, reloading")
+            else:
+                logging.info(f"Model ETag changed ({current.etag if current else None} -> {etag}), reloading")
+            entry = ModelRegistry.load_entry(bucket_name=self.bucket_name, model_path=self.model_path)
+            if entry.warmup_seconds is None:
+                # a model that can't score the warm-up batch would fail every request, keep the old one
+                logging.error(f"Model s3://{self.bucket_name}/{self.model_path} (ETag {entry.etag}) failed its "
+                              f"warm-up, not swapping it in; retrying on the next poll")
+                return False
+            self.registry.swap(entry)
+            return True
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                self.refresh_if_changed()
+            except Exception as e:
+                # a failed poll must never kill the thread, the current model keeps serving
+                logging.error(f"Model refresh failed: {e}")
+
+    def start(self) -> None:
+        """Starts the polling thread (no-op if interval_seconds <= 0 or already running)."""
+        if self.interval_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="model-refresher", daemon=True)
+        self._thread.start()
+        logging.info(f"Model refresher started, polling every {self.interval_seconds}s")
+
+    def stop(self, timeout_seconds: float = MODEL_REFRESHER_STOP_TIMEOUT_SECONDS) -> None:
+        """
+        Signals the polling thread to exit and waits for it at most timeout_seconds: a poll stuck in
+        a slow S3 download must not hang the app shutdown (the thread is a daemon, it dies with the process).
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_seconds)
+            if self._thread.is_alive():
+                logging.warning(f"Model refresher still busy after {timeout_seconds}s, not waiting for it")
+            self._thread = None
+        logging.info("Model refresher stopped")
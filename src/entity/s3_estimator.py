@@ -1,6 +1,7 @@
 from src.cloud_storage.aws_storage import SimpleStorageService
 from src.exception import exceptions
 from src.entity.estimator import MyModel
+from src.entity.model_registry import ModelRegistry
 import sys
 from pandas import DataFrame
 
@@ -36,6 +37,13 @@ class Proj1Estimator:
 
         return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
 
+    def get_model(self,)->MyModel:
+        """
+        Get the model from the process-wide ModelRegistry, it is downloaded from s3 only on the first call
+        :return:
+        """
+        return ModelRegistry().get_model(bucket_name=self.bucket_name, model_path=self.model_path)
+
     def save_model(self,from_file,remove:bool=False)->None:
         """
         Save the model to the model_path
@@ -49,6 +57,8 @@ class Proj1Estimator:
                                 bucket_name=self.bucket_name,
                                 remove=remove
                                 )
+            # the model in the bucket changed so the cached copy in this process is stale
+            ModelRegistry().invalidate(bucket_name=self.bucket_name, model_path=self.model_path)
         except Exception as e:
             raise exceptions(e, sys)
 
@@ -59,8 +69,7 @@ class Proj1Estimator:
         :return:
         """
         try:
-            if self.loaded_model is None:
-                self.loaded_model = self.load_model()
-            return self.loaded_model.predict(dataframe=dataframe)
+            model = self.loaded_model if self.loaded_model is not None else self.get_model()
+            return model.predict(dataframe=dataframe)
         except Exception as e:
             raise exceptions(e, sys)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import json
+import sys
+from typing import Optional
+
+import numpy as np
+
+from src.constants import TREE_EVALUATOR_BLOCK_ROWS, TREE_EVALUATOR_MAX_DEPTH
+from src.exception import exceptions
+from src.logger import logging
+
+
+class TreeEnsembleEvaluator:
+    """
+    Pure-NumPy replacement of XGBClassifier.predict for a trained binary:logistic gbtree booster.
+
+    Every tree is exported into a complete binary tree of depth max_depth stored in flat arrays:
+    split feature and threshold of the internal slots, and leaf values of the last level. Slot k
+    has its children at 2k+1 (x < threshold, or missing with default left) and 2k+2, so a batch is
+    evaluated for all trees at once by moving a (rows x trees) matrix of slots one level down per
+    step, with no per-call DMatrix. Leaves shallower than max_depth are padded with slots whose
+    threshold is NaN (never go right), so the leaf value sits at their leftmost descendant.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, default_right: np.ndarray,
+                 leaf_value: np.ndarray, max_depth: int, base_margin: float, n_features: int):
+        """
+        :param feature, threshold, default_right: (trees, 2**max_depth - 1) internal slot arrays
+        :param leaf_value: (trees, 2**max_depth) leaf values of the last level
+        :param max_depth: Depth of the deepest tree (number of traversal steps)
+        :param base_margin: Margin every prediction starts from (logit of base_score)
+        :param n_features: Number of input features the booster was trained on
+        """
+        self.n_trees, self.n_slots = feature.shape
+        self.feature = feature.ravel()
+        self.threshold = threshold.ravel()
+        self.default_right = default_right.ravel()
+        self.leaf_value = leaf_value.ravel()
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+        self.n_features = n_features
+        self.tree_offset = np.arange(self.n_trees, dtype=np.intp) * self.n_slots
+        self.leaf_offset = np.arange(self.n_trees, dtype=np.intp) * (self.n_slots + 1) - self.n_slots
+
+    @classmethod
+    def from_xgb_classifier(cls, model: object, max_depth_limit: int = TREE_EVALUATOR_MAX_DEPTH
+                            ) -> "TreeEnsembleEvaluator":
+        """
+        Exports the trees of a fitted XGBClassifier (binary:logistic, gbtree, numerical splits only,
+        depth up to max_depth_limit). Raises for anything else so the caller can fall back to XGBoost.
+        """
+        try:
+            booster = model.get_booster()
+            learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+
+            objective = learner["objective"]["name"]
+            if objective != "binary:logistic":
+                raise ValueError(f"Can not compile objective {objective}")
+            gradient_booster = learner["gradient_booster"]
+            if gradient_booster["name"] != "gbtree":
+                raise ValueError(f"Can not compile booster {gradient_booster['name']}")
+
+            # base_score is stored as a probability ("[4.93E-1]" in xgboost >= 2)
+            base_score = float(learner["learner_model_param"]["base_score"].strip("[]"))
+            base_margin = float(np.log(base_score / (1.0 - base_score)))
+            n_features = int(learner["learner_model_param"]["num_feature"])
+
+            trees = gradient_booster["model"]["trees"]
+            iteration_indptr = gradient_booster["model"].get("iteration_indptr")
+            best_iteration = cls._best_iteration(model)
+            if best_iteration is not None and iteration_indptr is not None:
+                # XGBClassifier.predict only uses the trees up to the early stopping best iteration
+                trees = trees[:iteration_indptr[best_iteration + 1]]
+
+            for tree in trees:
+                if any(split_type != 0 for split_type in tree["split_type"]):
+                    raise ValueError("Can not compile categorical splits")
+            max_depth = max(cls._depth(tree) for tree in trees)
+            if max_depth > max_depth_limit:
+                raise ValueError(f"Trees of depth {max_depth} exceed the limit of {max_depth_limit}")
+
+            n_slots = 2 ** max_depth - 1
+            feature = np.zeros((len(trees), n_slots), dtype=np.intp)
+            threshold = np.full((len(trees), n_slots), np.nan, dtype=np.float32)
+            default_right = np.zeros((len(trees), n_slots), dtype=bool)
+            leaf_value = np.zeros((len(trees), n_slots + 1), dtype=np.float32)
+            for index, tree in enumerate(trees):
+                cls._fill(tree, max_depth, feature[index], threshold[index], default_right[index], leaf_value[index])
+
+            evaluator = cls(feature=feature, threshold=threshold, default_right=default_right, leaf_value=leaf_value,
+                            max_depth=max_depth, base_margin=base_margin, n_features=n_features)
+            logging.info(f"Compiled {evaluator}")
+            return evaluator
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def _best_iteration(model: object) -> Optional[int]:
+        try:
+            return int(model.best_iteration)
+        except (AttributeError, TypeError, ValueError):
+            return None     # no early stopping, every tree is used
+
+    @staticmethod
+    def _depth(tree: dict) -> int:
+        left, right = tree["left_children"], tree["right_children"]
+        max_depth, stack = 0, [(0, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if left[node] == -1:
+                max_depth = max(max_depth, depth)
+            else:
+                stack.append((left[node], depth + 1))
+                stack.append((right[node], depth + 1))
+        return max_depth
+
+    @staticmethod
+    def _fill(tree: dict, max_depth: int, feature: np.ndarray, threshold: np.ndarray,
+              default_right: np.ndarray, leaf_value: np.ndarray) -> None:
+        left, right = tree["left_children"], tree["right_children"]
+        n_slots = 2 ** max_depth - 1
+        stack = [(0, 0, 0)]     # (node, slot, depth)
+        while stack:
+            node, slot, depth = stack.pop()
+            if left[node] == -1:
+                # leaf: padded slots below it always go left, so store it at the leftmost descendant
+                while depth < max_depth:
+                    slot, depth = 2 * slot + 1, depth + 1
+                leaf_value[slot - n_slots] = tree["split_conditions"][node]
+                continue
+            feature[slot] = tree["split_indices"][node]
+            threshold[slot] = tree["split_conditions"][node]
+            default_right[slot] = not tree["default_left"][node]
+            stack.append((left[node], 2 * slot + 1, depth + 1))
+            stack.append((right[node], 2 * slot + 2, depth + 1))
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the raw margin (log-odds) of every row of X.
+        """
+        try:
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            if X.ndim != 2 or X.shape[1] != self.n_features:
+                raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+            has_missing = bool(np.isnan(X).any())
+            margin = np.empty(len(X), dtype=np.float32)
+            for start in range(0, len(X), TREE_EVALUATOR_BLOCK_ROWS):
+                block = slice(start, start + TREE_EVALUATOR_BLOCK_ROWS)
+                margin[block] = self._block_margin(X[block], has_missing)
+            return margin + np.float32(self.base_margin)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def _block_margin(self, X: np.ndarray, has_missing: bool) -> np.ndarray:
+        # rows are evaluated in blocks so the (rows x trees) slot matrices stay cache sized
+        flat = X.ravel()
+        row_offset = (np.arange(len(X), dtype=np.intp) * self.n_features)[:, None]
+        slot = np.zeros((len(X), self.n_trees), dtype=np.intp)
+        for _ in range(self.max_depth):
+            index = slot + self.tree_offset
+            value = flat[row_offset + self.feature[index]]
+            # x >= threshold goes right (NaN padding thresholds never do)
+            go_right = value >= self.threshold[index]
+            if has_missing:
+                # missing values follow the direction learned for them
+                go_right = np.where(np.isnan(value), self.default_right[index], go_right)
+            slot = 2 * slot + 1 + go_right
+        return self.leaf_value[slot + self.leaf_offset].sum(axis=1)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns the probability of the positive class for every row of X.
+        """
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Returns class labels (0 / 1) the same way XGBClassifier.predict does (probability > 0.5).
+        """
+        return (self.predict_proba(X) > 0.5).astype(np.int64)
+
+    def __repr__(self):
+        return f"TreeEnsembleEvaluator(trees={self.n_trees}, max_depth={self.max_depth})"
@@ -1,36 +1,142 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
-from from_root import from_root     # it hept to get root directory 
-from datetime import datetime 
 import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from from_root import from_root     # it hept to get root directory
+from datetime import datetime
 
 
-# constants for log configuration 
+# constants for log configuration
 log_dir = 'logs'
 log_file_naming_format = f"{datetime.now().strftime('%m_%d_%Y__%H')}.log"
 max_log_file_size = 5*1024*1024          #5mb
 backup_count = 3           # how many log files RotatingFileHandler can make when one log file filled with 5mb of data, then it will create new log file but cant make more than 3 files
 
+# settings that can be changed through environment variables
+log_level = os.getenv("LOG_LEVEL", "DEBUG").upper()      # default level of every module
+module_log_levels = os.getenv("LOG_LEVELS", "")          # per module / logger levels, e.g. "src.entity.estimator=WARNING,pymongo=INFO"
+log_sample_rate = float(os.getenv("LOG_SAMPLE_RATE", "1"))   # fraction of INFO/DEBUG lines kept from the per-request modules below
+async_logging = os.getenv("LOG_ASYNC", "1") != "0"       # 0 writes the log lines from the calling thread (old behaviour)
 
+# modules logging several lines on every prediction request, the ones LOG_SAMPLE_RATE applies to
+sampled_modules = (
+    "src.entity.estimator",
+    "src.entity.s3_estimator",
+    "src.pipline.prediction_pipeline",
+    "src.cloud_storage.aws_storage",
+)
 
-# configure log file path
+
+# configure log file path (the directory is created by configure_logger)
 log_dir_path = os.path.join(from_root(),log_dir)
-os.makedirs(log_dir_path,exist_ok=True)
 log_file_path = os.path.join(log_dir_path,log_file_naming_format)
 
+# project root, to turn the path of the file a record was logged from into its module name
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# background writer, set by configure_logger when async_logging is on
+listener = None
+
+
+def level_number(name: str) -> int:
+    "'INFO' -> 20"
+    level = logging.getLevelName(name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level {name!r}")
+    return level
+
+
+def parse_module_levels(spec: str) -> dict:
+    "'name=LEVEL,name=LEVEL' -> {name: level number}"
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level_number(level)
+    return levels
+
+
+class ModuleLevelFilter(logging.Filter):
+    """
+    Applies a level per module and samples the INFO/DEBUG lines of the per-request modules.
+
+    The project logs through the root logger (`from src.logger import logging`), so records carry
+    no useful logger name; the module is derived from the file the record was logged from
+    (src/entity/estimator.py -> src.entity.estimator) and matched on the longest configured prefix.
+    """
+
+    def __init__(self, default_level: int, module_levels: dict, sample_rate: float = 1.0,
+                 sampled: tuple = sampled_modules):
+        super().__init__()
+        self.default_level = default_level
+        self.module_levels = module_levels
+        self.sample_rate = sample_rate
+        self.sampled = sampled
+        self._modules = {}      # (logger name, file) -> (level, sampled), resolved once per file
+
+    def _resolve(self, record: logging.LogRecord):
+        module = record.name
+        if module == "root":
+            path = os.path.relpath(os.path.splitext(record.pathname)[0], project_root)
+            module = record.module if path.startswith("..") else path.replace(os.sep, ".")
+        level = self.default_level
+        matches = [name for name in self.module_levels if module == name or module.startswith(name + ".")]
+        if matches:
+            level = self.module_levels[max(matches, key=len)]
+        return level, module.startswith(self.sampled)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.name, record.pathname)
+        resolved = self._modules.get(key)
+        if resolved is None:
+            resolved = self._modules[key] = self._resolve(record)
+        level, sampled = resolved
+        if record.levelno < level:
+            return False
+        if sampled and self.sample_rate < 1 and record.levelno < logging.WARNING:
+            return random.random() < self.sample_rate
+        return True
+
+
+class RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that only does the minimum in the calling thread: merges the message arguments
+    and renders a traceback (both can change after the call returns) and queues the record itself,
+    instead of formatting it and copying it like QueueHandler.prepare does.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 
 def configure_logger():
-    "Logger func with RotatingFileHandler and console handler"
+    """Logger func with RotatingFileHandler and console handler, written by a background thread
+    (QueueHandler -> QueueListener) so request threads only put records on a queue"""
+    global listener
 
     # creating logger object
     logger = logging.getLogger()
-    logger.setLevel(logging.DEBUG)
+    default_level = level_number(log_level)
+    module_levels = parse_module_levels(module_log_levels)
+    # records are only created when some module wants them, the filter drops the rest
+    logger.setLevel(min([default_level] + list(module_levels.values())))
+    for name, level in module_levels.items():
+        if not name.startswith("src"):
+            logging.getLogger(name).setLevel(level)     # third-party loggers (pymongo, botocore, ...)
 
     #define formatter
     format = logging.Formatter("[ %(asctime)s ] %(name)s - %(levelname)s - %(message)s")
 
-    #file handler with rotation 
-    file_handler = RotatingFileHandler(log_file_path,maxBytes=max_log_file_size, backupCount=backup_count)
+    #file handler with rotation, the file is only opened by the first line written
+    os.makedirs(log_dir_path,exist_ok=True)
+    file_handler = RotatingFileHandler(log_file_path,maxBytes=max_log_file_size, backupCount=backup_count, delay=True)
     file_handler.setFormatter(format)
     file_handler.setLevel(logging.DEBUG)
 
@@ -39,9 +145,39 @@ def configure_logger():
     console.setFormatter(format)
     console.setLevel(logging.DEBUG)
 
-    # adding handler into logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console)
+    level_filter = ModuleLevelFilter(default_level, module_levels, log_sample_rate)
+
+    if not async_logging:
+        for handler in (file_handler, console):
+            handler.addFilter(level_filter)
+            logger.addHandler(handler)
+        return
+
+    # the filter runs in the calling thread (cheap), formatting and file / console I/O on the listener thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = RecordQueueHandler(log_queue)
+    queue_handler.addFilter(level_filter)
+    logger.addHandler(queue_handler)
+
+    listener = QueueListener(log_queue, file_handler, console, respect_handler_level=True)
+    listener.start()
+
+    def stop_listener():
+        # flush what is still queued when the process exits
+        if listener is not None:
+            listener.stop()
+
+    def restart_in_child():
+        # a forked child gets the queue handler but not the writer thread, and the parent's queue
+        # may still hold records the parent will write itself: give the child its own queue and listener
+        global listener
+        child_queue = queue.SimpleQueue()
+        queue_handler.queue = child_queue
+        listener = QueueListener(child_queue, file_handler, console, respect_handler_level=True)
+        listener.start()
+
+    atexit.register(stop_listener)
+    os.register_at_fork(after_in_child=restart_in_child)
 
 
 
@@ -56,8 +192,5 @@ for _name in (
     "pymongo.connection",
     "pymongo.pool",
 ):
-    logging.getLogger(_name).setLevel(logging.WARNING)
-
-
-
-
+    if _name not in parse_module_levels(module_log_levels):
+        logging.getLogger(_name).setLevel(logging.WARNING)
@@ -0,0 +1,148 @@
+import io
+import json
+import sys
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.estimator import TargetValueMapping
+from src.entity.s3_estimator import Proj1Estimator
+from src.exception import exceptions
+from src.logger import logging
+from src.metrics import BATCH_SIZE, PREDICTED_ROWS, STAGE_LATENCY
+from src.utils.input_normalization import normalize_vehicle_frame
+
+INPUT_FORMATS = ("csv", "parquet", "ndjson")
+OUTPUT_FORMATS = ("csv", "ndjson")
+
+# Content-Type -> format, used when the format is not given explicitly
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+OUTPUT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def prediction_labels(predictions) -> List[str]:
+    """
+    Maps raw model outputs to Response-Yes / Response-No using TargetValueMapping
+    (anything that is not "yes" is "no").
+    """
+    return np.where(np.asarray(predictions).astype(int) == TargetValueMapping().yes,
+                    "Response-Yes", "Response-No").tolist()
+
+
+class BatchFileScorer:
+    """
+    Scores an uploaded CSV / Parquet / NDJSON file in fixed-size chunks.
+
+    The file is read chunk_rows rows at a time, every chunk is normalized and scored through
+    Proj1Estimator.predict and formatted as CSV / NDJSON text on its own, so the caller can send
+    each chunk back as soon as it is scored and memory stays flat regardless of the file size.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 chunk_rows: Optional[int] = None):
+        """
+        :param prediction_pipeline_config: Configuration of the model to score with
+        :param chunk_rows: Rows per chunk, defaults to prediction_pipeline_config.batch_scoring_chunk_rows
+        """
+        try:
+            self.prediction_pipeline_config = prediction_pipeline_config
+            self.chunk_rows = chunk_rows or prediction_pipeline_config.batch_scoring_chunk_rows
+            self.estimator = Proj1Estimator(bucket_name=prediction_pipeline_config.model_bucket_name,
+                                            model_path=prediction_pipeline_config.model_file_path)
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def resolve_format(requested: Optional[str], content_type: Optional[str]) -> str:
+        """
+        Returns the input format from the explicit format parameter, else from the Content-Type.
+        Raises ValueError when neither names a supported format.
+        """
+        if requested:
+            input_format = requested.lower()
+        else:
+            media_type = (content_type or "").split(";")[0].strip().lower()
+            input_format = CONTENT_TYPE_FORMATS.get(media_type)
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f"Unsupported input format {requested or content_type!r}, "
+                             f"expected one of {', '.join(INPUT_FORMATS)}")
+        return input_format
+
+    def iter_chunks(self, file_obj: io.IOBase, input_format: str) -> Iterator[DataFrame]:
+        """
+        Yields the rows of a seekable binary file as DataFrames of at most chunk_rows rows.
+        """
+        try:
+            if input_format == "csv":
+                yield from pd.read_csv(file_obj, chunksize=self.chunk_rows)
+            elif input_format == "ndjson":
+                yield from pd.read_json(file_obj, lines=True, chunksize=self.chunk_rows)
+            elif input_format == "parquet":
+                try:
+                    import pyarrow.parquet as pq
+                except ImportError as ie:
+                    raise ValueError("Parquet input needs pyarrow to be installed") from ie
+                for record_batch in pq.ParquetFile(file_obj).iter_batches(batch_size=self.chunk_rows):
+                    yield record_batch.to_pandas()
+            else:
+                raise ValueError(f"Unsupported input format {input_format!r}")
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def score_chunk(self, chunk: DataFrame) -> List[str]:
+        """
+        Normalizes one chunk of raw rows and returns a prediction label for every row.
+        """
+        try:
+            with STAGE_LATENCY.time(stage="normalize"):
+                dataframe = normalize_vehicle_frame(chunk)
+            BATCH_SIZE.observe(len(dataframe), source="predict_file")
+            predictions = self.estimator.predict(dataframe=dataframe)
+            with STAGE_LATENCY.time(stage="label_mapping"):
+                labels = prediction_labels(predictions)
+            PREDICTED_ROWS.inc(len(labels), endpoint="/predict_file")
+            return labels
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    @staticmethod
+    def format_chunk(labels: List[str], first_row: int, output_format: str, ids: Optional[pd.Series] = None,
+                     header: bool = False) -> str:
+        """
+        Formats the predictions of one chunk as CSV (row,[id,]prediction) or NDJSON lines.
+        first_row is the position of the chunk's first row in the whole file.
+        """
+        rows = range(first_row, first_row + len(labels))
+        if output_format == "ndjson":
+            if ids is None:
+                return "".join(json.dumps({"row": row, "prediction": label}) + "\n" for row, label in zip(rows, labels))
+            return "".join(json.dumps({"row": row, "id": _id, "prediction": label}) + "\n"
+                           for row, _id, label in zip(rows, ids.tolist(), labels))
+
+        output = DataFrame({"row": rows, "prediction": labels})
+        if ids is not None:
+            output.insert(1, "id", ids.to_numpy())
+        return output.to_csv(index=False, header=header)
+
+    def score_file(self, file_obj: io.IOBase, input_format: str, output_format: str = "csv") -> Iterator[str]:
+        """
+        Blocking generator scoring a whole file: yields the formatted predictions chunk by chunk.
+        """
+        first_row = 0
+        for chunk in self.iter_chunks(file_obj, input_format):
+            yield self.format_chunk(self.score_chunk(chunk), first_row, output_format,
+                                    ids=chunk["id"] if "id" in chunk.columns else None,
+                                    header=first_row == 0)
+            first_row += len(chunk)
+        logging.info(f"Scored {first_row} rows of an uploaded {input_format} file")
@@ -0,0 +1,45 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from src.constants import INFERENCE_MAX_WORKERS
+from src.exception import exceptions
+from src.logger import logging
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool that runs blocking pandas/sklearn/XGBoost inference off the asyncio
+    event loop, so one large batch does not stall every other request.
+
+    Threads (not processes) are used because the model lives in the in-process ModelRegistry,
+    and numpy/XGBoost release the GIL for the heavy parts. Like MongoDBClient the pool is shared
+    by all instances in the process; max_workers only applies to the first instance created.
+    """
+    executor: ThreadPoolExecutor = None
+
+    def __init__(self, max_workers: int = INFERENCE_MAX_WORKERS):
+        try:
+            if InferenceExecutor.executor is None:
+                InferenceExecutor.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                                thread_name_prefix="inference")
+                logging.info(f"Inference executor started with {max_workers} workers")
+            self.executor = InferenceExecutor.executor
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Runs func(*args, **kwargs) on the pool and awaits its result without blocking the loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    @staticmethod
+    def shutdown() -> None:
+        """Waits for queued inference calls and stops the shared pool."""
+        if InferenceExecutor.executor is not None:
+            InferenceExecutor.executor.shutdown(wait=True)
+            InferenceExecutor.executor = None
@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.constants import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+from src.exception import exceptions
+from src.logger import logging
+from src.metrics import BATCH_SIZE
+from src.pipline.inference_executor import InferenceExecutor
+
+
+class MicroBatcher:
+    """
+    Collects concurrent small prediction requests (typically one row from /predict) for up to
+    max_wait_ms or until max_batch_size rows are queued, runs a single vectorized prediction
+    over the stacked rows on the inference pool and hands each caller back its own rows.
+    Rows are either DataFrames (stacked with pd.concat) or lists of records (concatenated).
+
+    One XGBoost/ColumnTransformer call over 64 rows costs about the same as a call over 1 row,
+    so under concurrent load this removes most of the per-request model overhead.
+    """
+
+    def __init__(self, predict_fn: Callable[[Union[DataFrame, list]], np.ndarray], executor: InferenceExecutor,
+                 max_batch_size: int = MICRO_BATCH_MAX_SIZE, max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS):
+        """
+        :param predict_fn: Blocking function mapping a DataFrame / list of records to one prediction per row
+        :param executor: Pool the stacked predictions run on
+        :param max_batch_size: Rows at which a batch is dispatched without waiting any longer
+        :param max_wait_ms: How long the first queued request waits for others to join its batch
+        """
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        # per-batch size metrics
+        self._stats_lock = threading.Lock()
+        self.batch_count = 0
+        self.row_count = 0
+        self.batch_size_counts: Dict[int, int] = {}
+
+    async def predict(self, dataframe: Union[DataFrame, Sequence[dict]]) -> np.ndarray:
+        """
+        Queues the rows of dataframe (or list of records) for the next batch and returns their predictions.
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect_batches())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((dataframe, future))
+        return await future
+
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            items = [first]
+            rows = len(first[0])
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                rows += len(item[0])
+
+            # run the batch concurrently so the next one can be collected meanwhile
+            task = asyncio.create_task(self._run_batch(items))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    @staticmethod
+    def _stack(parts: List[Union[DataFrame, Sequence[dict]]]) -> Union[DataFrame, list]:
+        if all(isinstance(part, DataFrame) for part in parts):
+            return pd.concat(parts, ignore_index=True)
+        return [row for part in parts for row in part]
+
+    async def _run_batch(self, items: List[Tuple[Union[DataFrame, Sequence[dict]], asyncio.Future]]) -> None:
+        try:
+            batch = self._stack([dataframe for dataframe, _ in items])
+            self._record(len(batch))
+            predictions = await self.executor.run(self.predict_fn, batch)
+        except Exception as e:
+            if len(items) == 1:
+                if not items[0][1].done():
+                    items[0][1].set_exception(e)
+                return
+            # one bad request (e.g. a non numeric form field) must not fail the others it was
+            # stacked with: run them one at a time so only the faulty ones get the exception
+            logging.error(f"Micro-batch of {len(items)} requests failed, retrying them one by one: {e}")
+            await asyncio.gather(*(self._run_one(dataframe, future) for dataframe, future in items))
+            return
+
+        offset = 0
+        for dataframe, future in items:
+            if not future.done():   # the caller may have been cancelled (client went away)
+                future.set_result(predictions[offset:offset + len(dataframe)])
+            offset += len(dataframe)
+
+    async def _run_one(self, dataframe: Union[DataFrame, Sequence[dict]], future: asyncio.Future) -> None:
+        if future.done():
+            return
+        try:
+            predictions = await self.executor.run(self.predict_fn, dataframe)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(predictions)
+
+    def _record(self, batch_size: int) -> None:
+        with self._stats_lock:
+            self.batch_count += 1
+            self.row_count += batch_size
+            self.batch_size_counts[batch_size] = self.batch_size_counts.get(batch_size, 0) + 1
+        BATCH_SIZE.observe(batch_size, source="micro_batch")
+        logging.debug(f"Dispatching micro-batch of {batch_size} rows")
+
+    def stats(self) -> dict:
+        """
+        Returns the batching settings and per-batch size metrics collected so far.
+        """
+        try:
+            with self._stats_lock:
+                return {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait_ms,
+                    "batches": self.batch_count,
+                    "rows": self.row_count,
+                    "mean_batch_size": self.row_count / self.batch_count if self.batch_count else 0.0,
+                    "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+                }
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    async def stop(self) -> None:
+        """Stops collecting new batches and waits for the batches already dispatched."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
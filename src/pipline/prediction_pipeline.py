@@ -1,8 +1,12 @@
 import sys
+from typing import List
+import numpy as np
 from src.entity.config_entity import VehiclePredictorConfig
 from src.entity.s3_estimator import Proj1Estimator
 from src.exception import exceptions
 from src.logger import logging
+from src.metrics import STAGE_LATENCY
+from src.utils.input_normalization import GENDER_CODES
 import pandas as pd
 from pandas import DataFrame
 
@@ -53,7 +57,7 @@ class VehicleData:
             # Apply the same lightweight custom transformations used during training
             # 1) Map Gender to binary if given as strings
             if 'Gender' in df.columns and df['Gender'].dtype == object:
-                df['Gender'] = df['Gender'].map({'Female': 0, 'Male': 1})
+                df['Gender'] = df['Gender'].map(GENDER_CODES)
 
             # 2) Drop identifier columns if present
             for col in ['id', '_id']:
@@ -82,6 +86,12 @@ class VehicleData:
             raise exceptions(e, sys) from e
 
 
+    def get_vehicle_input_record(self) -> dict:
+        """
+        This function returns a flat {column: value} record for the pandas-free FeatureEncoder path
+        """
+        return {column: values[0] for column, values in self.get_vehicle_data_as_dict().items()}
+
     def get_vehicle_data_as_dict(self):
         """
         This function returns a dictionary from VehicleData class input
@@ -135,5 +145,29 @@ class VehicleDataClassifier:
             
             return result
         
+        except Exception as e:
+            raise exceptions(e, sys)
+
+    def predict_records(self, records: List[dict]) -> np.ndarray:
+        """
+        This is the method of VehicleDataClassifier for small requests
+        Encodes flat records straight into model features with the compiled FeatureEncoder
+        (no DataFrame), falling back to the DataFrame path if the preprocessor can't be compiled.
+        Returns: Prediction for every record
+        """
+        try:
+            model = Proj1Estimator(
+                bucket_name=self.prediction_pipeline_config.model_bucket_name,
+                model_path=self.prediction_pipeline_config.model_file_path,
+            ).get_model()
+            encoder = model.get_feature_encoder()
+            if encoder is None:
+                dataframe = pd.concat([VehicleData(**record).get_vehicle_input_data_frame() for record in records],
+                                      ignore_index=True)
+                return model.predict(dataframe)
+            with STAGE_LATENCY.time(stage="preprocessing"):
+                features = encoder.encode_many(records)
+            return model.predict_features(features)
+
         except Exception as e:
             raise exceptions(e, sys)
\ No newline at end of file
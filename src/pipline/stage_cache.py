@@ -0,0 +1,131 @@
+import dataclasses
+import hashlib
+import inspect
+import json
+import os
+import sys
+import typing
+from importlib import metadata
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.exception import exceptions
+from src.logger import logging
+
+
+def file_sha256(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """sha256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for block in iter(lambda: file_obj.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_values(config: object) -> Dict[str, object]:
+    """
+    Every setting of a config dataclass: its fields and the plain class attributes some configs
+    keep next to them (e.g. XGB_config hyperparameters, ModelTrainerConfig._n_estimators).
+    """
+    values = {name: value for klass in reversed(type(config).__mro__[:-1]) for name, value in vars(klass).items()
+              if not name.startswith("__") and not callable(value) and not isinstance(value, (staticmethod, classmethod, property))}
+    if dataclasses.is_dataclass(config):
+        values.update({field.name: getattr(config, field.name) for field in dataclasses.fields(config)})
+    return {name: repr(value) for name, value in sorted(values.items())}
+
+
+def artifact_from_dict(artifact_type: type, values: dict) -> object:
+    """Rebuilds a (possibly nested) artifact dataclass from dataclasses.asdict output."""
+    hints = typing.get_type_hints(artifact_type)
+    kwargs = {}
+    for field in dataclasses.fields(artifact_type):
+        value = values[field.name]
+        if dataclasses.is_dataclass(hints.get(field.name)) and isinstance(value, dict):
+            value = artifact_from_dict(hints[field.name], value)
+        kwargs[field.name] = value
+    return artifact_type(**kwargs)
+
+
+class StageCache:
+    """
+    Skips a pipeline stage when nothing it depends on changed since its last successful run.
+
+    The fingerprint of a stage hashes its input files, the settings of its config dataclasses, the
+    source of the modules that implement it and the versions of the libraries it uses. After a
+    successful run the fingerprint, the artifact and the hashes of its output files are written to
+    <cache_dir>/<stage>.json. The next run with the same fingerprint returns that artifact without
+    running the stage, as long as the output files are still there unchanged (the artifacts live
+    at fixed paths under Artifacts/). force runs every stage and refreshes the cache entries.
+    """
+
+    def __init__(self, cache_dir: str, force: bool = False):
+        """
+        :param cache_dir: Directory of the <stage>.json cache entries
+        :param force: Run every stage even if its fingerprint matches
+        """
+        self.cache_dir = cache_dir
+        self.force = force
+
+    @staticmethod
+    def fingerprint(input_files: Sequence[str], configs: Sequence[object] = (), code: Sequence[object] = (),
+                    libraries: Sequence[str] = ()) -> str:
+        """
+        :param input_files: Files the stage reads
+        :param configs: Config dataclass instances of the stage
+        :param code: Classes / modules implementing the stage, their source files are hashed
+        :param libraries: Distributions whose version matters to the stage's output (scikit-learn, xgboost)
+        """
+        state = {
+            "inputs": {file_path: file_sha256(file_path) for file_path in input_files},
+            "configs": [[type(config).__name__, config_values(config)] for config in configs],
+            "code": {inspect.getsourcefile(obj): file_sha256(inspect.getsourcefile(obj)) for obj in code},
+            "libraries": {name: metadata.version(name) for name in libraries},
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+    def entry_path(self, stage: str) -> str:
+        return os.path.join(self.cache_dir, f"{stage}.json")
+
+    def load(self, stage: str, fingerprint: str, artifact_type: type) -> Optional[object]:
+        """The cached artifact of stage if its fingerprint and output files match, else None."""
+        entry_path = self.entry_path(stage)
+        if self.force or not os.path.exists(entry_path):
+            return None
+        with open(entry_path) as file_obj:
+            entry = json.load(file_obj)
+        if entry.get("fingerprint") != fingerprint:
+            return None
+        for file_path, checksum in entry["outputs"].items():
+            if not os.path.exists(file_path) or file_sha256(file_path) != checksum:
+                logging.info(f"Output {file_path} of the cached {stage} stage changed, running it again")
+                return None
+        return artifact_from_dict(artifact_type, entry["artifact"])
+
+    def save(self, stage: str, fingerprint: str, artifact: object, output_files: Sequence[str]) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {"fingerprint": fingerprint, "artifact": dataclasses.asdict(artifact),
+                 "outputs": {file_path: file_sha256(file_path) for file_path in output_files}}
+        # written to a temporary file and renamed, an interrupted run leaves no half written entry
+        temp_path = self.entry_path(stage) + ".tmp"
+        with open(temp_path, "w") as file_obj:
+            json.dump(entry, file_obj, indent=2, default=float)
+        os.replace(temp_path, self.entry_path(stage))
+
+    def run(self, stage: str, func: Callable[[], object], artifact_type: type,
+            output_files: Callable[[object], List[str]], input_files: Sequence[str],
+            configs: Sequence[object] = (), code: Sequence[object] = (), libraries: Sequence[str] = ()) -> object:
+        """
+        Returns the cached artifact of stage when its fingerprint matches, else runs func and caches its artifact.
+
+        :param output_files: Returns the files the artifact points to, checked before reusing it
+        """
+        try:
+            fingerprint = self.fingerprint(input_files, configs, code, libraries)
+            artifact = self.load(stage, fingerprint, artifact_type)
+            if artifact is not None:
+                logging.info(f"Inputs, config and code of the {stage} stage unchanged, reusing its artifact: {artifact}")
+                return artifact
+            artifact = func()
+            self.save(stage, fingerprint, artifact, output_files(artifact))
+            return artifact
+        except Exception as e:
+            raise exceptions(e, sys) from e
@@ -0,0 +1,207 @@
+import dataclasses
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from src.exception import exceptions
+from src.logger import logging
+from src.pipline.stage_cache import artifact_from_dict
+from src.utils.profiling import profile_step
+
+
+@dataclass
+class Stage:
+    """
+    One step of the pipeline DAG.
+
+    func is called with the artifacts of the stages it depends on as keyword arguments, e.g.
+    inputs={"data_ingestion_artifact": "data_ingestion"} calls
+    func(data_ingestion_artifact=<artifact returned by the data_ingestion stage>).
+    """
+    name: str
+    func: Callable[..., object]
+    inputs: Dict[str, str] = field(default_factory=dict)     # func argument -> stage name
+    resumable: bool = True      # a resumed run may reuse the artifact this stage returned in the failed run
+
+
+@dataclass
+class StageRecord:
+    status: str = "pending"     # pending, submitted, running, succeeded, failed, resumed, not_needed, not_run
+    started: Optional[float] = None     # seconds since the start of the run
+    finished: Optional[float] = None
+    artifact: Optional[dict] = None
+    artifact_type: Optional[str] = None
+    error: Optional[str] = None
+
+
+class StageExecutor:
+    """
+    Runs the stages of a DAG as soon as the stages they depend on succeeded, up to max_workers at a
+    time, so independent work overlaps (e.g. downloading the production model while training).
+
+    The state of the run (status, timing and artifact of every stage) is written to
+    run_record_path after each stage. When a run fails, the stages that were still running are
+    waited for, nothing new is started and the record is kept: a later run with resume=True
+    reuses the artifacts of the stages that succeeded in it and only runs the others.
+    """
+
+    def __init__(self, stages: List[Stage], run_record_path: str, max_workers: int, resume: bool = False):
+        """
+        :param stages: Stages of the DAG, in any order
+        :param run_record_path: JSON file holding the state of the last run
+        :param max_workers: Stages running at the same time
+        :param resume: Reuse the artifacts of the stages that succeeded in the last run if it failed
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.run_record_path = run_record_path
+        self.max_workers = max_workers
+        self.resume = resume
+        self.records: Dict[str, StageRecord] = {name: StageRecord() for name in self.stages}
+        self._lock = threading.Lock()
+        self._check_dag()
+
+    def _check_dag(self) -> None:
+        for stage in self.stages.values():
+            unknown = set(stage.inputs.values()) - set(self.stages)
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages {sorted(unknown)}")
+        # Kahn's algorithm, what can't be ordered is part of a cycle
+        remaining = {name: set(stage.inputs.values()) for name, stage in self.stages.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies & set(remaining)]
+            if not ready:
+                raise ValueError(f"Stages {sorted(remaining)} depend on each other")
+            for name in ready:
+                del remaining[name]
+
+    def _restore(self) -> Dict[str, object]:
+        """Artifacts of the resumable stages that succeeded in the last run, if that run failed."""
+        if not self.resume or not os.path.exists(self.run_record_path):
+            return {}
+        with open(self.run_record_path) as file_obj:
+            last_run = json.load(file_obj)
+        if last_run.get("status") != "failed":
+            logging.info("Last pipeline run did not fail, nothing to resume")
+            return {}
+        artifacts = {}
+        for name, record in last_run["stages"].items():
+            stage = self.stages.get(name)
+            if stage is None or not stage.resumable or record["status"] not in ("succeeded", "resumed"):
+                continue
+            artifact = None
+            if record["artifact_type"] is not None:
+                module_name, _, type_name = record["artifact_type"].rpartition(".")
+                artifact = artifact_from_dict(getattr(importlib.import_module(module_name), type_name), record["artifact"])
+            artifacts[name] = artifact
+            self.records[name] = StageRecord(status="resumed", artifact=record["artifact"],
+                                             artifact_type=record["artifact_type"])
+        logging.info(f"Resuming the failed pipeline run {last_run.get('run_id')}, reusing {sorted(artifacts)}")
+
+        # stages (not resumable ones) whose dependent stages were all restored have nothing to feed
+        dependents = {name: [other.name for other in self.stages.values() if name in other.inputs.values()]
+                      for name in self.stages}
+        needed: Dict[str, bool] = {}
+
+        def is_needed(name: str) -> bool:
+            if name not in needed:
+                needed[name] = name not in artifacts and \
+                    (not dependents[name] or any(is_needed(dependent) for dependent in dependents[name]))
+            return needed[name]
+
+        for name in self.stages:
+            if name not in artifacts and not is_needed(name):
+                self.records[name].status = "not_needed"
+        return artifacts
+
+    def _write_record(self, run_id: str, status: str) -> None:
+        with self._lock:
+            record = {"run_id": run_id, "status": status,
+                      "stages": {name: dataclasses.asdict(stage_record) for name, stage_record in self.records.items()}}
+        os.makedirs(os.path.dirname(self.run_record_path), exist_ok=True)
+        temp_path = self.run_record_path + ".tmp"
+        with open(temp_path, "w") as file_obj:
+            json.dump(record, file_obj, indent=2, default=float)
+        os.replace(temp_path, self.run_record_path)
+
+    def _run_stage(self, stage: Stage, artifacts: Dict[str, object], start: float) -> object:
+        with self._lock:
+            self.records[stage.name].status = "running"
+            self.records[stage.name].started = time.perf_counter() - start
+        logging.info(f"Pipeline stage {stage.name} started")
+        with profile_step(stage.name, cprofile=True):
+            return stage.func(**{argument: artifacts[name] for argument, name in stage.inputs.items()})
+
+    def timeline(self) -> str:
+        """Start, duration and status of every stage of the run, with a bar per stage."""
+        ends = [record.finished for record in self.records.values() if record.finished is not None]
+        total = max(ends, default=0.0) or 1.0
+        width = 40
+        lines = [f"{'stage':<24} {'start':>8} {'duration':>9}  {'status':<10}"]
+        for name, record in sorted(self.records.items(), key=lambda item: (item[1].started is None, item[1].started or 0)):
+            if record.started is None:
+                lines.append(f"{name:<24} {'':>8} {'':>9}  {record.status:<10}")
+                continue
+            finished = record.finished if record.finished is not None else record.started
+            offset = int(record.started / total * width)
+            bar = " " * offset + "#" * max(1, int((finished - record.started) / total * width))
+            lines.append(f"{name:<24} {record.started:>7.2f}s {finished - record.started:>8.2f}s  {record.status:<10} |{bar:<{width}}|")
+        return "\n".join(lines)
+
+    def run(self, run_id: str) -> Dict[str, object]:
+        """
+        Runs the DAG and returns the artifact of every stage. Raises the error of the first failed stage.
+        """
+        start = time.perf_counter()
+        artifacts = self._restore()
+        failure: Optional[Exception] = None
+        running: Dict[Future, Stage] = {}
+        self._write_record(run_id, "running")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline-stage") as pool:
+            while True:
+                if failure is None:
+                    for stage in self.stages.values():
+                        if self.records[stage.name].status == "pending" and \
+                                all(name in artifacts for name in stage.inputs.values()):
+                            self.records[stage.name].status = "submitted"
+                            running[pool.submit(self._run_stage, stage, artifacts, start)] = stage
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    record = self.records[stage.name]
+                    with self._lock:
+                        record.finished = time.perf_counter() - start
+                        if future.exception() is None:
+                            artifact = future.result()
+                            artifacts[stage.name] = artifact
+                            record.status = "succeeded"
+                            if dataclasses.is_dataclass(artifact):
+                                record.artifact = dataclasses.asdict(artifact)
+                                record.artifact_type = f"{type(artifact).__module__}.{type(artifact).__qualname__}"
+                        else:
+                            record.status = "failed"
+                            record.error = str(future.exception())
+                            failure = failure or future.exception()
+                    logging.info(f"Pipeline stage {stage.name} {record.status} in {record.finished - record.started:.2f}s")
+                    self._write_record(run_id, "running")
+
+        for record in self.records.values():
+            if record.status in ("pending", "submitted"):
+                record.status = "not_run"
+        self._write_record(run_id, "failed" if failure is not None else "succeeded")
+        logging.info(f"Pipeline run {run_id} timeline:\n{self.timeline()}")
+        if failure is not None:
+            try:
+                # re-raised here so exceptions() reports the traceback of the failed stage
+                raise failure
+            except Exception as e:
+                raise exceptions(e, sys) from e
+        return artifacts
@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from src.constants import TRAINING_JOBS_KEEP_FINISHED
+from src.exception import exceptions
+from src.logger import logging
+
+
+def run_training_pipeline() -> None:
+    """
+    Entry point executed in the training worker process.
+    """
+    # imported here so the serving process never pays for the training stack
+    from src.pipline.training_pipeline import TrainPipeline
+    try:
+        TrainPipeline().run_pipeline()
+    except Exception as e:
+        # our exceptions class can't be unpickled in the parent, send a plain error back
+        raise RuntimeError(str(e)) from None
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    submitted_at: float
+    future: Future = field(repr=False)
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if not self.future.done():
+            return "running" if self.future.running() else "queued"
+        return "failed" if self.future.exception() is not None else "succeeded"
+
+    def to_dict(self) -> dict:
+        error = self.future.exception() if self.future.done() else None
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "error": str(error) if error is not None else None,
+        }
+
+
+class TrainingJobRunner:
+    """
+    Runs TrainPipeline in a separate worker process, one job at a time, and keeps the status of
+    the submitted jobs so the API can return a job id immediately and be polled for the result.
+    Only the last keep_finished finished jobs are kept, older ones are forgotten (404 when polled).
+
+    A separate process keeps the CPU-heavy training (SMOTEENN, XGBoost fit) from competing for the
+    GIL with request handling. A new model pushed by the job reaches the serving process through
+    the ModelRefresher.
+    """
+
+    def __init__(self, keep_finished: int = TRAINING_JOBS_KEEP_FINISHED):
+        """
+        :param keep_finished: Finished jobs whose status is kept for polling
+        """
+        self._executor = None   # created by the first submit, multiprocessing is not needed to serve
+        self.keep_finished = keep_finished
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # a fresh interpreter per job: nothing cached by a previous run (production model in the
+            # ModelRegistry, import time timestamps of the config) leaks into the next one
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                                 max_tasks_per_child=1)
+        return self._executor
+
+    def _submit_run(self) -> Future:
+        "Submits a run, replacing the pool once if its worker died (OOM, crash in a native library)"
+        from concurrent.futures.process import BrokenProcessPool
+        try:
+            return self._get_executor().submit(run_training_pipeline)
+        except BrokenProcessPool:
+            logging.warning("Training worker pool is broken, starting a new one")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            return self._get_executor().submit(run_training_pipeline)
+
+    def submit(self) -> TrainingJob:
+        """
+        Queues a training run and returns its job. While a run is queued or running the existing
+        job is returned instead of stacking up another one.
+        """
+        try:
+            with self._lock:
+                for job in self._jobs.values():
+                    if not job.future.done():
+                        logging.info(f"Training job {job.job_id} already {job.status}, not submitting another")
+                        return job
+
+                job = TrainingJob(job_id=uuid.uuid4().hex, submitted_at=time.time(),
+                                  future=self._submit_run())
+                job.future.add_done_callback(lambda _, job=job: self._on_done(job))
+                self._prune()
+                self._jobs[job.job_id] = job
+                logging.info(f"Submitted training job {job.job_id}")
+                return job
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
+    def _prune(self) -> None:
+        "Forgets the oldest finished jobs beyond keep_finished (called with the lock held)"
+        finished = sorted((job for job in self._jobs.values() if job.future.done()),
+                          key=lambda job: job.finished_at or job.submitted_at)
+        for job in finished[:max(len(finished) - self.keep_finished, 0)]:
+            del self._jobs[job.job_id]
+
+    @staticmethod
+    def _on_done(job: TrainingJob) -> None:
+        job.finished_at = time.time()
+        error = job.future.exception()
+        if error is not None:
+            logging.error(f"Training job {job.job_id} failed: {error}")
+        else:
+            logging.info(f"Training job {job.job_id} finished in {job.finished_at - job.submitted_at:.1f}s")
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        """Returns the job with the given id, or None if it is unknown."""
+        return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        """Stops accepting jobs; a running job is left to finish in its worker process."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
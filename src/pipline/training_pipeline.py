@@ -1,4 +1,7 @@
+import os
 import sys
+from typing import Optional
+
 from src.exception import exceptions
 from src.logger import logging
 
@@ -9,7 +12,18 @@ from src.components.model_trainer import ModelTrainer
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
 
-from src.entity.config_entity import (Data_Ingestion_config,
+from src.constants import SCHEMA_FILE_PATH
+from src.entity import model_bundle
+from src.entity.estimator import MyModel
+from src.entity.feature_encoder import FeatureEncoder
+from src.entity.tree_evaluator import TreeEnsembleEvaluator
+from src.entity.s3_estimator import Proj1Estimator
+from src.pipline.stage_cache import StageCache
+from src.pipline.stage_executor import Stage, StageExecutor
+from src.utils import main_utils
+from src.utils.profiling import PipelineProfiler
+from src.entity.config_entity import (training_pipeline_config,
+                                          Data_Ingestion_config,
                                           DataValidationConfig,
                                           DataTransformationConfig,
                                           ModelTrainerConfig,
@@ -28,7 +42,15 @@ from src.entity.artifact_entity import (Data_Ingestion_artifact,
 
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, force: bool = False, resume: bool = False):
+        """
+        :param force: Run every stage even when its inputs, config and code are unchanged since its
+            last run (see StageCache)
+        :param resume: If the last run failed, reuse the artifacts of the stages that succeeded in it
+            (see StageExecutor)
+        """
+        self.resume = resume
+        self.stage_cache = StageCache(cache_dir=training_pipeline_config.stage_cache_dir, force=force)
         self.data_ingestion_config = Data_Ingestion_config()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
@@ -65,7 +87,11 @@ class TrainPipeline:
                                                 data_validation_config=self.data_validation_config
                                                 )
 
-            data_validation_artifact = data_validation.initiate_data_validation()
+            data_validation_artifact = self.stage_cache.run(
+                "data_validation", data_validation.initiate_data_validation, DataValidationArtifact,
+                output_files=lambda artifact: [artifact.validation_report_file_path],
+                input_files=[data_ingestion_artifact.training_file_path, data_ingestion_artifact.test_file_path, SCHEMA_FILE_PATH],
+                configs=[self.data_validation_config], code=[DataValidation, main_utils], libraries=["pandas", "pyarrow"])
 
             logging.info("Performed the data validation operation")
             logging.info("Exited the start_data_validation method of TrainPipeline class")
@@ -82,7 +108,14 @@ class TrainPipeline:
             data_transformation = DataTransformation(data_ingestion_artifact=data_ingestion_artifact,
                                                      data_transformation_config=self.data_transformation_config,
                                                      data_validation_artifact=data_validation_artifact)
-            data_transformation_artifact = data_transformation.initiate_data_transformation()
+            data_transformation_artifact = self.stage_cache.run(
+                "data_transformation", data_transformation.initiate_data_transformation, DataTransformationArtifact,
+                output_files=lambda artifact: [artifact.transformed_object_file_path, artifact.transformed_train_file_path,
+                                               artifact.transformed_test_file_path],
+                input_files=[data_ingestion_artifact.training_file_path, data_ingestion_artifact.test_file_path, SCHEMA_FILE_PATH,
+                             data_validation_artifact.validation_report_file_path],
+                configs=[self.data_transformation_config], code=[DataTransformation, main_utils],
+                libraries=["pandas", "pyarrow", "numpy", "scikit-learn", "imbalanced-learn"])
             return data_transformation_artifact
         except Exception as e:
             raise exceptions(e, sys)
@@ -95,16 +128,60 @@ class TrainPipeline:
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
                                          model_trainer_config=self.model_trainer_config
                                          )
-            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            model_trainer_artifact = self.stage_cache.run(
+                "model_trainer", model_trainer.initiate_model_trainer, ModelTrainerArtifact,
+                output_files=lambda artifact: [artifact.trained_model_file_path],
+                input_files=[data_transformation_artifact.transformed_object_file_path,
+                             data_transformation_artifact.transformed_train_file_path,
+                             data_transformation_artifact.transformed_test_file_path],
+                configs=[self.model_trainer_config], code=[ModelTrainer, MyModel, model_bundle, FeatureEncoder, TreeEnsembleEvaluator],
+                libraries=["numpy", "scikit-learn", "xgboost"])
             return model_trainer_artifact
 
         except Exception as e:
             raise exceptions(e, sys)
 
+    def start_data_ingestion_artifact(self) -> Data_Ingestion_artifact:
+        """
+        Artifact of the ingested train/test files, without running data ingestion. Falls back to the
+        train.csv / test.csv of runs from before ingestion wrote Parquet when there is no Parquet file.
+        """
+        # data_ingestion_artifact = self.start_data_ingestion()   # i dont wantt to run data validation everytime i run this pipeline thats why below code for data_ingestion_artifact works
+        def ingested_file(file_path: str) -> str:
+            csv_path = os.path.splitext(file_path)[0] + ".csv"
+            if not os.path.exists(file_path) and os.path.exists(csv_path):
+                logging.info(f"No {file_path}, using {csv_path} of an older data ingestion run")
+                return csv_path
+            return file_path
+
+        return Data_Ingestion_artifact(
+            training_file_path=ingested_file(self.data_ingestion_config.training_file_path),
+            test_file_path=ingested_file(self.data_ingestion_config.testing_file_path)
+        )
+
+    def prefetch_production_model(self) -> bool:
+        """
+        Downloads the production model from s3 into the ModelRegistry, while the data is transformed
+        and the new model trained, so model evaluation finds it loaded. Returns whether there is one.
+        """
+        try:
+            proj1_estimator = Proj1Estimator(bucket_name=self.model_evaluation_config.bucket_name,
+                                             model_path=self.model_evaluation_config.s3_model_key_path)
+            if not proj1_estimator.is_model_present(model_path=self.model_evaluation_config.s3_model_key_path):
+                logging.info("No production model in s3 to prefetch")
+                return False
+            proj1_estimator.get_model()
+            logging.info("Production model prefetched")
+            return True
+        except Exception as e:
+            raise exceptions(e, sys) from e
+
     def start_model_evaluation(self, data_ingestion_artifact: Data_Ingestion_artifact,
-                               model_trainer_artifact: ModelTrainerArtifact) -> ModelEvaluationArtifact:
+                               model_trainer_artifact: ModelTrainerArtifact,
+                               production_model_present: bool = False) -> ModelEvaluationArtifact:
         """
         This method of TrainPipeline class is responsible for starting modle evaluation
+        (production_model_present only orders it after prefetch_production_model)
         """
         try:
             model_evaluation = ModelEvaluation(model_eval_config=self.model_evaluation_config,
@@ -130,29 +207,48 @@ class TrainPipeline:
 
     
 
+    def start_model_pusher_if_accepted(self, model_evaluation_artifact: ModelEvaluationArtifact) -> Optional[ModelPusherArtifact]:
+        """
+        if current modele is better than previous one in artifact then it will push the model into s3 else no
+        """
+        if not model_evaluation_artifact.is_model_accepted:
+            logging.info(f"Model not accepted.")
+            return None
+        return self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+
     def run_pipeline(self) -> None:
         """
         This method of TrainPipeline class is responsible for running complete pipeline
+
+        The stages run as a DAG: the production model is downloaded while the data is transformed and
+        the new model trained, every other stage waits for the artifacts it needs.
         """
         try:
-            # data_ingestion_artifact = self.start_data_ingestion()   # i dont wantt to run data validation everytime i run this pipeline thats why below code for data_ingestion_artifact works
-            data_ingestion_artifact = Data_Ingestion_artifact(
-                training_file_path=self.data_ingestion_config.training_file_path,
-                test_file_path=self.data_ingestion_config.testing_file_path
-            )
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-            data_transformation_artifact = self.start_data_transformation(
-                data_ingestion_artifact=data_ingestion_artifact, data_validation_artifact=data_validation_artifact)
-            model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-            model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                    model_trainer_artifact=model_trainer_artifact)
-            
-            ## logic --> if current modele is better than previous one in artifact then it will push the
-            #   model into s3 else no
-            if not model_evaluation_artifact.is_model_accepted:
-                logging.info(f"Model not accepted.")
-                return None
-            model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
-            
+            stages = [
+                Stage("data_ingestion", self.start_data_ingestion_artifact),
+                Stage("data_validation", self.start_data_validation,
+                      inputs={"data_ingestion_artifact": "data_ingestion"}),
+                Stage("data_transformation", self.start_data_transformation,
+                      inputs={"data_ingestion_artifact": "data_ingestion", "data_validation_artifact": "data_validation"}),
+                Stage("model_trainer", self.start_model_trainer,
+                      inputs={"data_transformation_artifact": "data_transformation"}),
+                # the model is loaded into this process, a resumed run has to download it again
+                Stage("production_model", self.prefetch_production_model, resumable=False),
+                Stage("model_evaluation", self.start_model_evaluation,
+                      inputs={"data_ingestion_artifact": "data_ingestion", "model_trainer_artifact": "model_trainer",
+                              "production_model_present": "production_model"}),
+                Stage("model_pusher", self.start_model_pusher_if_accepted,
+                      inputs={"model_evaluation_artifact": "model_evaluation"}),
+            ]
+            profiler = PipelineProfiler(
+                run_id=training_pipeline_config.timestamp, report_path=training_pipeline_config.profile_report_path,
+                trace_memory=training_pipeline_config.profile_trace_memory,
+                cprofile_dir=training_pipeline_config.profile_cprofile_dir if training_pipeline_config.profile_cprofile else None,
+                sample_seconds=training_pipeline_config.profile_sample_seconds)
+            with profiler:
+                StageExecutor(stages, run_record_path=training_pipeline_config.run_record_path,
+                              max_workers=training_pipeline_config.max_workers,
+                              resume=self.resume).run(run_id=training_pipeline_config.timestamp)
+
         except Exception as e:
-            raise exceptions(e, sys)
\ No newline at end of file
+            raise exceptions(e, sys) from e
@@ -0,0 +1,133 @@
+"""
+Vectorized normalization of raw vehicle inputs (pasted spreadsheets, batch JSON rows) into the
+columns the model expects. Shared by /predict_batch and the form prediction path.
+
+Categorical columns have only a handful of distinct values, so instead of parsing every row
+each column is factorized once and the (few) unique values are parsed into a lookup table
+that is then indexed with the integer codes.
+"""
+
+import sys
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from src.exception import exceptions
+
+# lookup tables shared by the batch and form endpoints
+GENDER_CODES: Dict[str, int] = {"Female": 0, "Male": 1}
+VEHICLE_DAMAGE_CODES: Dict[str, int] = {"yes": 1, "no": 0}
+
+NUMERIC_INPUT_COLUMNS: List[str] = ["Age", "Driving_License", "Region_Code", "Previously_Insured",
+                                    "Annual_Premium", "Policy_Sales_Channel", "Vintage"]
+
+MODEL_INPUT_COLUMNS: List[str] = [
+    "Gender", "Age", "Driving_License", "Region_Code",
+    "Previously_Insured", "Annual_Premium", "Policy_Sales_Channel",
+    "Vintage", "Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years",
+    "Vehicle_Damage_Yes"
+]
+
+
+def parse_vehicle_age(value) -> Tuple[int, int]:
+    """
+    Parses one Vehicle_Age value ("< 1 Year", "1-2 Year", "> 2 Years", ...) into the
+    (Vehicle_Age_lt_1_Year, Vehicle_Age_gt_2_Years) dummy pair.
+    """
+    if pd.isna(value):
+        return 0, 0
+    s = str(value).lower()
+    if '<' in s or 'lt' in s or 'less' in s:
+        return 1, 0
+    if '>' in s or 'gt' in s or 'greater' in s:
+        return 0, 1
+    # "1-2 Year" and anything unrecognised
+    return 0, 0
+
+
+def lookup_column(series: pd.Series, parse: Callable[[object], object], missing: object, dtype) -> np.ndarray:
+    """
+    Applies parse to every distinct non-null value of series and broadcasts the results back
+    to all rows through the factorized codes. Null values get missing.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    # one extra slot at the end so the -1 sentinel of null values picks up missing
+    table = np.array([parse(value) for value in uniques] + [missing], dtype=dtype)
+    return table[codes]
+
+
+def coerce_numeric(series: pd.Series) -> np.ndarray:
+    """
+    pd.to_numeric(series, errors='coerce').fillna(0) for one column. Text columns (e.g. Age
+    pasted as text) usually hold few distinct values, so only their uniques are parsed.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.fillna(0).to_numpy()
+    if isinstance(series.dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if len(uniques) * 4 <= len(series):
+            table = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').fillna(0).to_numpy()
+            return np.append(table, 0)[codes]
+    return pd.to_numeric(series, errors='coerce').fillna(0).to_numpy()
+
+
+def normalize_column_names(columns: pd.Index) -> pd.Index:
+    """Strips names, replaces spaces with underscores and removes special characters."""
+    return columns.str.strip().str.replace(' ', '_').str.replace(r'[^0-9A-Za-z_]', '', regex=True)
+
+
+def _gender_code(value) -> int:
+    # only strings are mapped, anything else (or an unknown label) becomes 0
+    return GENDER_CODES.get(value.strip(), 0) if isinstance(value, str) else 0
+
+
+def _vehicle_damage_code(value) -> float:
+    return VEHICLE_DAMAGE_CODES.get(str(value).lower(), np.nan)
+
+
+def normalize_vehicle_frame(df: DataFrame) -> DataFrame:
+    """
+    Converts a raw batch (as pasted or sent to /predict_batch) into a DataFrame with exactly
+    MODEL_INPUT_COLUMNS:
+    - Vehicle_Age strings become the Vehicle_Age_lt_1_Year / Vehicle_Age_gt_2_Years dummies
+    - Vehicle_Damage yes/no becomes Vehicle_Damage_Yes (NaN when unrecognised)
+    - Gender Female/Male becomes 0/1 (0 when unrecognised)
+    - numeric columns are coerced, unparsable values become 0
+    - missing columns are added with 0, identifier and other extra columns are dropped
+    """
+    try:
+        df = df.set_axis(normalize_column_names(df.columns), axis=1)
+        n_rows = len(df)
+        columns: Dict[str, object] = {}
+
+        if 'Gender' in df.columns:
+            gender = df['Gender']
+            if pd.api.types.is_numeric_dtype(gender):
+                columns['Gender'] = gender.to_numpy()
+            else:
+                columns['Gender'] = lookup_column(gender, _gender_code, 0, np.int64)
+
+        for column in NUMERIC_INPUT_COLUMNS:
+            if column in df.columns:
+                columns[column] = coerce_numeric(df[column])
+
+        for column in ['Vehicle_Age_lt_1_Year', 'Vehicle_Age_gt_2_Years', 'Vehicle_Damage_Yes']:
+            if column in df.columns:
+                columns[column] = df[column].to_numpy()
+
+        if 'Vehicle_Age' in df.columns:
+            vehicle_age = lookup_column(df['Vehicle_Age'], parse_vehicle_age, (0, 0), np.int64)
+            columns['Vehicle_Age_lt_1_Year'] = vehicle_age[:, 0]
+            columns['Vehicle_Age_gt_2_Years'] = vehicle_age[:, 1]
+
+        if 'Vehicle_Damage' in df.columns:
+            columns['Vehicle_Damage_Yes'] = lookup_column(df['Vehicle_Damage'], _vehicle_damage_code,
+                                                          _vehicle_damage_code(np.nan), np.float64)
+
+        return DataFrame({column: columns.get(column, np.zeros(n_rows, dtype=np.int64))
+                          for column in MODEL_INPUT_COLUMNS})
+
+    except Exception as e:
+        raise exceptions(e, sys) from e
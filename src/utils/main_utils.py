@@ -8,11 +8,15 @@ can import and avoid duplication.
 import os
 import sys
 
+from typing import Dict, Iterator, List, Optional
+
 import numpy as np
 import dill
 import yaml
+import pandas as pd
 from pandas import DataFrame
 
+from src.constants import SCHEMA_FILE_PATH
 from src.exception import exceptions
 from src.logger import logging
 
@@ -79,6 +83,127 @@ def load_numpy_array_data(file_path: str) -> np.array:
         raise exceptions(e, sys) from e
 
 
+def read_schema_column_types(schema_file_path: str = SCHEMA_FILE_PATH) -> Dict[str, str]:
+    """
+    {column: type} of the columns listed in config/schema.yaml, in order
+    """
+    schema = read_yaml_file(file_path=schema_file_path)
+    return {name: dtype for column in schema["columns"] for name, dtype in column.items()}
+
+
+def iter_parquet_chunks(file_paths: List[str], chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[DataFrame]:
+    """
+    Reads Parquet files as DataFrames of at most chunk_rows rows, one file after the other
+    file_paths: Parquet files, read in this order
+    columns: only read these columns, None reads all of them
+    """
+    import pyarrow.parquet as pq
+    for file_path in file_paths:
+        for batch in pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+
+
+def parquet_schema_dtypes(file_paths: List[str], column_types: Dict[str, str], chunk_rows: int) -> Dict[str, object]:
+    """
+    The pandas dtypes the schema.yaml types are applied as, decided over a whole Parquet dataset
+    without loading it, so that every chunk of it gets the same dtypes:
+    category columns become categoricals of their sorted distinct values (only those columns are
+    read), int columns the smallest integer type holding the min / max of the Parquet statistics
+    (float64 if a value is missing), float columns float64. Text columns are left out.
+    """
+    try:
+        import pyarrow.parquet as pq
+
+        dtypes: Dict[str, object] = {}
+        int_columns = [column for column, dtype in column_types.items() if dtype == "int"]
+        low, high, with_nulls = {}, {}, set()
+        for file_path in file_paths:
+            metadata = pq.ParquetFile(file_path).metadata
+            for row_group in range(metadata.num_row_groups):
+                group = metadata.row_group(row_group)
+                for index in range(group.num_columns):
+                    column, statistics = group.column(index).path_in_schema, group.column(index).statistics
+                    if column not in int_columns or group.num_rows == 0:
+                        continue
+                    if statistics is None or not statistics.has_null_count or statistics.null_count:
+                        # missing values (or no statistics to rule them out) need float64
+                        with_nulls.add(column)
+                    if statistics is not None and statistics.has_min_max:
+                        low[column] = min(low.get(column, statistics.min), statistics.min)
+                        high[column] = max(high.get(column, statistics.max), statistics.max)
+        for column in int_columns:
+            if column in with_nulls:
+                dtypes[column] = np.float64
+            elif column in low:
+                dtypes[column] = next(int_type for int_type in (np.int8, np.int16, np.int32, np.int64)
+                                      if np.iinfo(int_type).min <= low[column] and high[column] <= np.iinfo(int_type).max)
+
+        categorical_columns = [column for column, dtype in column_types.items() if dtype == "category"]
+        if categorical_columns:
+            categories = {column: set() for column in categorical_columns}
+            for chunk in iter_parquet_chunks(file_paths, chunk_rows, columns=categorical_columns):
+                for column in categorical_columns:
+                    categories[column].update(chunk[column].dropna().unique())
+            for column in categorical_columns:
+                dtypes[column] = pd.CategoricalDtype(sorted(categories[column]))
+
+        for column, dtype in column_types.items():
+            if dtype == "float":
+                dtypes[column] = np.float64
+        return dtypes
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def apply_schema_dtypes(dataframe: DataFrame, dtypes: Dict[str, object]) -> DataFrame:
+    """
+    Casts the columns of dataframe to the dtypes of parquet_schema_dtypes
+    """
+    try:
+        return dataframe.astype({column: dtype for column, dtype in dtypes.items() if column in dataframe.columns})
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def read_column_names(file_path: str) -> List[str]:
+    """
+    Column names of a Parquet file (from its footer) or CSV file (from its header), no row is read
+    """
+    try:
+        if file_path.endswith(".csv"):
+            return list(pd.read_csv(file_path, nrows=0).columns)
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(file_path).names)
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
+def iter_dataframe_chunks(file_path: str, chunk_rows: int, columns: Optional[List[str]] = None) -> Iterator[DataFrame]:
+    """
+    Reads a Parquet file (or CSV file of older runs) as DataFrames of at most chunk_rows rows
+    columns: only read these columns, None reads all of them
+    """
+    if file_path.endswith(".csv"):
+        yield from pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows)
+    else:
+        yield from iter_parquet_chunks([file_path], chunk_rows, columns=columns)
+
+
+def load_dataframe(file_path: str, columns: Optional[List[str]] = None) -> DataFrame:
+    """
+    Load a DataFrame saved as Parquet (CSV files of older runs are still read)
+    file_path: str location of file to load
+    columns: only read these columns, None reads all of them
+    return: DataFrame
+    """
+    try:
+        if file_path.endswith(".csv"):
+            return pd.read_csv(file_path, usecols=columns)
+        return pd.read_parquet(file_path, columns=columns)
+    except Exception as e:
+        raise exceptions(e, sys) from e
+
+
 def save_object(file_path: str, obj: object) -> None:
     logging.info("Entered the save_object method of utils")
 
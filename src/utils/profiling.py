@@ -0,0 +1,239 @@
+"""
+Wall time, CPU time and memory of the training pipeline stages and of their major steps.
+
+Code marks a step with `with profile_step("fit_transform"):`. Outside a profiled pipeline run this
+does nothing. While a PipelineProfiler is active (the state lives on the class, like
+MetricsRegistry, so the components need no profiler argument) every step records:
+
+- wall time;
+- the CPU time of its thread and of the whole process (the latter includes the native threads of
+  XGBoost / numpy and whatever ran concurrently);
+- RSS at its start, end and peak;
+- optionally, the peak of tracemalloc traced memory.
+
+Steps nest per thread: a step opened inside the data_transformation stage is recorded as
+"data_transformation/fit_transform". Work handed to another thread passes current_step() as the
+parent of its steps to keep them under the stage.
+
+Peaks are sampled every sample_seconds and at every step boundary, and credited to every step
+active at that moment, so overlapping stages share them. The tracemalloc peak is exact, because
+tracemalloc keeps it between samples. RSS is read from /proc/self/statm, so it may miss spikes
+shorter than the sampling interval and is not available outside Linux.
+"""
+import cProfile
+import dataclasses
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+from src.logger import logging
+
+MB = 1024 * 1024
+
+
+def current_rss_mb() -> Optional[float]:
+    "Resident set size of this process in MB, None where /proc is not available"
+    try:
+        with open("/proc/self/statm") as file_obj:
+            return int(file_obj.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class StepProfile:
+    name: str
+    thread: str
+    started: float          # seconds since the profiler started
+    rss_start_mb: Optional[float] = None
+    traced_start_mb: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    thread_cpu_seconds: Optional[float] = None
+    process_cpu_seconds: Optional[float] = None
+    rss_end_mb: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    peak_traced_mb: Optional[float] = None
+    cprofile_path: Optional[str] = None
+    error: Optional[str] = None
+
+
+class PipelineProfiler:
+    """
+    Profiles the steps run while it is active (`with PipelineProfiler(...):`) and writes them as a
+    JSON report to report_path when it exits, whether the run succeeded or not.
+    """
+    _active: Optional["PipelineProfiler"] = None
+    _local = threading.local()      # stack of the step names open in each thread
+
+    def __init__(self, run_id: str, report_path: str, trace_memory: bool = False,
+                 cprofile_dir: Optional[str] = None, sample_seconds: float = 0.05):
+        """
+        :param run_id: Pipeline run the report belongs to
+        :param report_path: JSON report written when the profiler exits
+        :param trace_memory: Also record tracemalloc peaks (slows down python allocations)
+        :param cprofile_dir: Write a <stage>.prof cProfile dump per stage there, None to skip
+        :param sample_seconds: Interval of the memory sampling thread
+        """
+        self.run_id = run_id
+        self.report_path = report_path
+        self.trace_memory = trace_memory
+        self.cprofile_dir = cprofile_dir
+        self.sample_seconds = sample_seconds
+        self.steps: List[StepProfile] = []
+        self._open: List[StepProfile] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._started_tracing = False
+
+    @classmethod
+    def active(cls) -> Optional["PipelineProfiler"]:
+        return cls._active
+
+    def __enter__(self) -> "PipelineProfiler":
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        self._stop.clear()
+        self._sampler = threading.Thread(target=self._sample_loop, name="pipeline-profiler", daemon=True)
+        self._sampler.start()
+        PipelineProfiler._active = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        PipelineProfiler._active = None
+        self._stop.set()
+        self._sampler.join()
+        try:
+            self.write_report(status="failed" if exc_type is not None else "succeeded")
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+                self._started_tracing = False
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.sample_seconds):
+            self._sample()
+
+    def _sample(self) -> None:
+        "Credits the memory peak since the last sample to every open step"
+        rss = current_rss_mb()
+        traced = None
+        with self._lock:
+            if self.trace_memory and tracemalloc.is_tracing():
+                traced = tracemalloc.get_traced_memory()[1] / MB
+                tracemalloc.reset_peak()
+            for step in self._open:
+                if rss is not None:
+                    step.peak_rss_mb = max(step.peak_rss_mb or 0.0, rss)
+                if traced is not None:
+                    step.peak_traced_mb = max(step.peak_traced_mb or 0.0, traced)
+
+    @staticmethod
+    def current_step() -> Optional[str]:
+        "Name of the innermost step open in this thread"
+        stack = getattr(PipelineProfiler._local, "stack", None)
+        return "/".join(stack) if stack else None
+
+    @contextmanager
+    def step(self, name: str, cprofile: bool = False, parent: Optional[str] = None) -> Iterator[StepProfile]:
+        """
+        Records the step while the block runs. cprofile dumps a cProfile of the block (in this
+        thread only) into cprofile_dir when one is set. parent prefixes the name of a step opened
+        outside any other step of this thread.
+        """
+        stack = getattr(PipelineProfiler._local, "stack", None)
+        if stack is None:
+            stack = PipelineProfiler._local.stack = []
+        stack.append(f"{parent}/{name}" if parent and not stack else name)
+        self._sample()      # the peak so far belongs to the steps open before this one
+        step = StepProfile(name="/".join(stack), thread=threading.current_thread().name,
+                           started=time.perf_counter() - self._start, rss_start_mb=current_rss_mb())
+        if self.trace_memory and tracemalloc.is_tracing():
+            step.traced_start_mb = tracemalloc.get_traced_memory()[0] / MB
+        with self._lock:
+            self._open.append(step)
+            self.steps.append(step)
+
+        profile = None
+        if cprofile and self.cprofile_dir is not None:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # another profiler is enabled (python 3.12+ allows a single one at a time)
+                logging.info(f"No cProfile for step {step.name}: {e}")
+                profile = None
+
+        start, start_cpu, start_thread_cpu = time.perf_counter(), time.process_time(), time.thread_time()
+        try:
+            yield step
+        except BaseException as e:
+            step.error = repr(e)
+            raise
+        finally:
+            step.wall_seconds = time.perf_counter() - start
+            step.process_cpu_seconds = time.process_time() - start_cpu
+            step.thread_cpu_seconds = time.thread_time() - start_thread_cpu
+            if profile is not None:
+                profile.disable()
+                os.makedirs(self.cprofile_dir, exist_ok=True)
+                step.cprofile_path = os.path.join(self.cprofile_dir, f"{step.name.replace('/', '.')}.prof")
+                profile.dump_stats(step.cprofile_path)
+            self._sample()
+            step.rss_end_mb = current_rss_mb()
+            with self._lock:
+                self._open.remove(step)
+            stack.pop()
+
+    def summary(self) -> str:
+        "One line per step: wall, CPU and memory"
+        def number(value: Optional[float], unit: str) -> str:
+            return f"{value:.2f}{unit}" if value is not None else "-"
+
+        lines = [f"{'step':<48} {'wall':>9} {'thread cpu':>11} {'process cpu':>12} {'peak rss':>10} {'peak traced':>12}"]
+        for step in sorted(self.steps, key=lambda step: step.started):
+            lines.append(f"{step.name:<48} {number(step.wall_seconds, 's'):>9} {number(step.thread_cpu_seconds, 's'):>11} "
+                         f"{number(step.process_cpu_seconds, 's'):>12} {number(step.peak_rss_mb, 'MB'):>10} "
+                         f"{number(step.peak_traced_mb, 'MB'):>12}")
+        return "\n".join(lines)
+
+    def write_report(self, status: str) -> None:
+        with self._lock:
+            report = {
+                "run_id": self.run_id,
+                "status": status,
+                "wall_seconds": time.perf_counter() - self._start,
+                "process_cpu_seconds": time.process_time() - self._start_cpu,
+                "rss_end_mb": current_rss_mb(),
+                "trace_memory": self.trace_memory,
+                "steps": [dataclasses.asdict(step) for step in sorted(self.steps, key=lambda step: step.started)],
+            }
+        os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+        temp_path = self.report_path + ".tmp"
+        with open(temp_path, "w") as file_obj:
+            json.dump(report, file_obj, indent=2)
+        os.replace(temp_path, self.report_path)
+        logging.info(f"Pipeline run {self.run_id} profile written to {self.report_path}:\n{self.summary()}")
+
+
+@contextmanager
+def profile_step(name: str, cprofile: bool = False, parent: Optional[str] = None) -> Iterator[Optional[StepProfile]]:
+    "PipelineProfiler.step of the active profiler, a no-op when no pipeline run is being profiled"
+    profiler = PipelineProfiler.active()
+    if profiler is None:
+        yield None
+        return
+    with profiler.step(name, cprofile=cprofile, parent=parent) as step:
+        yield step
+
+
+def current_step() -> Optional[str]:
+    "Name of the innermost step open in this thread, None outside a profiled step"
+    return PipelineProfiler.current_step()
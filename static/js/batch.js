@@ -33,6 +33,45 @@ function parseClipboardText(text){
     return {headers, rows};
 }
 
+// Pastes larger than this are sent as CSV to the streaming /predict_file endpoint
+const STREAM_MIN_ROWS = 5000;
+
+function toCsv(headers, objects){
+    const quote = v => '"' + String(v === undefined || v === null ? '' : v).replace(/"/g,'""') + '"';
+    const lines = [headers.map(quote).join(',')];
+    objects.forEach(obj => lines.push(headers.map(h => quote(obj[h])).join(',')));
+    return lines.join('\n');
+}
+
+async function predictLargeBatch(headers, objects){
+    // predictions come back as NDJSON lines ({"row": i, "prediction": ...}) while chunks are scored
+    const resp = await fetch('/predict_file?format=csv&output=ndjson',{
+        method:'POST',
+        headers: {'Content-Type':'text/csv'},
+        body: toCsv(headers, objects)
+    });
+    if(!resp.ok){
+        const data = await resp.json();
+        throw new Error(data.error || resp.statusText);
+    }
+    const preds = new Array(objects.length);
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffered = '';
+    for(;;){
+        const {done, value} = await reader.read();
+        buffered += decoder.decode(value || new Uint8Array(), {stream: !done});
+        const lines = buffered.split('\n');
+        buffered = lines.pop();
+        lines.filter(l => l.trim().length > 0).forEach(l => {
+            const item = JSON.parse(l);
+            preds[item.row] = item.prediction;
+        });
+        if(done) break;
+    }
+    return preds;
+}
+
 function renderPreview(headers, rows){
     const container = document.getElementById('paste-preview');
     container.innerHTML = '';
@@ -83,14 +122,19 @@ function renderPreview(headers, rows){
         });
 
         try{
-            const resp = await fetch('/predict_batch',{
-                method:'POST',
-                headers: {'Content-Type':'application/json'},
-                body: JSON.stringify({rows: objects})
-            });
-            const data = await resp.json();
-            if(data.error){ alert('Error: '+data.error); predictBtn.disabled=false; predictBtn.textContent='Predict All'; return; }
-            const preds = data.predictions || [];
+            let preds;
+            if(objects.length > STREAM_MIN_ROWS){
+                preds = await predictLargeBatch(headers, objects);
+            } else {
+                const resp = await fetch('/predict_batch',{
+                    method:'POST',
+                    headers: {'Content-Type':'application/json'},
+                    body: JSON.stringify({rows: objects})
+                });
+                const data = await resp.json();
+                if(data.error){ alert('Error: '+data.error); predictBtn.disabled=false; predictBtn.textContent='Predict All'; return; }
+                preds = data.predictions || [];
+            }
             tableRows.forEach((tr,idx)=>{
                 const predCell = tr.querySelectorAll('td')[headers.length];
                 predCell.textContent = preds[idx] || '';